@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark the lxml and minidom engines used by unpack.py and pack.py.
+
+Each engine pretty-prints (unpack) and then condenses (pack) the largest XML
+parts of the given Office files, in a separate process so peak memory can be
+reported. The pretty-printed parts of both engines are checked for
+identity, the round-tripped parts for equivalence (canonical XML).
+
+Example usage:
+    python benchmark_xml_engines.py <office_file> [<office_file> ...] [--top 3]
+    python benchmark_xml_engines.py --paragraphs 50000
+"""
+
+import argparse
+import multiprocessing
+import resource
+import time
+import zipfile
+
+import lxml.etree
+
+from pack import XML_ENGINES, condense_xml_bytes
+from unpack import pretty_print_xml_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark XML engines")
+    parser.add_argument("office_files", nargs="*", help="Office files to take parts from")
+    parser.add_argument(
+        "--top", type=int, default=3, help="Number of largest parts per file (default: 3)"
+    )
+    parser.add_argument(
+        "--paragraphs",
+        type=int,
+        default=20000,
+        help="Paragraphs in the synthetic document.xml used when no files are given",
+    )
+    args = parser.parse_args()
+
+    fixtures = []
+    for office_file in args.office_files:
+        with zipfile.ZipFile(office_file) as zf:
+            parts = [
+                i for i in zf.infolist() if i.filename.endswith((".xml", ".rels"))
+            ]
+            parts.sort(key=lambda i: i.file_size, reverse=True)
+            for info in parts[: args.top]:
+                fixtures.append((f"{office_file}:{info.filename}", zf.read(info)))
+    if not fixtures:
+        fixtures.append(
+            ("synthetic document.xml", synthetic_document(args.paragraphs))
+        )
+
+    ctx = multiprocessing.get_context("spawn")
+    for name, content in fixtures:
+        print(f"{name} ({len(content) / 1_000_000:.1f} MB)")
+        pretty_outputs, outputs = {}, {}
+        for engine in XML_ENGINES:
+            with ctx.Pool(1) as pool:
+                result = pool.apply(run_engine, (engine, content))
+            pretty_s, condense_s, peak_mb, pretty_outputs[engine], outputs[engine] = result
+            print(
+                f"  {engine:8} unpack {pretty_s:7.3f}s  pack {condense_s:7.3f}s  "
+                f"peak RSS {peak_mb:7.1f} MB"
+            )
+        print(f"  identical unpack output: {'yes' if len(set(pretty_outputs.values())) == 1 else 'NO'}")
+        canonical = {canonicalize(out) for out in outputs.values()}
+        print(f"  equivalent output: {'yes' if len(canonical) == 1 else 'NO'}")
+
+
+def run_engine(engine, content):
+    """Round-trip content through one engine. Runs in a fresh worker process."""
+    start = time.perf_counter()
+    pretty = pretty_print_xml_bytes(content, engine=engine)
+    pretty_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    condensed = condense_xml_bytes(pretty, engine=engine)
+    condense_s = time.perf_counter() - start
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return pretty_s, condense_s, peak_mb, pretty, condensed
+
+
+def canonicalize(content):
+    return lxml.etree.tostring(lxml.etree.fromstring(content), method="c14n")
+
+
+def synthetic_document(paragraphs):
+    """Build a Word document.xml with the given number of formatted paragraphs."""
+    body = "".join(
+        f'<w:p w:rsidR="00A1B2C3"><w:pPr><w:pStyle w:val="Normal"/></w:pPr>'
+        f"<w:r><w:rPr><w:b/></w:rPr><w:t>Clause {i}.</w:t></w:r>"
+        f'<w:r><w:t xml:space="preserve"> The parties agree that item {i} '
+        f"&amp; its annex remain in force. </w:t></w:r></w:p>"
+        for i in range(paragraphs)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{body}</w:body></w:document>"
+    ).encode("utf-8")
+
+
+if __name__ == "__main__":
+    main()
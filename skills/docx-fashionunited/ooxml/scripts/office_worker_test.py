@@ -0,0 +1,225 @@
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import office_worker
+from office_worker import OfficeWorker, OfficeWorkerError
+
+
+@unittest.skipIf(sys.platform == "win32", "workers need POSIX process groups")
+class OfficeWorkerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.state_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.state_dir, ignore_errors=True)
+
+    def spawn(self, args, **kwargs):
+        process = subprocess.Popen(args, **kwargs)
+        self.addCleanup(_kill_quietly, process)
+        return process
+
+
+class TestKill(OfficeWorkerTestCase):
+    def test_kill_leaves_other_processes_alone(self):
+        """Test that a pid from the state file that isn't this worker's soffice survives kill()"""
+        unrelated = self.spawn(["sleep", "30"])
+        worker = OfficeWorker(0, self.state_dir)
+        worker.pid = unrelated.pid
+
+        worker.kill()
+        self.assertIsNone(unrelated.poll())
+        self.assertFalse(worker.healthy())
+
+    def test_kill_stops_the_whole_process_group(self):
+        """Test that kill() also stops the children soffice started (soffice.bin)"""
+        worker = OfficeWorker(0, self.state_dir)
+        # Stands in for soffice: started like a worker, with a child in its group
+        launcher = self.spawn(
+            ["sh", "-c", "sleep 60 & echo $!; wait", "soffice", worker._profile_arg()],
+            stdout=subprocess.PIPE,
+            start_new_session=True,
+        )
+        child_pid = int(launcher.stdout.readline())
+        launcher.stdout.close()
+        worker.pid = launcher.pid
+
+        worker.kill()
+        self.assertIsNotNone(launcher.poll())
+        self.assertFalse(office_worker._group_alive(launcher.pid))
+        self.assertIsNone(office_worker._command_line(child_pid))
+
+    def test_stop_removes_the_state(self):
+        """Test that a stopped worker is no longer part of the pool"""
+        self.state_dir.joinpath("worker-0.json").write_text(json.dumps({"pid": None, "port": 1}))
+        self.state_dir.joinpath("worker-2.json").write_text(json.dumps({"pid": None, "port": 2}))
+        self.assertEqual([w.index for w in office_worker.pool_workers(self.state_dir)], [0, 2])
+
+        office_worker.stop_pool(self.state_dir)
+        self.assertEqual(office_worker.pool_workers(self.state_dir), [])
+
+
+class FakeWorker(OfficeWorker):
+    """A worker without soffice that counts its restarts."""
+
+    def __init__(self, index, state_dir):
+        super().__init__(index, state_dir)
+        self.restarts = 0
+        self.alive = True
+
+    def restart(self):
+        self.restarts += 1
+        self.alive = True
+
+    def healthy(self):
+        return self.alive
+
+
+class TestRun(OfficeWorkerTestCase):
+    def setUp(self):
+        super().setUp()
+        patch = mock.patch.object(
+            office_worker, "UnoRuntimeException", ConnectionError, create=True
+        )
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.worker = FakeWorker(0, self.state_dir)
+
+    def test_result(self):
+        """Test that run() returns what the call returns, without restarting"""
+        self.assertEqual(self.worker.run("add", 5, lambda a, b: a + b, 2, 3), 5)
+        self.assertEqual(self.worker.restarts, 0)
+
+    def test_timeout_restarts_the_worker(self):
+        """Test that a call over the timeout raises TimeoutExpired and restarts the worker"""
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.worker.run("hang", 0.2, time.sleep, 2)
+        self.assertEqual(self.worker.restarts, 1)
+
+    def test_crash_restarts_the_worker(self):
+        """Test that a call that kills the worker raises OfficeWorkerError and restarts it"""
+
+        def crash():
+            self.worker.alive = False
+            raise RuntimeError("soffice died")
+
+        with self.assertRaisesRegex(OfficeWorkerError, "soffice died"):
+            self.worker.run("crash", 5, crash)
+        self.assertEqual(self.worker.restarts, 1)
+
+    def test_failure_of_a_healthy_worker_keeps_it(self):
+        """Test that a document error doesn't restart a worker that still answers"""
+        with self.assertRaises(OfficeWorkerError):
+            self.worker.run("load", 5, lambda: 1 / 0)
+        self.assertEqual(self.worker.restarts, 0)
+
+
+class TestAcquireWorker(OfficeWorkerTestCase):
+    def setUp(self):
+        super().setUp()
+        if office_worker.fcntl is None:
+            self.skipTest("needs fcntl")
+        for index in range(2):
+            self.state_dir.joinpath(f"worker-{index}.json").write_text(
+                json.dumps({"pid": None, "port": index})
+            )
+        patches = [
+            mock.patch.object(office_worker, "uno", object()),
+            mock.patch.object(OfficeWorker, "healthy", lambda worker: True),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_callers_get_different_workers(self):
+        """Test that concurrent callers each lock a worker, and a third waits for one"""
+        held = []
+        both_held = threading.Barrier(3)
+        released = threading.Event()
+
+        def hold():
+            with office_worker.acquire_worker(self.state_dir) as worker:
+                held.append(worker.index)
+                both_held.wait(5)
+                released.wait(5)
+
+        threads = [threading.Thread(target=hold) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        both_held.wait(5)
+        self.assertEqual(sorted(held), [0, 1])
+
+        acquired = threading.Event()
+
+        def wait_for_worker():
+            with office_worker.acquire_worker(self.state_dir):
+                acquired.set()
+
+        waiter = threading.Thread(target=wait_for_worker)
+        waiter.start()
+        self.assertFalse(acquired.wait(0.3))
+        released.set()
+        self.assertTrue(acquired.wait(5))
+        for thread in threads + [waiter]:
+            thread.join(5)
+
+    def test_busy_pool_falls_back_after_timeout(self):
+        """Test that a caller gives up waiting for a busy pool, to run one-shot soffice"""
+        locks = []
+        for index in range(2):
+            locks.append(open(self.state_dir / f"worker-{index}.lock", "a"))
+            self.addCleanup(locks[-1].close)
+            office_worker.fcntl.flock(locks[-1], office_worker.fcntl.LOCK_EX)
+
+        started = time.monotonic()
+        with office_worker.acquire_worker(self.state_dir, timeout=0.3) as worker:
+            self.assertIsNone(worker)
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+
+        locks[1].close()
+        with office_worker.acquire_worker(self.state_dir, timeout=0.3) as worker:
+            self.assertEqual(worker.index, 1)
+
+    def test_no_pool_without_uno(self):
+        """Test that callers fall back to one-shot soffice without the LibreOffice bindings"""
+        with mock.patch.object(office_worker, "uno", None):
+            with office_worker.acquire_worker(self.state_dir) as worker:
+                self.assertIsNone(worker)
+
+
+class TestOneShotFallback(OfficeWorkerTestCase):
+    def test_convert_without_pool_runs_soffice(self):
+        """Test that convert_document() runs soffice --convert-to when there is no pool"""
+        soffice = self.state_dir / "soffice"
+        soffice.write_text('#!/bin/sh\necho "$@" > "$(dirname "$0")/args"\n')
+        soffice.chmod(0o755)
+        with mock.patch.object(office_worker, "uno", None), mock.patch.object(
+            office_worker, "SOFFICE", str(soffice)
+        ):
+            result = office_worker.convert_document("deck.pptx", self.state_dir, "pdf")
+
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(
+            self.state_dir.joinpath("args").read_text().split(),
+            ["--headless", "--convert-to", "pdf", "--outdir", str(self.state_dir), "deck.pptx"],
+        )
+
+
+def _kill_quietly(process):
+    if process.poll() is None:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            process.kill()
+    process.wait()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import io
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+try:
+    import docx  # python-docx, to build the fixture document
+    from PIL import Image
+except ImportError:
+    docx = None
+
+import pack
+from pack import condense_xml_bytes, pack_document, repack_document
+from unpack import unpack_document
+
+
+def make_docx(path):
+    """Write a small .docx with a paragraph and an image, and return its path."""
+    image = io.BytesIO()
+    Image.effect_noise((64, 64), 50).convert("RGB").save(image, "PNG")
+    document = docx.Document()
+    document.add_paragraph("Hello world")
+    document.add_picture(image)
+    document.save(path)
+    return Path(path)
+
+
+@unittest.skipIf(docx is None, "needs python-docx and Pillow for the fixture")
+class PackTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.docx_path = make_docx(self.temp_dir / "fixture.docx")
+
+    def assertValidArchive(self, path):
+        with zipfile.ZipFile(path) as zf:
+            self.assertIsNone(zf.testzip())
+
+
+def tree_bytes(path):
+    """Return the files under a directory, by relative path."""
+    return {
+        f.relative_to(path).as_posix(): f.read_bytes()
+        for f in sorted(Path(path).rglob("*"))
+        if f.is_file()
+    }
+
+
+class TestPackDocument(PackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.unpacked = self.temp_dir / "unpacked"
+        unpack_document(self.docx_path, self.unpacked)
+
+    def pack(self, name, **kwargs):
+        output = self.temp_dir / name
+        self.assertTrue(pack_document(self.unpacked, output, **kwargs))
+        self.assertValidArchive(output)
+        return output
+
+    def assertPacksTheFixture(self, packed):
+        """Assert that packed has the fixture's members, its XML parts condensed."""
+        with zipfile.ZipFile(self.docx_path) as source, zipfile.ZipFile(packed) as zf:
+            self.assertEqual(sorted(zf.namelist()), sorted(source.namelist()))
+            for name in source.namelist():
+                expected = source.read(name)
+                if name.endswith((".xml", ".rels")):
+                    expected = condense_xml_bytes(expected)
+                self.assertEqual(zf.read(name), expected, name)
+
+    def test_round_trip(self):
+        """Test that packing an unpacked document gives back the members it had"""
+        self.assertPacksTheFixture(self.pack("packed.docx"))
+
+    def test_members_match_the_previous_pack(self):
+        """Test that members are what copying, condensing with minidom and zipping wrote"""
+        with zipfile.ZipFile(self.pack("packed.docx")) as zf:
+            packed = {name: zf.read(name) for name in zf.namelist()}
+        expected = {
+            name: condense_xml_bytes(content, engine="minidom")
+            if name.endswith((".xml", ".rels"))
+            else content
+            for name, content in tree_bytes(self.unpacked).items()
+        }
+        self.assertEqual(packed, expected)
+
+    def test_store_media(self):
+        """Test that store_media stores compressed media and still deflates the rest"""
+        with zipfile.ZipFile(self.pack("stored.docx", store_media=True)) as zf:
+            compress_types = {info.filename: info.compress_type for info in zf.infolist()}
+        self.assertIn("word/media/image1.png", compress_types)
+        for name, compress_type in compress_types.items():
+            media = Path(name).suffix in pack.COMPRESSED_MEDIA_EXTENSIONS
+            expected = zipfile.ZIP_STORED if media else zipfile.ZIP_DEFLATED
+            self.assertEqual(compress_type, expected, name)
+
+        with zipfile.ZipFile(self.pack("deflated.docx")) as zf:
+            self.assertEqual(zf.getinfo("word/media/image1.png").compress_type, zipfile.ZIP_DEFLATED)
+        self.assertPacksTheFixture(self.temp_dir / "stored.docx")
+
+    def test_compresslevel(self):
+        """Test that the deflate level applies to every part and doesn't change the content"""
+        sizes = {}
+        for level in (0, 9):
+            with zipfile.ZipFile(self.pack(f"level{level}.docx", compresslevel=level)) as zf:
+                sizes[level] = {i.filename: (i.compress_size, i.file_size) for i in zf.infolist()}
+        for name, (compress_size, file_size) in sizes[0].items():
+            # Level 0 stores the data in deflate blocks, which only adds framing
+            self.assertGreaterEqual(compress_size, file_size, name)
+        self.assertLess(
+            sizes[9]["word/document.xml"][0], sizes[0]["word/document.xml"][0]
+        )
+        self.assertPacksTheFixture(self.temp_dir / "level9.docx")
+
+
+class TestRepackDocument(PackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.new_document = self.temp_dir / "document.xml"
+        self.new_document.write_text(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">\n'
+            "  <w:body>\n    <w:p><w:r><w:t>Replaced</w:t></w:r></w:p>\n  </w:body>\n"
+            "</w:document>\n"
+        )
+        self.new_image = self.temp_dir / "image9.png"
+        self.new_image.write_bytes(b"not really a png")
+
+    def repack(self, output):
+        repack_document(
+            self.docx_path,
+            output,
+            {"word/document.xml": self.new_document, "word/media/image9.png": self.new_image},
+        )
+        return output
+
+    def assertRepacked(self, path):
+        self.assertValidArchive(path)
+        with zipfile.ZipFile(self.docx_path) as source, zipfile.ZipFile(path) as repacked:
+            names = source.namelist()
+            self.assertEqual(repacked.namelist(), names + ["word/media/image9.png"])
+            for info in source.infolist():
+                copied = repacked.getinfo(info.filename)
+                if info.filename == "word/document.xml":
+                    continue
+                self.assertEqual(copied.CRC, info.CRC, info.filename)
+                self.assertEqual(copied.date_time, info.date_time, info.filename)
+                self.assertEqual(repacked.read(copied), source.read(info), info.filename)
+
+            document = repacked.read("word/document.xml")
+            self.assertIn(b"<w:body><w:p><w:r><w:t>Replaced</w:t>", document)
+            self.assertEqual(repacked.read("word/media/image9.png"), b"not really a png")
+
+    def test_copied_members_are_unchanged(self):
+        """Test that members that aren't replaced keep their data and CRC"""
+        self.assertRepacked(self.repack(self.temp_dir / "out.docx"))
+
+    def test_copied_members_keep_their_compressed_data(self):
+        """Test that the raw copy doesn't compress members again"""
+        repacked_path = self.repack(self.temp_dir / "out.docx")
+        with zipfile.ZipFile(self.docx_path) as source, zipfile.ZipFile(repacked_path) as repacked:
+            for info in source.infolist():
+                if info.filename != "word/document.xml":
+                    self.assertEqual(
+                        repacked.getinfo(info.filename).compress_size, info.compress_size
+                    )
+
+    def test_copy_without_zipfile_internals(self):
+        """Test that members are streamed through the public API where the raw copy isn't checked"""
+        with mock.patch.object(pack, "RAW_COPY_VERSIONS", ((2, 0), (2, 7))):
+            self.assertRepacked(self.repack(self.temp_dir / "out.docx"))
+
+    def test_repack_in_place(self):
+        """Test that the source file can be the output, and is replaced only when complete"""
+        expected = self.repack(self.temp_dir / "out.docx").read_bytes()
+        self.repack(self.docx_path)
+        self.assertEqual(self.docx_path.read_bytes(), expected)
+        self.assertEqual(list(self.temp_dir.glob("*.tmp")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+import defusedxml.minidom
+
+try:
+    import docx  # python-docx, to build fixture documents
+except ImportError:
+    docx = None
+try:
+    import pptx  # python-pptx, to build fixture presentations
+except ImportError:
+    pptx = None
+
+import unpack
+from unpack import pretty_print_xml_bytes, unpack_document
+
+# Documents that exercise minidom's corner cases: mixed content, whitespace-only
+# text, comments and processing instructions, escaping, non-ascii text, and
+# namespace declarations that are repeated, rebound or shadowed
+EDGE_CASES = [
+    b'<a>x<b/>  <c>t</c>\n<!-- c&d --><?pi  data ?>y&amp;"q" &gt;</a>',
+    '<?xml version="1.0" encoding="UTF-8"?><!--top--><a xmlns:w="u" '
+    'w:x="1\n2&#10;&#9;" b="&lt;&quot;&apos;">é\U0001F600'
+    '<w:t xml:space="preserve">  sp  </w:t>z</a><?after?>'.encode("utf-8"),
+    b'<a xmlns="d" xmlns:p="u1"><p:b xmlns:p="u2" p:k="v"><c xmlns:q="u2" q:z="1"/></p:b>'
+    b'<d p:k="x"/></a>',
+    b'<a xmlns:p="u" xmlns:q="u"><b p:k="1"/></a>',
+    b"<a><b>   </b><c>\n</c><d></d><![CDATA[<cd>]]></a>",
+    '<?xml version="1.0" encoding="UTF-16"?><a>ü</a>'.encode("utf-16"),
+]
+
+
+def xml_parts(path):
+    """Return the .xml and .rels parts of an Office file, by name."""
+    with zipfile.ZipFile(path) as zf:
+        return {
+            name: zf.read(name)
+            for name in zf.namelist()
+            if name.endswith((".xml", ".rels"))
+        }
+
+
+def baseline_unpack(input_file, output_dir):
+    """Unpack the way unpack.py did before unpack_document(): extract, then
+    pretty-print every .xml and .rels file with minidom."""
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    zipfile.ZipFile(input_file).extractall(output_path)
+    xml_files = list(output_path.rglob("*.xml")) + list(output_path.rglob("*.rels"))
+    for xml_file in xml_files:
+        content = xml_file.read_text(encoding="utf-8")
+        dom = defusedxml.minidom.parseString(content)
+        xml_file.write_bytes(dom.toprettyxml(indent="  ", encoding="ascii"))
+
+
+def tree_bytes(path):
+    """Return the files under a directory, by relative path."""
+    return {
+        f.relative_to(path).as_posix(): f.read_bytes()
+        for f in sorted(Path(path).rglob("*"))
+        if f.is_file()
+    }
+
+
+def make_docx(path):
+    document = docx.Document()
+    document.add_heading("Title", level=1)
+    document.add_paragraph("Café & \"quotes\" <tags>  with  spaces ")
+    document.add_table(rows=2, cols=2).cell(0, 0).text = "cell"
+    document.save(path)
+    return path
+
+
+def make_pptx(path):
+    presentation = pptx.Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[1])
+    slide.shapes.title.text = "Title"
+    slide.placeholders[1].text = "Bullet • one\nBullet two"
+    presentation.save(path)
+    return path
+
+
+class UnpackTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def assertSameAsMinidom(self, name, content):
+        expected = pretty_print_xml_bytes(content, engine="minidom")
+        with self.subTest(part=name):
+            self.assertEqual(pretty_print_xml_bytes(content, engine="lxml"), expected)
+        with self.subTest(part=name, pretty_printed_twice=True):
+            self.assertEqual(
+                pretty_print_xml_bytes(expected, engine="lxml"),
+                pretty_print_xml_bytes(expected, engine="minidom"),
+            )
+
+
+class TestPrettyPrint(UnpackTestCase):
+    @unittest.skipIf(docx is None, "needs python-docx for the fixture")
+    def test_lxml_matches_minidom_on_docx(self):
+        """Test that the lxml engine writes every part of a .docx like minidom"""
+        for name, content in xml_parts(make_docx(self.temp_dir / "fixture.docx")).items():
+            self.assertSameAsMinidom(name, content)
+
+    @unittest.skipIf(pptx is None, "needs python-pptx for the fixture")
+    def test_lxml_matches_minidom_on_pptx(self):
+        """Test that the lxml engine writes every part of a .pptx like minidom"""
+        for name, content in xml_parts(make_pptx(self.temp_dir / "fixture.pptx")).items():
+            self.assertSameAsMinidom(name, content)
+
+    def test_lxml_matches_minidom_on_edge_cases(self):
+        """Test that the lxml engine handles text, comments and namespaces like minidom"""
+        for index, content in enumerate(EDGE_CASES):
+            self.assertSameAsMinidom(f"edge case {index}", content)
+
+    def test_text_elements_keep_their_text(self):
+        """Test that w:t text, including its spaces, is written on one line unchanged"""
+        content = b'<w:p xmlns:w="w"><w:r><w:t xml:space="preserve"> a  b </w:t></w:r></w:p>'
+        self.assertIn(
+            b'<w:t xml:space="preserve"> a  b </w:t>\n', pretty_print_xml_bytes(content)
+        )
+
+    def test_unknown_engine(self):
+        """Test that an unknown engine is rejected"""
+        with self.assertRaises(ValueError):
+            pretty_print_xml_bytes(b"<a/>", engine="sax")
+
+
+@unittest.skipIf(docx is None or pptx is None, "needs python-docx and python-pptx for the fixtures")
+class TestUnpackDocument(UnpackTestCase):
+    def setUp(self):
+        super().setUp()
+        self.fixtures = [
+            make_docx(self.temp_dir / "fixture.docx"),
+            make_pptx(self.temp_dir / "fixture.pptx"),
+        ]
+
+    def unpack_both(self, fixture, **kwargs):
+        """Unpack with the baseline and with unpack_document(), returning both trees."""
+        baseline_unpack(fixture, self.temp_dir / "baseline" / fixture.name)
+        unpack_document(fixture, self.temp_dir / "unpacked" / fixture.name, **kwargs)
+        return (
+            tree_bytes(self.temp_dir / "baseline" / fixture.name),
+            tree_bytes(self.temp_dir / "unpacked" / fixture.name),
+        )
+
+    def test_defaults_match_the_baseline(self):
+        """Test that unpack_document() writes the same files as unpack.py used to"""
+        for fixture in self.fixtures:
+            with self.subTest(fixture=fixture.name):
+                baseline, unpacked = self.unpack_both(fixture)
+                self.assertEqual(unpacked, baseline)
+
+    def test_jobs_match_the_baseline(self):
+        """Test that pretty-printing in a process pool writes the same files"""
+        for fixture in self.fixtures:
+            with self.subTest(fixture=fixture.name):
+                baseline, unpacked = self.unpack_both(fixture, jobs=3)
+                self.assertEqual(unpacked, baseline)
+
+    def test_serial_fallback_when_the_pool_fails(self):
+        """Test that unpacking runs serially when worker processes can't be started"""
+        with mock.patch.object(unpack, "ProcessPoolExecutor", side_effect=OSError("no fork")), \
+                mock.patch("builtins.print"):
+            baseline, unpacked = self.unpack_both(self.fixtures[0], jobs=2)
+        self.assertEqual(unpacked, baseline)
+
+    def test_excluded_parts_are_extracted_unchanged(self):
+        """Test that parts matching an exclude glob are left as they are in the archive"""
+        fixture = self.fixtures[0]
+        names = unpack_document(
+            fixture, self.temp_dir / "out", exclude=["word/theme/*", "docProps/*"]
+        )
+        unpacked = tree_bytes(self.temp_dir / "out")
+        with zipfile.ZipFile(fixture) as zf:
+            for name in zf.namelist():
+                excluded = name.startswith(("word/theme/", "docProps/"))
+                self.assertEqual(name in names, not excluded and name.endswith((".xml", ".rels")))
+                if excluded:
+                    self.assertEqual(unpacked[name], zf.read(name))
+        self.assertIn("word/document.xml", names)
+
+    def test_include_only_selected_parts(self):
+        """Test that only parts matching an include glob are pretty-printed"""
+        fixture = self.fixtures[1]
+        names = unpack_document(fixture, self.temp_dir / "out", include=["ppt/slides/*.xml"])
+        self.assertEqual(names, ["ppt/slides/slide1.xml"])
+
+        baseline, unpacked = self.unpack_both(fixture)
+        with zipfile.ZipFile(fixture) as zf:
+            for name, content in tree_bytes(self.temp_dir / "out").items():
+                expected = baseline[name] if name in names else zf.read(name)
+                self.assertEqual(content, expected, name)
+
+    def test_no_pretty_extracts_everything_unchanged(self):
+        """Test that pretty=False gives the archive's parts byte for byte"""
+        fixture = self.fixtures[0]
+        self.assertEqual(unpack_document(fixture, self.temp_dir / "out", pretty=False), [])
+        with zipfile.ZipFile(fixture) as zf:
+            expected = {name: zf.read(name) for name in zf.namelist()}
+        self.assertEqual(tree_bytes(self.temp_dir / "out"), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
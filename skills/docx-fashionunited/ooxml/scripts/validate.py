@@ -3,14 +3,22 @@
 Command line tool to validate Office document XML files against XSD schemas and tracked changes.
 
 Usage:
-    python validate.py <dir> --original <original_file>
+    python validate.py <dir> --original <original_file> [--jobs N] [--cache [<manifest.json>]]
+                       [--schema-bundle <bundle.zip>]
 """
 
 import argparse
 import sys
 from pathlib import Path
 
-from validation import DOCXSchemaValidator, PPTXSchemaValidator, RedliningValidator
+from validation import (
+    BaseSchemaValidator,
+    DOCXSchemaValidator,
+    PPTXSchemaValidator,
+    RedliningValidator,
+)
+from validation.cache import default_cache_path
+from validation.schema_cache import ensure_schema_bundle
 
 
 def main():
@@ -30,6 +38,24 @@ def main():
         action="store_true",
         help="Enable verbose output",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes for per-part checks (default: 1)",
+    )
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const=True,
+        help="Only re-check parts changed since the last run, using a sidecar "
+        "manifest (default: .<dir>.validation.json next to the unpacked directory)",
+    )
+    parser.add_argument(
+        "--schema-bundle",
+        help="Path to a schema bundle archive (created on first use) to load XSDs from",
+    )
     args = parser.parse_args()
 
     # Validate paths
@@ -52,12 +78,26 @@ def main():
             print(f"Error: Validation not supported for file type {file_extension}")
             sys.exit(1)
 
+    # Load schemas from a single bundle archive if requested
+    if args.schema_bundle:
+        schemas_dir = Path(__file__).parent.parent / "schemas"
+        ensure_schema_bundle(args.schema_bundle, schemas_dir)
+
     # Run validators
     success = True
+    cache_file = args.cache
+    if cache_file is True:
+        cache_file = default_cache_path(unpacked_dir)
+
     for V in validators:
-        validator = V(unpacked_dir, original_file, verbose=args.verbose)
+        kwargs = {}
+        if issubclass(V, BaseSchemaValidator):
+            kwargs = {"jobs": args.jobs, "cache_file": cache_file}
+        validator = V(unpacked_dir, original_file, verbose=args.verbose, **kwargs)
         if not validator.validate():
             success = False
+        if isinstance(validator, BaseSchemaValidator):
+            validator.save_cache()
 
     if success:
         print("All validations PASSED!")
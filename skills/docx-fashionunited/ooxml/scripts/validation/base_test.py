@@ -0,0 +1,100 @@
+import collections
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+import lxml.etree
+
+try:
+    import docx  # python-docx, to build the fixture document
+except ImportError:
+    docx = None
+
+from .docx import DOCXSchemaValidator
+
+
+@unittest.skipIf(docx is None, "needs python-docx for the fixture")
+class TestSharedTrees(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.original = self.temp_dir / "original.docx"
+        docx.Document().save(self.original)
+        self.unpacked = self.temp_dir / "unpacked"
+        with zipfile.ZipFile(self.original) as zf:
+            zf.extractall(self.unpacked)
+        self.document_xml = self.unpacked / "word/document.xml"
+        self.validator = DOCXSchemaValidator(self.unpacked, self.original)
+
+    def count_parses(self):
+        """Patch lxml.etree.parse to count parses of unpacked files, by relative path."""
+        counts = collections.Counter()
+        parse = lxml.etree.parse
+
+        def counting_parse(source, *args, **kwargs):
+            path = Path(str(source))
+            if path.is_relative_to(self.unpacked):
+                counts[path.relative_to(self.unpacked).as_posix()] += 1
+            return parse(source, *args, **kwargs)
+
+        patch = mock.patch.object(lxml.etree, "parse", counting_parse)
+        patch.start()
+        self.addCleanup(patch.stop)
+        return counts
+
+    def rewrite(self, path, content):
+        """Rewrite a file, making sure its mtime changes."""
+        mtime = path.stat().st_mtime_ns
+        path.write_text(content)
+        os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+
+    def test_validation_parses_each_part_once(self):
+        """Test that all checks of a validation run share one parse per part"""
+        counts = self.count_parses()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(self.validator.validate())
+
+        self.assertEqual(
+            set(counts),
+            {f.relative_to(self.unpacked).as_posix() for f in self.validator.xml_files},
+        )
+        self.assertEqual(set(counts.values()), {1})
+
+    def test_changed_file_is_parsed_again(self):
+        """Test that a cached tree is dropped once its file changes"""
+        counts = self.count_parses()
+        tree = self.validator._parse(self.document_xml)
+        self.assertIs(self.validator._parse(self.document_xml), tree)
+
+        content = self.document_xml.read_text().replace("<w:body>", "<w:body><w:p/>", 1)
+        self.rewrite(self.document_xml, content)
+        self.assertIsNot(self.validator._parse(self.document_xml), tree)
+        self.assertEqual(counts["word/document.xml"], 2)
+
+    def test_syntax_errors_are_cached(self):
+        """Test that a malformed file is parsed once and fails on every lookup"""
+        counts = self.count_parses()
+        self.rewrite(self.document_xml, "<w:document>")
+        for _ in range(2):
+            with self.assertRaises(lxml.etree.XMLSyntaxError):
+                self.validator._parse(self.document_xml)
+        self.assertEqual(counts["word/document.xml"], 1)
+
+    def test_copies_leave_the_shared_tree_alone(self):
+        """Test that checks that modify a tree get their own copy"""
+        shared = self.validator._parse(self.document_xml)
+        copy = self.validator._parse_copy(self.document_xml)
+        copy.getroot().clear()
+
+        self.assertIs(self.validator._parse(self.document_xml), shared)
+        self.assertGreater(len(shared.getroot()), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Sidecar manifest of per-part validation results for incremental validation.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from .schema_cache import _schema_manifest
+
+# Bump whenever the shape or meaning of cached check results changes
+CACHE_VERSION = 1
+
+
+def default_cache_path(unpacked_dir):
+    """Return the default manifest path, next to (not inside) the unpacked dir.
+
+    The manifest must live outside the unpacked directory, otherwise it would
+    be reported as an unreferenced file and packed into the document.
+    """
+    unpacked_dir = Path(unpacked_dir).resolve()
+    return unpacked_dir.with_name(f".{unpacked_dir.name}.validation.json")
+
+
+def _schemas_digest(schemas_dir):
+    """Hash the schema manifest (path, size and mtime of every .xsd)."""
+    manifest = json.dumps(_schema_manifest(Path(schemas_dir)), sort_keys=True)
+    return hashlib.sha1(manifest.encode("utf-8")).hexdigest()
+
+
+def _code_digest():
+    """Hash the validation modules, whose checks produced the cached results."""
+    digest = hashlib.sha1()
+    for module in sorted(Path(__file__).parent.glob("*.py")):
+        if not module.name.endswith("_test.py"):
+            digest.update(module.name.encode("utf-8"))
+            digest.update(module.read_bytes())
+    return digest.hexdigest()
+
+
+def _encode(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Cannot store {type(value).__name__} in validation cache")
+
+
+class ValidationCache:
+    """Per-part check results keyed by content hash.
+
+    Each entry records the hash of the part (and of any parts the check reads
+    besides it, such as the matching .rels file) together with the check's
+    result. A lookup only hits when all hashes still match, so after an edit
+    only the modified parts are re-checked. Cross-part invariants (global IDs,
+    relationship targets, content types) are re-derived from the cached
+    per-part results on every run, which is cheap and keeps them exact.
+
+    The whole manifest is discarded if the original file, the validator
+    class, the schemas or the validation code change.
+    """
+
+    def __init__(self, path, validator):
+        self.path = Path(path)
+        self.unpacked_dir = validator.unpacked_dir
+        self._header = {
+            "version": CACHE_VERSION,
+            "validator": type(validator).__name__,
+            "original": self._stamp(validator.original_file),
+            "schemas": _schemas_digest(validator.schemas_dir),
+            "code": _code_digest(),
+        }
+        self._digests = {}
+        self._results = {}
+        self._dirty = False
+        self._load()
+
+    @staticmethod
+    def _stamp(path):
+        path = Path(path).resolve()
+        stat = path.stat()
+        return [str(path), stat.st_size, stat.st_mtime_ns]
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("header") != self._header:
+            return
+        self._digests = data.get("digests", {})
+        self._results = data.get("results", {})
+
+    def _relative(self, path):
+        return Path(path).relative_to(self.unpacked_dir).as_posix()
+
+    def digest(self, path):
+        """Return the content hash of a part, rehashing only if its stat changed."""
+        rel = self._relative(path)
+        try:
+            stat = Path(path).stat()
+        except OSError:
+            return "missing"
+
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        entry = self._digests.get(rel)
+        if entry is None or entry["stamp"] != stamp:
+            digest = hashlib.sha1(Path(path).read_bytes()).hexdigest()
+            entry = {"stamp": stamp, "sha1": digest}
+            self._digests[rel] = entry
+            self._dirty = True
+        return entry["sha1"]
+
+    def _key(self, xml_file, dependencies):
+        return ":".join(self.digest(p) for p in [xml_file, *dependencies])
+
+    def get(self, check, xml_file, dependencies=()):
+        """Return (True, result) on a hit, or (False, None) if the part must be re-checked."""
+        entry = self._results.get(check, {}).get(self._relative(xml_file))
+        if entry is not None and entry["key"] == self._key(xml_file, dependencies):
+            return True, entry["result"]
+        return False, None
+
+    def put(self, check, xml_file, result, dependencies=()):
+        self._results.setdefault(check, {})[self._relative(xml_file)] = {
+            "key": self._key(xml_file, dependencies),
+            # Keep the JSON form so the manifest can be written out as-is
+            "result": json.loads(json.dumps(result, default=_encode)),
+        }
+        self._dirty = True
+
+    def save(self, xml_files):
+        """Write the manifest, dropping entries for parts that no longer exist."""
+        live = {self._relative(f) for f in xml_files}
+        for entries in [self._digests, *self._results.values()]:
+            for rel in set(entries) - live:
+                del entries[rel]
+                self._dirty = True
+        if not self._dirty:
+            return
+
+        data = {
+            "header": self._header,
+            "digests": self._digests,
+            "results": self._results,
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
@@ -0,0 +1,99 @@
+"""
+Read-only view of the original Office file shared by all validators.
+"""
+
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+
+import lxml.etree
+
+# Packages kept open by open_original_package; the least recently used one is
+# closed when another is opened beyond this
+MAX_OPEN_PACKAGES = 4
+
+# Resolved archive path -> ((mtime_ns, size), OriginalPackage), least recently
+# used first
+_open_packages = OrderedDict()
+
+
+class OriginalPackage:
+    """Lazily opened view of an original .docx/.pptx/.xlsx archive.
+
+    Members are read straight from the zip instead of extracting the whole
+    archive to disk, and parsed trees are cached so that every validator
+    working on the same original shares a single parse per part. Trees
+    returned by parse() are shared and must not be modified.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._zip = None
+        self._names = None
+        self._trees = {}
+
+    def _archive(self):
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self.path, "r")
+        return self._zip
+
+    def has(self, part_name):
+        """Return True if the archive contains part_name (e.g. 'word/document.xml')."""
+        if self._names is None:
+            self._names = set(self._archive().namelist())
+        return part_name in self._names
+
+    def read(self, part_name):
+        """Return the raw bytes of part_name. Raises KeyError if it is missing."""
+        return self._archive().read(part_name)
+
+    def open(self, part_name):
+        """Return a binary stream of part_name, for reading it incrementally."""
+        return self._archive().open(part_name)
+
+    def parse(self, part_name):
+        """Return the parsed lxml tree of part_name, parsing it on first use."""
+        tree = self._trees.get(part_name)
+        if tree is None:
+            root = lxml.etree.fromstring(self.read(part_name))
+            tree = lxml.etree.ElementTree(root)
+            self._trees[part_name] = tree
+        return tree
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+        self._names = None
+        self._trees.clear()
+
+
+def open_original_package(path):
+    """Return the shared OriginalPackage for path.
+
+    The same instance is returned for as long as the file on disk is unchanged
+    (same mtime and size), so validators created for one run share it. At most
+    MAX_OPEN_PACKAGES are kept: older ones are closed, which drops their
+    archive handle and parsed trees (a closed package reopens if used again).
+    """
+    key = str(Path(path).resolve())
+    stat = Path(key).stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _open_packages.pop(key, None)
+    if cached is not None and cached[0] == stamp:
+        _open_packages[key] = cached
+        return cached[1]
+    if cached is not None:
+        cached[1].close()
+
+    package = OriginalPackage(key)
+    _open_packages[key] = (stamp, package)
+    while len(_open_packages) > MAX_OPEN_PACKAGES:
+        _, (_, evicted) = _open_packages.popitem(last=False)
+        evicted.close()
+    return package
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
@@ -0,0 +1,114 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+try:
+    import docx  # python-docx, to build the fixture document
+except ImportError:
+    docx = None
+
+from .docx import DOCXSchemaValidator
+from . import original
+from .original import open_original_package
+
+
+@unittest.skipIf(docx is None, "needs python-docx for the fixture")
+class TestOriginalPackage(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.original = self.temp_dir / "original.docx"
+        document = docx.Document()
+        document.add_paragraph("Hello world")
+        document.save(self.original)
+
+    def test_shared_while_unchanged(self):
+        """Test that validators of one run share the package and its parsed trees"""
+        package = open_original_package(self.original)
+        self.assertIs(open_original_package(str(self.original)), package)
+        tree = package.parse("word/document.xml")
+        self.assertIs(package.parse("word/document.xml"), tree)
+
+        self.assertTrue(package.has("word/document.xml"))
+        self.assertFalse(package.has("word/missing.xml"))
+        with package.open("word/document.xml") as stream:
+            self.assertEqual(stream.read(), package.read("word/document.xml"))
+
+    def test_reopened_when_the_file_changes(self):
+        """Test that a replaced original file is read afresh"""
+        package = open_original_package(self.original)
+        package.parse("word/document.xml")
+
+        document = docx.Document()
+        document.add_paragraph("Changed")
+        document.save(self.original)
+        mtime = self.original.stat().st_mtime_ns + 10**9
+        os.utime(self.original, ns=(mtime, mtime))
+
+        reopened = open_original_package(self.original)
+        self.assertIsNot(reopened, package)
+        self.assertIn(b"Changed", reopened.read("word/document.xml"))
+
+    def test_least_recently_used_is_closed(self):
+        """Test that only MAX_OPEN_PACKAGES stay open, closing the one used longest ago"""
+        paths = [self.original]
+        for index in range(2):
+            paths.append(self.temp_dir / f"copy{index}.docx")
+            shutil.copy(self.original, paths[-1])
+        with mock.patch.object(original, "MAX_OPEN_PACKAGES", 2):
+            first, second = (open_original_package(path) for path in paths[:2])
+            first.parse("word/document.xml")
+            second.parse("word/document.xml")
+            self.assertIs(open_original_package(paths[0]), first)
+
+            open_original_package(paths[2])
+        self.assertIsNone(second._zip)
+        self.assertEqual(second._trees, {})
+        self.assertIsNotNone(first._zip)
+        self.assertNotIn(str(paths[1].resolve()), original._open_packages)
+
+        # A closed package can still be read
+        self.assertTrue(second.has("word/document.xml"))
+        second.close()
+
+    def test_existing_errors_are_read_from_the_zip(self):
+        """Test that XSD errors already in the original aren't new, without extracting it"""
+        # The same schema error in the original and in the unpacked copy
+        with zipfile.ZipFile(self.original) as zf:
+            parts = {name: zf.read(name) for name in zf.namelist()}
+        parts["word/document.xml"] = parts["word/document.xml"].replace(
+            b"<w:body>", b"<w:body><w:bogus/>", 1
+        )
+        with zipfile.ZipFile(self.original, "w") as zf:
+            for name, content in parts.items():
+                zf.writestr(name, content)
+        unpacked = self.temp_dir / "unpacked"
+        with zipfile.ZipFile(self.original) as zf:
+            zf.extractall(unpacked)
+
+        validator = DOCXSchemaValidator(unpacked, self.original)
+        output = io.StringIO()
+        with mock.patch.object(
+            zipfile.ZipFile, "extractall", side_effect=AssertionError("extracted")
+        ), contextlib.redirect_stdout(output):
+            self.assertTrue(validator.validate_against_xsd())
+
+        # The error is only reported when the original doesn't have it
+        styles_xml = unpacked / "word/styles.xml"
+        styles_xml.write_text(
+            styles_xml.read_text().replace("<w:docDefaults>", "<w:bogus/><w:docDefaults>", 1)
+        )
+        with contextlib.redirect_stdout(output):
+            self.assertFalse(DOCXSchemaValidator(unpacked, self.original).validate_against_xsd())
+        self.assertIn("word/styles.xml", output.getvalue())
+        self.assertNotIn("word/document.xml: 1 new", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Process pool support for running per-file validation checks in parallel.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+# Validator instance owned by each worker process, created by _init_worker.
+# Every worker keeps its own tree cache and compiled-schema cache.
+_worker_validator = None
+
+
+def _init_worker(validator_class, unpacked_dir, original_file):
+    global _worker_validator
+    _worker_validator = validator_class(unpacked_dir, original_file)
+
+
+def _run_checks_for_file(xml_file, checks):
+    """Run all requested checks for one file inside a worker process."""
+    return [getattr(_worker_validator, check)(xml_file) for check in checks]
+
+
+def run_file_checks(validator, checks, xml_files):
+    """Run per-file check methods for the given files in a process pool.
+
+    Args:
+        validator: BaseSchemaValidator whose files should be checked
+        checks: Names of per-file check methods on the validator
+        xml_files: Files (from validator.xml_files) to run the checks for
+
+    Returns:
+        dict: (check, str(xml_file)) -> result, or an empty dict if the pool
+        could not be used (callers then fall back to running checks serially)
+    """
+    xml_files = list(xml_files)
+    if not xml_files:
+        return {}
+
+    jobs = min(validator.jobs, len(xml_files))
+    chunksize = max(1, len(xml_files) // (jobs * 4))
+    try:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(type(validator), validator.unpacked_dir, validator.original_file),
+        ) as executor:
+            per_file = list(
+                executor.map(
+                    _run_checks_for_file,
+                    xml_files,
+                    [checks] * len(xml_files),
+                    chunksize=chunksize,
+                )
+            )
+    except Exception as e:
+        if validator.verbose:
+            print(f"Warning: parallel validation unavailable, running serially: {e}")
+        return {}
+
+    results = {}
+    for xml_file, file_results in zip(xml_files, per_file):
+        for check, result in zip(checks, file_results):
+            results[(check, str(xml_file))] = result
+    return results
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
@@ -0,0 +1,82 @@
+import contextlib
+import io
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+try:
+    import docx  # python-docx, to build the fixture document
+except ImportError:
+    docx = None
+
+from . import parallel
+from .docx import DOCXSchemaValidator
+
+# Errors injected into the fixture: an element the schema doesn't allow, a
+# relationship ID without a relationship, and a duplicate comment ID
+BROKEN_BODY = (
+    "<w:p><w:r><w:t>First</w:t></w:r></w:p>"
+    "<w:bogus/>"
+    '<w:p><w:hyperlink r:id="rId99"><w:r><w:t>Link</w:t></w:r></w:hyperlink></w:p>'
+    '<w:p><w:commentRangeStart w:id="7"/><w:commentRangeStart w:id="7"/></w:p>'
+)
+
+
+@unittest.skipIf(docx is None, "needs python-docx for the fixture")
+class TestParallelValidation(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+        self.original = self.temp_dir / "original.docx"
+        document = docx.Document()
+        for index in range(20):
+            document.add_paragraph(f"Paragraph {index}")
+        document.save(self.original)
+
+        self.unpacked = self.temp_dir / "unpacked"
+        with zipfile.ZipFile(self.original) as zf:
+            zf.extractall(self.unpacked)
+        document_xml = self.unpacked / "word/document.xml"
+        document_xml.write_text(
+            document_xml.read_text().replace("<w:body>", f"<w:body>{BROKEN_BODY}", 1)
+        )
+        (self.unpacked / "word/media").mkdir()
+        (self.unpacked / "word/media/orphan.png").write_bytes(b"png")
+
+    def validate(self, jobs):
+        """Return (result, report) of a validation run with the given jobs."""
+        validator = DOCXSchemaValidator(self.unpacked, self.original, verbose=True, jobs=jobs)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = validator.validate()
+        return result, output.getvalue(), validator
+
+    def test_report_is_the_same_as_a_serial_run(self):
+        """Test that --jobs reports the same errors, in the same order, as one process"""
+        serial_result, serial_report, _ = self.validate(jobs=1)
+        self.assertFalse(serial_result)
+        for expected in ("bogus", "rId99", "'7'", "orphan.png"):
+            self.assertIn(expected, serial_report)
+
+        parallel_result, parallel_report, validator = self.validate(jobs=3)
+        self.assertEqual((parallel_result, parallel_report), (serial_result, serial_report))
+        # The per-file checks really ran in the pool
+        self.assertTrue(validator._file_check_results)
+
+    def test_serial_fallback_when_the_pool_fails(self):
+        """Test that checks run in-process, with the same report, when no pool can start"""
+        expected = self.validate(jobs=1)[:2]
+        with mock.patch.object(parallel, "ProcessPoolExecutor", side_effect=OSError("no fork")):
+            result, report, validator = self.validate(jobs=3)
+        self.assertEqual(validator._file_check_results, {})
+        self.assertEqual((result, report.replace(
+            "Warning: parallel validation unavailable, running serially: no fork\n", "", 1
+        )), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
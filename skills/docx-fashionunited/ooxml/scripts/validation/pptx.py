@@ -25,6 +25,11 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         "tablestyleid": "tablestyles",
     }
 
+    # Also fan out the UUID check, which inspects every attribute of every part
+    PARALLEL_FILE_CHECKS = BaseSchemaValidator.PARALLEL_FILE_CHECKS + (
+        "_uuid_id_errors",
+    )
+
     def validate(self):
         """Run all validation checks and return True if all pass."""
         # Test 0: XML well-formedness
@@ -76,37 +81,10 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
     def validate_uuid_ids(self):
         """Validate that ID attributes that look like UUIDs contain only hex values."""
-        import lxml.etree
-
         errors = []
-        # UUID pattern: 8-4-4-4-12 hex digits with optional braces/hyphens
-        uuid_pattern = re.compile(
-            r"^[\{\(]?[0-9A-Fa-f]{8}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{12}[\}\)]?$"
-        )
 
         for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # Check all elements for ID attributes
-                for elem in root.iter():
-                    for attr, value in elem.attrib.items():
-                        # Check if this is an ID attribute
-                        attr_name = attr.split("}")[-1].lower()
-                        if attr_name == "id" or attr_name.endswith("id"):
-                            # Check if value looks like a UUID (has the right length and pattern structure)
-                            if self._looks_like_uuid(value):
-                                # Validate that it contains only hex characters in the right positions
-                                if not uuid_pattern.match(value):
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: ID '{value}' appears to be a UUID but contains invalid hex characters"
-                                    )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+            errors.extend(self._file_check("_uuid_id_errors", xml_file))
 
         if errors:
             print(f"FAILED - Found {len(errors)} UUID ID validation errors:")
@@ -118,6 +96,39 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                 print("PASSED - All UUID-like IDs contain valid hex values")
             return True
 
+    def _uuid_id_errors(self, xml_file):
+        """Return UUID-like ID attributes with invalid hex values in a single file."""
+        import lxml.etree
+
+        errors = []
+        # UUID pattern: 8-4-4-4-12 hex digits with optional braces/hyphens
+        uuid_pattern = re.compile(
+            r"^[\{\(]?[0-9A-Fa-f]{8}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{12}[\}\)]?$"
+        )
+
+        try:
+            root = self._parse(xml_file).getroot()
+
+            # Check all elements for ID attributes
+            for elem in root.iter():
+                for attr, value in elem.attrib.items():
+                    # Check if this is an ID attribute
+                    attr_name = attr.split("}")[-1].lower()
+                    if attr_name == "id" or attr_name.endswith("id"):
+                        # Check if value looks like a UUID (has the right length and pattern structure)
+                        if self._looks_like_uuid(value):
+                            # Validate that it contains only hex characters in the right positions
+                            if not uuid_pattern.match(value):
+                                errors.append(
+                                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                                    f"Line {elem.sourceline}: ID '{value}' appears to be a UUID but contains invalid hex characters"
+                                )
+
+        except (lxml.etree.XMLSyntaxError, Exception) as e:
+            errors.append(f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}")
+
+        return errors
+
     def _looks_like_uuid(self, value):
         """Check if a value has the general structure of a UUID."""
         # Remove common UUID delimiters
@@ -142,7 +153,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         for slide_master in slide_masters:
             try:
                 # Parse the slide master file
-                root = lxml.etree.parse(str(slide_master)).getroot()
+                root = self._parse(slide_master).getroot()
 
                 # Find the corresponding _rels file for this slide master
                 rels_file = slide_master.parent / "_rels" / f"{slide_master.name}.rels"
@@ -155,7 +166,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                     continue
 
                 # Parse the relationships file
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
+                rels_root = self._parse(rels_file).getroot()
 
                 # Build a set of valid relationship IDs that point to slide layouts
                 valid_layout_rids = set()
@@ -202,14 +213,12 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
     def validate_no_duplicate_slide_layouts(self):
         """Validate that each slide has exactly one slideLayout reference."""
-        import lxml.etree
-
         errors = []
         slide_rels_files = list(self.unpacked_dir.glob("ppt/slides/_rels/*.xml.rels"))
 
         for rels_file in slide_rels_files:
             try:
-                root = lxml.etree.parse(str(rels_file)).getroot()
+                root = self._parse(rels_file).getroot()
 
                 # Find all slideLayout relationships
                 layout_rels = [
@@ -258,7 +267,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         for rels_file in slide_rels_files:
             try:
                 # Parse the relationships file
-                root = lxml.etree.parse(str(rels_file)).getroot()
+                root = self._parse(rels_file).getroot()
 
                 # Find all notesSlide relationships
                 for rel in root.findall(
@@ -0,0 +1,129 @@
+"""
+Process-wide cache of compiled XSD schemas used by the validators.
+
+Compiled schemas are kept in memory keyed by schema path, so every part that
+maps to the same schema (and the matching part of the original file) reuses a
+single lxml.etree.XMLSchema instance.
+
+lxml cannot serialize a compiled schema, so the optional on-disk bundle stores
+the full xs:import/xs:include closure of the schema directory in one zip
+archive instead. Once a bundle is loaded, schema documents and all of their
+imports are served from memory and a fresh process no longer has to open and
+resolve dozens of separate .xsd files.
+"""
+
+import json
+import zipfile
+from pathlib import Path
+
+import lxml.etree
+
+# Resolved schema path -> compiled lxml.etree.XMLSchema
+_compiled_schemas = {}
+
+# Resolved schema path -> raw schema bytes, populated by load_schema_bundle
+_bundled_sources = {}
+
+# Archive member recording the schema files the bundle was built from
+_BUNDLE_MANIFEST_MEMBER = "MANIFEST.json"
+
+
+class _BundleResolver(lxml.etree.Resolver):
+    """Serve xs:import/xs:include targets from a loaded schema bundle."""
+
+    def resolve(self, url, pubid, context):
+        if not url:
+            return None
+        path = url[len("file://") :] if url.startswith("file://") else url
+        source = _bundled_sources.get(str(Path(path).resolve()))
+        if source is None:
+            return None
+        return self.resolve_string(source, context, base_url=url)
+
+
+def get_schema(schema_path):
+    """Return the compiled schema for schema_path, compiling it on first use."""
+    key = str(Path(schema_path).resolve())
+    schema = _compiled_schemas.get(key)
+    if schema is None:
+        parser = lxml.etree.XMLParser()
+        parser.resolvers.add(_BundleResolver())
+        if key in _bundled_sources:
+            xsd_doc = lxml.etree.ElementTree(
+                lxml.etree.fromstring(
+                    _bundled_sources[key], parser=parser, base_url=key
+                )
+            )
+        else:
+            with open(key, "rb") as xsd_file:
+                xsd_doc = lxml.etree.parse(xsd_file, parser=parser, base_url=key)
+        schema = lxml.etree.XMLSchema(xsd_doc)
+        _compiled_schemas[key] = schema
+    return schema
+
+
+def _schema_manifest(schemas_dir):
+    """Describe the .xsd files below schemas_dir by relative path, size and mtime."""
+    manifest = {}
+    for xsd_file in sorted(schemas_dir.rglob("*.xsd")):
+        stat = xsd_file.stat()
+        manifest[xsd_file.relative_to(schemas_dir).as_posix()] = [
+            stat.st_size,
+            stat.st_mtime_ns,
+        ]
+    return manifest
+
+
+def build_schema_bundle(schemas_dir, bundle_path):
+    """Write every .xsd below schemas_dir into a single bundle archive.
+
+    Args:
+        schemas_dir: Directory containing the OOXML schemas
+        bundle_path: Path of the bundle archive to create
+    """
+    schemas_dir = Path(schemas_dir).resolve()
+    bundle_path = Path(bundle_path)
+    bundle_path.parent.mkdir(parents=True, exist_ok=True)
+
+    manifest = _schema_manifest(schemas_dir)
+    with zipfile.ZipFile(bundle_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(_BUNDLE_MANIFEST_MEMBER, json.dumps(manifest, indent=2))
+        for name in manifest:
+            zf.write(schemas_dir / name, name)
+
+
+def load_schema_bundle(bundle_path, schemas_dir):
+    """Load a bundle created by build_schema_bundle for use by get_schema.
+
+    Bundle members are mapped onto schemas_dir, so schema paths and relative
+    schemaLocation references resolve exactly as they do on disk.
+
+    Returns:
+        bool: True if the bundle was loaded, False if it is missing or stale
+    """
+    schemas_dir = Path(schemas_dir).resolve()
+    try:
+        with zipfile.ZipFile(bundle_path, "r") as zf:
+            manifest = json.loads(zf.read(_BUNDLE_MANIFEST_MEMBER))
+            if manifest != _schema_manifest(schemas_dir):
+                return False
+            sources = {
+                str((schemas_dir / name).resolve()): zf.read(name)
+                for name in manifest
+            }
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+        return False
+
+    _bundled_sources.update(sources)
+    return True
+
+
+def ensure_schema_bundle(bundle_path, schemas_dir):
+    """Load the bundle at bundle_path, (re)building it first if necessary."""
+    if not load_schema_bundle(bundle_path, schemas_dir):
+        build_schema_bundle(schemas_dir, bundle_path)
+        load_schema_bundle(bundle_path, schemas_dir)
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
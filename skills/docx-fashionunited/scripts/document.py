@@ -26,23 +26,52 @@ Usage:
     doc.save()
 """
 
+import copy
+import fnmatch
 import html
+import os
 import random
+import re
 import shutil
+import sys
 import tempfile
+import zipfile
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 
 from defusedxml import minidom
-from ooxml.scripts.pack import pack_document
+from ooxml.scripts.pack import pack_document, repack_document
 from ooxml.scripts.validation.docx import DOCXSchemaValidator
 from ooxml.scripts.validation.redlining import RedliningValidator
 
-from .utilities import XMLEditor
+from .utilities import LxmlXMLEditor, XMLEditor
 
 # Path to template files
 TEMPLATE_DIR = Path(__file__).parent / "templates"
 
+# XML files at least this large (bytes) are edited with the lxml-backed editor
+LXML_EDITOR_MIN_SIZE = 5 * 1024 * 1024
+
+# Linux ioctl that clones a file copy-on-write (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+# Attributes holding para/durable IDs, which must be unique across all parts
+HEX_ID_ATTRIBUTES = {
+    "w:p": ("w14:paraId",),
+    "w15:commentEx": ("w15:paraId",),
+    "w16cid:commentId": ("w16cid:paraId", "w16cid:durableId"),
+    "w16cex:commentExtensible": ("w16cex:durableId",),
+}
+_HEX_ID_PATTERN = re.compile(rb'(?:paraId|durableId)="([0-9A-Fa-f]{1,8})"')
+
+# Namespaces that new content may need declared on the root element
+EDIT_NAMESPACES = {
+    "w14": "http://schemas.microsoft.com/office/word/2010/wordml",
+    "w16du": "http://schemas.microsoft.com/office/word/2023/wordml/word16du",
+    "w16cex": "http://schemas.microsoft.com/office/word/2018/wordml/cex",
+}
+
 
 class DocxXMLEditor(XMLEditor):
     """XMLEditor that automatically applies RSID, author, and date to new elements.
@@ -57,7 +86,12 @@ class DocxXMLEditor(XMLEditor):
     """
 
     def __init__(
-        self, xml_path, rsid: str, author: str = "Claude", initials: str = "C"
+        self,
+        xml_path,
+        rsid: str,
+        author: str = "Claude",
+        initials: str = "C",
+        hex_ids=None,
     ):
         """Initialize with required RSID and optional author.
 
@@ -66,52 +100,56 @@ class DocxXMLEditor(XMLEditor):
             rsid: RSID to automatically apply to new elements
             author: Author name for tracked changes and comments (default: "Claude")
             initials: Author initials (default: "C")
+            hex_ids: HexIdAllocator for w14:paraId and other hex ids, shared by
+                all editors of a document (default: a new one for this file)
         """
         super().__init__(xml_path)
         self.rsid = rsid
         self.author = author
         self.initials = initials
+        self.hex_ids = hex_ids if hex_ids is not None else HexIdAllocator()
 
     def _get_next_change_id(self):
-        """Get the next available change ID by checking all tracked change elements."""
-        max_id = -1
-        for tag in ("w:ins", "w:del"):
-            elements = self.dom.getElementsByTagName(tag)
-            for elem in elements:
-                change_id = elem.getAttribute("w:id")
-                if change_id:
-                    try:
-                        max_id = max(max_id, int(change_id))
-                    except ValueError:
-                        pass
-        return max_id + 1
+        """Allocate the next tracked change ID (above all w:ins/w:del ids in use)."""
+        ids = self._id_counters()
+        ids["change"] += 1
+        return ids["change"]
+
+    def _next_hex_id(self):
+        """Allocate a hex id not used by this file or the allocator's other files."""
+        self._id_counters()  # Makes sure this file's ids have been noted
+        return self.hex_ids.allocate()
+
+    def _initial_ids(self):
+        return {**super()._initial_ids(), "change": -1}
+
+    def _note_ids(self, elem):
+        super()._note_ids(elem)
+        tag = elem.tagName
+        if tag in ("w:ins", "w:del"):
+            change_id = elem.getAttribute("w:id")
+            if change_id:
+                try:
+                    change_id = int(change_id)
+                except ValueError:
+                    change_id = -1
+                self._max_ids["change"] = max(self._max_ids["change"], change_id)
+        for attr in HEX_ID_ATTRIBUTES.get(tag, ()):
+            value = elem.getAttribute(attr)
+            if value:
+                self.hex_ids.add(value)
 
     def _ensure_w16du_namespace(self):
         """Ensure w16du namespace is declared on the root element."""
-        root = self.dom.documentElement
-        if not root.hasAttribute("xmlns:w16du"):  # type: ignore
-            root.setAttribute(  # type: ignore
-                "xmlns:w16du",
-                "http://schemas.microsoft.com/office/word/2023/wordml/word16du",
-            )
+        self._ensure_namespace("w16du", EDIT_NAMESPACES["w16du"])
 
     def _ensure_w16cex_namespace(self):
         """Ensure w16cex namespace is declared on the root element."""
-        root = self.dom.documentElement
-        if not root.hasAttribute("xmlns:w16cex"):  # type: ignore
-            root.setAttribute(  # type: ignore
-                "xmlns:w16cex",
-                "http://schemas.microsoft.com/office/word/2018/wordml/cex",
-            )
+        self._ensure_namespace("w16cex", EDIT_NAMESPACES["w16cex"])
 
     def _ensure_w14_namespace(self):
         """Ensure w14 namespace is declared on the root element."""
-        root = self.dom.documentElement
-        if not root.hasAttribute("xmlns:w14"):  # type: ignore
-            root.setAttribute(  # type: ignore
-                "xmlns:w14",
-                "http://schemas.microsoft.com/office/word/2010/wordml",
-            )
+        self._ensure_namespace("w14", EDIT_NAMESPACES["w14"])
 
     def _inject_attributes_to_nodes(self, nodes):
         """Inject RSID, author, and date attributes into DOM nodes where applicable.
@@ -131,10 +169,10 @@ class DocxXMLEditor(XMLEditor):
 
         timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
-        def is_inside_deletion(elem):
-            """Check if element is inside a w:del element."""
+        def is_inside_deletion(elem, stop=None):
+            """Check if element is inside a w:del element (below stop, if given)."""
             parent = elem.parentNode
-            while parent:
+            while parent is not None and parent is not stop:
                 if parent.nodeType == parent.ELEMENT_NODE and parent.tagName == "w:del":
                     return True
                 parent = parent.parentNode
@@ -150,14 +188,14 @@ class DocxXMLEditor(XMLEditor):
             # Add w14:paraId and w14:textId if not present
             if not elem.hasAttribute("w14:paraId"):
                 self._ensure_w14_namespace()
-                elem.setAttribute("w14:paraId", _generate_hex_id())
+                elem.setAttribute("w14:paraId", self._next_hex_id())
             if not elem.hasAttribute("w14:textId"):
                 self._ensure_w14_namespace()
-                elem.setAttribute("w14:textId", _generate_hex_id())
+                elem.setAttribute("w14:textId", self._next_hex_id())
 
-        def add_rsid_to_r(elem):
+        def add_rsid_to_r(elem, inside_deletion):
             # Use w:rsidDel for <w:r> inside <w:del>, otherwise w:rsidR
-            if is_inside_deletion(elem):
+            if inside_deletion:
                 if not elem.hasAttribute("w:rsidDel"):
                     elem.setAttribute("w:rsidDel", self.rsid)
             else:
@@ -204,38 +242,56 @@ class DocxXMLEditor(XMLEditor):
                     if not elem.hasAttribute("xml:space"):
                         elem.setAttribute("xml:space", "preserve")
 
+        handlers = {
+            "w:p": add_rsid_to_p,
+            "w:t": add_xml_space_to_t,
+            "w:ins": add_tracked_change_attrs,
+            "w:del": add_tracked_change_attrs,
+            "w:comment": add_comment_attrs,
+            "w16cex:commentExtensible": add_comment_extensible_date,
+        }
+        # Descendants are handled tag by tag in this order
+        tag_order = (
+            "w:p",
+            "w:r",
+            "w:t",
+            "w:ins",
+            "w:del",
+            "w:comment",
+            "w16cex:commentExtensible",
+        )
+
         for node in nodes:
             if node.nodeType != node.ELEMENT_NODE:
                 continue
 
             # Handle the node itself
-            if node.tagName == "w:p":
-                add_rsid_to_p(node)
-            elif node.tagName == "w:r":
-                add_rsid_to_r(node)
-            elif node.tagName == "w:t":
-                add_xml_space_to_t(node)
-            elif node.tagName in ("w:ins", "w:del"):
-                add_tracked_change_attrs(node)
-            elif node.tagName == "w:comment":
-                add_comment_attrs(node)
-            elif node.tagName == "w16cex:commentExtensible":
-                add_comment_extensible_date(node)
-
-            # Process descendants (getElementsByTagName doesn't return the element itself)
-            for elem in node.getElementsByTagName("w:p"):
-                add_rsid_to_p(elem)
-            for elem in node.getElementsByTagName("w:r"):
-                add_rsid_to_r(elem)
-            for elem in node.getElementsByTagName("w:t"):
-                add_xml_space_to_t(elem)
-            for tag in ("w:ins", "w:del"):
-                for elem in node.getElementsByTagName(tag):
-                    add_tracked_change_attrs(elem)
-            for elem in node.getElementsByTagName("w:comment"):
-                add_comment_attrs(elem)
-            for elem in node.getElementsByTagName("w16cex:commentExtensible"):
-                add_comment_extensible_date(elem)
+            if node.tagName == "w:r":
+                add_rsid_to_r(node, is_inside_deletion(node))
+            elif node.tagName in handlers:
+                handlers[node.tagName](node)
+
+            # Process descendants, collected in a single walk of the subtree
+            # (getElementsByTagName doesn't return the element itself)
+            by_tag = {tag: [] for tag in tag_order}
+            for elem in node.getElementsByTagName("*"):
+                if elem.tagName in by_tag:
+                    by_tag[elem.tagName].append(elem)
+
+            node_inside_deletion = None
+            for tag in tag_order:
+                for elem in by_tag[tag]:
+                    if tag != "w:r":
+                        handlers[tag](elem)
+                        continue
+                    if is_inside_deletion(elem, stop=node):
+                        add_rsid_to_r(elem, True)
+                        continue
+                    if node_inside_deletion is None:
+                        node_inside_deletion = (
+                            node.tagName == "w:del" or is_inside_deletion(node)
+                        )
+                    add_rsid_to_r(elem, node_inside_deletion)
 
     def replace_node(self, elem, new_content):
         """Replace node with automatic attribute injection."""
@@ -261,6 +317,39 @@ class DocxXMLEditor(XMLEditor):
         self._inject_attributes_to_nodes(nodes)
         return nodes
 
+    def _check_tracked_change(self, operation, elem):
+        """Raise ValueError if a tracked change operation can't be applied to elem.
+
+        Args:
+            operation: "suggest_deletion", "revert_insertion" or "revert_deletion"
+            elem: Element the operation would be applied to
+        """
+        if operation == "revert_insertion":
+            if elem.tagName != "w:ins" and not elem.getElementsByTagName("w:ins"):
+                raise ValueError(
+                    f"revert_insertion requires w:ins elements. "
+                    f"The provided element <{elem.tagName}> contains no insertions. "
+                )
+        elif operation == "revert_deletion":
+            if elem.tagName != "w:del" and not elem.getElementsByTagName("w:del"):
+                raise ValueError(
+                    f"revert_deletion requires w:del elements. "
+                    f"The provided element <{elem.tagName}> contains no deletions. "
+                )
+        elif operation == "suggest_deletion":
+            if elem.tagName == "w:r":
+                if elem.getElementsByTagName("w:delText"):
+                    raise ValueError("w:r element already contains w:delText")
+            elif elem.tagName == "w:p":
+                if elem.getElementsByTagName("w:ins") or elem.getElementsByTagName(
+                    "w:del"
+                ):
+                    raise ValueError("w:p element already contains tracked changes")
+            else:
+                raise ValueError(f"Element must be w:r or w:p, got {elem.tagName}")
+        else:
+            raise ValueError(f"Unknown tracked change operation: {operation}")
+
     def revert_insertion(self, elem):
         """Reject an insertion by wrapping its content in a deletion.
 
@@ -293,11 +382,7 @@ class DocxXMLEditor(XMLEditor):
             ins_elements.extend(elem.getElementsByTagName("w:ins"))
 
         # Validate that there are insertions to reject
-        if not ins_elements:
-            raise ValueError(
-                f"revert_insertion requires w:ins elements. "
-                f"The provided element <{elem.tagName}> contains no insertions. "
-            )
+        self._check_tracked_change("revert_insertion", elem)
 
         # Process all insertions - wrap all children in w:del
         for ins_elem in ins_elements:
@@ -325,6 +410,7 @@ class DocxXMLEditor(XMLEditor):
                     for i in range(t_elem.attributes.length):
                         attr = t_elem.attributes.item(i)
                         del_text.setAttribute(attr.name, attr.value)
+                    self._unindex(t_elem)
                     t_elem.parentNode.replaceChild(del_text, t_elem)
 
             # Move all children from ins to del wrapper
@@ -336,6 +422,7 @@ class DocxXMLEditor(XMLEditor):
 
             # Inject attributes to the deletion wrapper
             self._inject_attributes_to_nodes([del_wrapper])
+            self._mark_changed(ins_elem)
 
         return [elem]
 
@@ -374,11 +461,7 @@ class DocxXMLEditor(XMLEditor):
             del_elements.extend(elem.getElementsByTagName("w:del"))
 
         # Validate that there are deletions to reject
-        if not del_elements:
-            raise ValueError(
-                f"revert_deletion requires w:del elements. "
-                f"The provided element <{elem.tagName}> contains no deletions. "
-            )
+        self._check_tracked_change("revert_deletion", elem)
 
         # Track created insertion (only relevant if elem is a single w:del)
         created_insertion = None
@@ -495,10 +578,9 @@ class DocxXMLEditor(XMLEditor):
         Raises:
             ValueError: If element has existing tracked changes or invalid structure
         """
+        self._check_tracked_change("suggest_deletion", elem)
+
         if elem.nodeName == "w:r":
-            # Check for existing w:delText
-            if elem.getElementsByTagName("w:delText"):
-                raise ValueError("w:r element already contains w:delText")
 
             # Convert w:t → w:delText
             for t_elem in list(elem.getElementsByTagName("w:t")):
@@ -510,6 +592,7 @@ class DocxXMLEditor(XMLEditor):
                 for i in range(t_elem.attributes.length):
                     attr = t_elem.attributes.item(i)
                     del_text.setAttribute(attr.name, attr.value)
+                self._unindex(t_elem)
                 t_elem.parentNode.replaceChild(del_text, t_elem)
 
             # Update run attributes: w:rsidR → w:rsidDel
@@ -528,14 +611,11 @@ class DocxXMLEditor(XMLEditor):
 
             # Inject attributes to the deletion wrapper
             self._inject_attributes_to_nodes([del_wrapper])
+            self._mark_changed(del_wrapper)
 
             return del_wrapper
 
         elif elem.nodeName == "w:p":
-            # Check for existing tracked changes
-            if elem.getElementsByTagName("w:ins") or elem.getElementsByTagName("w:del"):
-                raise ValueError("w:p element already contains tracked changes")
-
             # Check if it's a numbered list item
             pPr_list = elem.getElementsByTagName("w:pPr")
             is_numbered = pPr_list and pPr_list[0].getElementsByTagName("w:numPr")
@@ -567,6 +647,7 @@ class DocxXMLEditor(XMLEditor):
                 for i in range(t_elem.attributes.length):
                     attr = t_elem.attributes.item(i)
                     del_text.setAttribute(attr.name, attr.value)
+                self._unindex(t_elem)
                 t_elem.parentNode.replaceChild(del_text, t_elem)
 
             # Update run attributes: w:rsidR → w:rsidDel
@@ -586,6 +667,7 @@ class DocxXMLEditor(XMLEditor):
 
             # Inject attributes to the deletion wrapper
             self._inject_attributes_to_nodes([del_wrapper])
+            self._mark_changed(elem)
 
             return elem
 
@@ -593,15 +675,734 @@ class DocxXMLEditor(XMLEditor):
             raise ValueError(f"Element must be w:r or w:p, got {elem.nodeName}")
 
 
-def _generate_hex_id() -> str:
-    """Generate random 8-character hex ID for para/durable IDs.
+class LxmlDocxXMLEditor(DocxXMLEditor, LxmlXMLEditor):
+    """DocxXMLEditor on the lxml backend, used by Document for large XML files.
+
+    Applies the same RSID, author, date and id attributes as DocxXMLEditor.
+    Nodes are lxml elements (see LxmlXMLEditor), so the tracked change helpers
+    below work on lxml trees; converting w:t and w:delText is a tag rename.
+    """
+
+    EDIT_NAMESPACES = EDIT_NAMESPACES
+
+    def _w_tag(self, name):
+        """Return the Clark name ({uri}local) of a w: element."""
+        return f"{{{self.root.nsmap['w']}}}{name}"
+
+    def _rename_elements(self, elem, old_name, new_name):
+        """Rename all old_name descendants of elem (e.g. w:t → w:delText)."""
+        for node in list(elem.iter(self._w_tag(old_name))):
+            self._unindex(node)
+            node.tag = self._w_tag(new_name)
+
+    def _swap_rsid(self, run, from_attr, to_attr):
+        """Move a run's rsid from one attribute to the other, or set our RSID."""
+        if run.hasAttribute(from_attr):
+            run.setAttribute(to_attr, run.getAttribute(from_attr))
+            run.removeAttribute(from_attr)
+        elif not run.hasAttribute(to_attr):
+            run.setAttribute(to_attr, self.rsid)
+
+    def revert_insertion(self, elem):
+        """Reject an insertion by wrapping its content in a deletion.
+
+        See DocxXMLEditor.revert_insertion.
+        """
+        if elem.tagName == "w:ins":
+            ins_elements = [elem]
+        else:
+            ins_elements = elem.getElementsByTagName("w:ins")
+
+        self._check_tracked_change("revert_insertion", elem)
+
+        for ins_elem in ins_elements:
+            runs = ins_elem.getElementsByTagName("w:r")
+            if not runs:
+                continue
+
+            for run in runs:
+                self._swap_rsid(run, "w:rsidR", "w:rsidDel")
+                self._rename_elements(run, "t", "delText")
+
+            # Move all content from ins into a del wrapper
+            del_wrapper = ins_elem.makeelement(self._w_tag("del"), {})
+            del_wrapper.text, ins_elem.text = ins_elem.text, None
+            for child in list(ins_elem):
+                del_wrapper.append(child)
+            ins_elem.append(del_wrapper)
+
+            self._inject_attributes_to_nodes([del_wrapper])
+            self._mark_changed(ins_elem)
+
+        return [elem]
+
+    def revert_deletion(self, elem):
+        """Reject a deletion by re-inserting the deleted content.
+
+        See DocxXMLEditor.revert_deletion.
+        """
+        is_single_del = elem.tagName == "w:del"
+        if is_single_del:
+            del_elements = [elem]
+        else:
+            del_elements = elem.getElementsByTagName("w:del")
+
+        self._check_tracked_change("revert_deletion", elem)
+
+        created_insertion = None
+        for del_elem in del_elements:
+            runs = del_elem.getElementsByTagName("w:r")
+            if not runs:
+                continue
+
+            ins_elem = del_elem.makeelement(self._w_tag("ins"), {})
+            for run in runs:
+                new_run = copy.deepcopy(run)
+                new_run.tail = None
+                for node in new_run.iter():
+                    node.sourceline = 0  # Copies have no position in the file
+                for del_text in list(new_run.iter(self._w_tag("delText"))):
+                    del_text.tag = self._w_tag("t")
+                self._swap_rsid(new_run, "w:rsidDel", "w:rsidR")
+                ins_elem.append(new_run)
+
+            # Insert the new insertion after the deletion
+            nodes = self._insert_nodes_after(del_elem, [ins_elem])
+            self._inject_attributes_to_nodes(nodes)
+            if is_single_del:
+                created_insertion = nodes[0]
+
+        if is_single_del and created_insertion is not None:
+            return [elem, created_insertion]
+        return [elem]
+
+    def suggest_deletion(self, elem):
+        """Mark a w:r or w:p element as deleted with tracked changes.
+
+        See DocxXMLEditor.suggest_deletion.
+        """
+        self._check_tracked_change("suggest_deletion", elem)
+
+        if elem.tagName == "w:r":
+            self._rename_elements(elem, "t", "delText")
+            self._swap_rsid(elem, "w:rsidR", "w:rsidDel")
+
+            # Wrap in w:del, leaving the following whitespace outside it
+            del_wrapper = elem.makeelement(self._w_tag("del"), {})
+            tail, elem.tail = elem.tail, None
+            elem.addprevious(del_wrapper)
+            del_wrapper.append(elem)
+            del_wrapper.tail = tail
+
+            self._inject_attributes_to_nodes([del_wrapper])
+            self._mark_changed(del_wrapper)
+            return del_wrapper
+
+        elif elem.tagName == "w:p":
+            pPr_list = elem.getElementsByTagName("w:pPr")
+            is_numbered = pPr_list and pPr_list[0].getElementsByTagName("w:numPr")
+
+            if is_numbered:
+                # Add <w:del/> to w:rPr in w:pPr
+                pPr = pPr_list[0]
+                rPr_list = pPr.getElementsByTagName("w:rPr")
+                if rPr_list:
+                    rPr = rPr_list[0]
+                else:
+                    rPr = pPr.makeelement(self._w_tag("rPr"), {})
+                    pPr.append(rPr)
+                rPr.insert(0, rPr.makeelement(self._w_tag("del"), {}))
+
+            self._rename_elements(elem, "t", "delText")
+            for run in elem.getElementsByTagName("w:r"):
+                self._swap_rsid(run, "w:rsidR", "w:rsidDel")
+
+            # Wrap all non-pPr children in <w:del>
+            del_wrapper = elem.makeelement(self._w_tag("del"), {})
+            for child in list(elem):
+                if child.tag != self._w_tag("pPr"):
+                    del_wrapper.append(child)
+            elem.append(del_wrapper)
+
+            self._inject_attributes_to_nodes([del_wrapper])
+            self._mark_changed(elem)
+            return elem
+
+        else:
+            raise ValueError(f"Element must be w:r or w:p, got {elem.tagName}")
+
+
+class HexIdAllocator:
+    """Hands out unique 8-character hex IDs for para/durable IDs.
 
     Values are constrained to be less than 0x7FFFFFFF per OOXML spec:
     - paraId must be < 0x80000000
     - durableId must be < 0x7FFFFFFF
     We use the stricter constraint (0x7FFFFFFF) for both.
+
+    IDs are allocated counting up from the largest one in use, skipping any
+    that were noted with add(), so no ID is ever handed out twice.
+    """
+
+    LIMIT = 0x7FFFFFFF
+
+    def __init__(self):
+        self._used = set()
+        self._next = 1
+
+    def add(self, value):
+        """Note a hex ID that is already in use."""
+        try:
+            number = int(value, 16)
+        except ValueError:
+            return
+        self._used.add(number)
+        if self._next <= number < self.LIMIT - 1:
+            self._next = number + 1
+
+    def add_from_xml(self, content):
+        """Note all para/durable IDs found in raw XML bytes."""
+        for match in _HEX_ID_PATTERN.finditer(content):
+            self.add(match.group(1).decode("ascii"))
+
+    def allocate(self) -> str:
+        """Return a new ID, formatted as 8 uppercase hex digits."""
+        number = self._next
+        while number in self._used:
+            number = number + 1 if number < self.LIMIT - 1 else 1
+        self._used.add(number)
+        self._next = number + 1 if number < self.LIMIT - 1 else 1
+        return f"{number:08X}"
+
+
+class Workspace:
+    """Working copy of an unpacked document directory.
+
+    Only the directory tree is created up front. A file is copied in when it
+    is materialized (e.g. when an editor opens it), cloned copy-on-write where
+    the filesystem supports it, so files that are never edited, such as
+    embedded media, are never copied; they are read and written back from the
+    source. extract_all() copies the remaining files, for tools that need the
+    whole tree (e.g. validation). The working copy shares nothing with the
+    source: writing to a file under path, with or without materialize(),
+    never changes the source.
+
+    A file is changed if it is new or was written to since it was copied in;
+    only changed files are written back to the source.
+
+    With share=True, every file is hard-linked from the source up front
+    instead (copied where links aren't possible). Only for private snapshots
+    that are never written to: a write to a linked file changes the source too.
+
+    Attributes:
+        source (Path): Directory the workspace was created from
+        path (Path): Directory of the working copy
+        linked (bool): True if every file was hard-linked rather than copied
     """
-    return f"{random.randint(1, 0x7FFFFFFE):08X}"
+
+    def __init__(self, source, path, share=False):
+        self.source = Path(source)
+        self.path = Path(path)
+        self.linked = share
+        if share:
+            shutil.copytree(self.source, self.path, copy_function=self._link_or_copy)
+            self._pending = set()
+        else:
+            shutil.copytree(self.source, self.path, ignore=_files_only)
+            # Files of the source not copied in yet
+            self._pending = {
+                path.relative_to(self.source)
+                for path in self.source.rglob("*")
+                if path.is_file()
+            }
+
+        # Size and mtime of every file as copied in, to tell which were written
+        self._created = {
+            path.relative_to(self.path): _stat_signature(path)
+            for path in self.path.rglob("*")
+            if path.is_file()
+        }
+
+    def _link_or_copy(self, src, dst):
+        try:
+            os.link(src, dst)
+        except OSError:
+            self.linked = False
+            shutil.copy2(src, dst)
+        return dst
+
+    def _is_pending(self, relative_path) -> bool:
+        """Return True if a file is still only in the source."""
+        relative_path = Path(relative_path)
+        return relative_path in self._pending and not (self.path / relative_path).exists()
+
+    def is_unchanged(self, relative_path) -> bool:
+        """Return True if a file is as it was in the source."""
+        if self._is_pending(relative_path):
+            return True
+        created = self._created.get(Path(relative_path))
+        try:
+            return created is not None and created == _stat_signature(
+                self.path / relative_path
+            )
+        except OSError:
+            return False
+
+    def materialize(self, relative_path) -> Path:
+        """Copy a file in so it can be modified, and return its path.
+
+        Missing files are not created, but their parent directories are, so
+        the returned path can be written to directly.
+        """
+        relative_path = Path(relative_path)
+        path = self.path / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self._is_pending(relative_path):
+            _clone_or_copy(self.source / relative_path, path)
+            self._created[relative_path] = _stat_signature(path)
+        self._pending.discard(relative_path)
+        return path
+
+    def exists(self, relative_path) -> bool:
+        """Return True if the working copy or the source has the file."""
+        return (self.path / relative_path).is_file() or self._is_pending(relative_path)
+
+    def read_parts(self, pattern):
+        """Yield the bytes of every file whose relative path matches a glob."""
+        on_disk = {
+            path.relative_to(self.path)
+            for path in self.path.rglob("*")
+            if path.is_file()
+        }
+        for relative_path in sorted(on_disk | self._pending):
+            if not fnmatch.fnmatchcase(relative_path.as_posix(), pattern):
+                continue
+            if relative_path in on_disk:
+                yield (self.path / relative_path).read_bytes()
+            else:
+                yield (self.source / relative_path).read_bytes()
+
+    def extract_all(self):
+        """Copy in every file that is still only in the source."""
+        for relative_path in sorted(self._pending):
+            self.materialize(relative_path)
+
+    def is_source(self, destination) -> bool:
+        """Return True if destination is the source directory (or None)."""
+        if destination is None:
+            return True
+        try:
+            return os.path.samefile(destination, self.source)
+        except OSError:
+            return False
+
+    def changed_files(self):
+        """Return the relative paths of files that are new or were written to."""
+        return [
+            path.relative_to(self.path)
+            for path in sorted(self.path.rglob("*"))
+            if path.is_file() and not self.is_unchanged(path.relative_to(self.path))
+        ]
+
+    def write_back(self, destination=None):
+        """Copy the working copy to destination (default: the source directory).
+
+        Writing back to the source only copies changed files. Each one
+        replaces the source file instead of overwriting it, so other links to
+        the old bytes keep them. Another destination gets every file, those
+        never copied in straight from the source.
+        """
+        destination = Path(destination) if destination else self.source
+        if self.is_source(destination):
+            for relative_path in self.changed_files():
+                target = destination / relative_path
+                target.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = target.with_name(target.name + ".tmp")
+                shutil.copy2(self.path / relative_path, temp_path)
+                os.replace(temp_path, target)
+                self._created[relative_path] = _stat_signature(self.path / relative_path)
+        else:
+            shutil.copytree(self.path, destination, dirs_exist_ok=True)
+            for relative_path in sorted(self._pending):
+                if self._is_pending(relative_path):
+                    shutil.copy2(self.source / relative_path, destination / relative_path)
+
+    def close(self):
+        """Release files held open by the workspace."""
+
+
+def _files_only(directory, names):
+    """shutil.copytree ignore function that copies the directories only."""
+    return [name for name in names if not os.path.isdir(os.path.join(directory, name))]
+
+
+def _clone_or_copy(src, dst):
+    """Copy a file with its metadata, as a copy-on-write clone where possible."""
+    if sys.platform.startswith("linux"):
+        import fcntl
+
+        try:
+            with open(src, "rb") as source, open(dst, "wb") as target:
+                fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+            shutil.copystat(src, dst)
+            return dst
+        except OSError:
+            pass  # Not supported by this filesystem, or across filesystems
+    return shutil.copy2(src, dst)
+
+
+def _stat_signature(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class PackageWorkspace(Workspace):
+    """Workspace backed by a .docx file instead of an unpacked directory.
+
+    A part is extracted, as-is, only when it is materialized; every other
+    part stays in the archive. Writing back copies the parts that were not
+    extracted byte-for-byte from the source, so a document can be edited and
+    saved without unpacking or repacking it. extract_all() puts the remaining
+    parts on disk, for tools that need the whole tree (e.g. validation).
+
+    Attributes:
+        snapshot (Path): Link to (or copy of) the source as it was when opened
+    """
+
+    def __init__(self, source, path):
+        self.source = Path(source)
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(self.source) as zf:
+            self._names = {
+                info.filename for info in zf.infolist() if not info.is_dir()
+            }
+
+        # The archive may be replaced by write_back(); the snapshot keeps the
+        # bytes it was opened with
+        self.snapshot = self.path.parent / f"original{self.source.suffix}"
+        self.linked = True
+        self._link_or_copy(self.source, self.snapshot)
+        self._zip = zipfile.ZipFile(self.snapshot)
+
+        # Parts extracted by extract_all(), which don't count as changed
+        self._untouched = set()
+
+    def _extract(self, name):
+        target = self.path / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(self._zip.read(name))
+
+    def is_unchanged(self, relative_path) -> bool:
+        """Return True if a part is still only in the archive (or untouched)."""
+        name = Path(relative_path).as_posix()
+        if name in self._untouched:
+            return True
+        return name in self._names and not (self.path / name).exists()
+
+    def exists(self, relative_path) -> bool:
+        """Return True if the archive or the working copy has the part."""
+        name = Path(relative_path).as_posix()
+        return name in self._names or (self.path / name).is_file()
+
+    def materialize(self, relative_path) -> Path:
+        """Extract a part so it can be modified, and return its path.
+
+        Missing parts are not created, but their parent directories are, so
+        the returned path can be written to directly.
+        """
+        name = Path(relative_path).as_posix()
+        path = self.path / name
+        if name in self._untouched:
+            self._untouched.discard(name)
+        elif name in self._names and not path.exists():
+            self._extract(name)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def read_parts(self, pattern):
+        """Yield the bytes of every part whose name matches a glob."""
+        on_disk = {
+            path.relative_to(self.path).as_posix()
+            for path in self.path.rglob("*")
+            if path.is_file()
+        }
+        for name in sorted(self._names | on_disk):
+            if not fnmatch.fnmatchcase(name, pattern):
+                continue
+            if name in on_disk:
+                yield (self.path / name).read_bytes()
+            else:
+                yield self._zip.read(name)
+
+    def extract_all(self):
+        """Extract every part that is not on disk yet, as untouched."""
+        for name in sorted(self._names):
+            if not (self.path / name).exists():
+                self._extract(name)
+                self._untouched.add(name)
+
+    def write_back(self, destination=None):
+        """Write the document to destination (default: the source file).
+
+        destination is a .docx file; a directory gets the unpacked parts.
+        """
+        if destination is not None and Path(destination).suffix.lower() != (
+            self.source.suffix.lower()
+        ):
+            self.extract_all()
+            shutil.copytree(self.path, destination, dirs_exist_ok=True)
+            return
+        parts = {
+            relative_path.as_posix(): self.path / relative_path
+            for relative_path in self.changed_files()
+        }
+        repack_document(self.snapshot, destination or self.source, parts)
+
+    def close(self):
+        """Release files held open by the workspace."""
+        self._zip.close()
+
+
+class EditBatch:
+    """Edits queued with Document.batch() and applied together on commit.
+
+    Each edit targets a node, or a locator: a dict of get_node arguments
+    (tag, attrs, line_number, contains) that may also name the "part" to edit
+    (default "word/document.xml"). A line_number given as a [start, stop]
+    list is read as range(start, stop). Locators refer to the document as it
+    was before the batch, so they can't find content added by the batch.
+
+    On commit, every locator is resolved and every edit checked before
+    anything changes. Edits that still fail on what earlier edits did undo
+    the batch, so a batch with a bad edit leaves the document as it was. The
+    XML fragments of each part are then parsed in a single pass, the
+    edits applied in order, and RSIDs, authors and dates injected once per
+    inserted subtree.
+
+    Attributes:
+        results: What each edit returned (e.g. the inserted nodes), once committed
+    """
+
+    # Operations that insert XML content, with the editor method that inserts
+    # already parsed nodes
+    FRAGMENT_OPERATIONS = {
+        "replace_node": "_replace_with_nodes",
+        "insert_after": "_insert_nodes_after",
+        "insert_before": "_insert_nodes_before",
+        "append_to": "_append_nodes",
+    }
+    TRACKED_CHANGE_OPERATIONS = (
+        "suggest_deletion",
+        "revert_insertion",
+        "revert_deletion",
+    )
+
+    def __init__(self, document):
+        self._document = document
+        self._edits = []  # (operation, target, part, xml)
+        self.results = []
+
+    def add(self, operation, target, xml=None, part=None):
+        """Queue an edit.
+
+        Args:
+            operation: Name of a DocxXMLEditor method, e.g. "insert_after"
+            target: Node to edit, or a locator dict (see EditBatch)
+            xml: XML content, for replace_node, insert_after, insert_before, append_to
+            part: Part the target is in (default: the locator's "part" or
+                "word/document.xml")
+        """
+        if operation in self.FRAGMENT_OPERATIONS:
+            if not isinstance(xml, str):
+                raise ValueError(f"{operation} requires XML content")
+        elif operation not in self.TRACKED_CHANGE_OPERATIONS:
+            raise ValueError(f"Unknown edit operation: {operation}")
+        self._edits.append((operation, target, part, xml))
+
+    def replace_node(self, target, new_content, part=None):
+        """Queue a replace_node edit."""
+        self.add("replace_node", target, new_content, part)
+
+    def insert_after(self, target, xml_content, part=None):
+        """Queue an insert_after edit."""
+        self.add("insert_after", target, xml_content, part)
+
+    def insert_before(self, target, xml_content, part=None):
+        """Queue an insert_before edit."""
+        self.add("insert_before", target, xml_content, part)
+
+    def append_to(self, target, xml_content, part=None):
+        """Queue an append_to edit."""
+        self.add("append_to", target, xml_content, part)
+
+    def suggest_deletion(self, target, part=None):
+        """Queue a suggest_deletion edit."""
+        self.add("suggest_deletion", target, part=part)
+
+    def revert_insertion(self, target, part=None):
+        """Queue a revert_insertion edit."""
+        self.add("revert_insertion", target, part=part)
+
+    def revert_deletion(self, target, part=None):
+        """Queue a revert_deletion edit."""
+        self.add("revert_deletion", target, part=part)
+
+    def extend(self, edits):
+        """Queue a list of edits, e.g. a plan loaded from JSON.
+
+        Each edit is either a dict with "operation", "locator" and optionally
+        "xml" and "part", or a (locator, operation[, xml]) sequence.
+        """
+        for edit in edits:
+            if isinstance(edit, dict):
+                self.add(
+                    edit.get("operation"),
+                    edit.get("locator"),
+                    edit.get("xml"),
+                    edit.get("part"),
+                )
+            else:
+                locator, operation, *xml = edit
+                self.add(operation, locator, *xml)
+
+    def commit(self):
+        """Apply all queued edits.
+
+        Returns:
+            list: What each edit returned, in order (also kept in self.results)
+
+        Raises:
+            ValueError: If an edit can't be applied; no edit is applied then
+        """
+        edits, self._edits = self._edits, []
+
+        # Resolve and check everything before the first change
+        resolved = []
+        replaced = set()
+        for index, (operation, target, part, xml) in enumerate(edits):
+            try:
+                editor, node = self._resolve(target, part)
+                if operation in self.TRACKED_CHANGE_OPERATIONS:
+                    editor._check_tracked_change(operation, node)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Edit {index} ({operation}): {e}") from e
+            resolved.append((operation, editor, node, xml))
+            if operation == "replace_node":
+                if node in replaced:
+                    raise ValueError(f"Edit {index} ({operation}): node replaced twice")
+                replaced.add(node)
+
+        for index, (operation, editor, node, xml) in enumerate(resolved):
+            ancestor = node if operation != "replace_node" else node.parentNode
+            while ancestor is not None:
+                if ancestor in replaced:
+                    raise ValueError(
+                        f"Edit {index} ({operation}): target is removed by a "
+                        f"replace_node edit in the same batch"
+                    )
+                ancestor = ancestor.parentNode
+
+        fragments = self._parse_fragments(resolved)
+
+        # Edits can still fail on what earlier edits did (e.g. deleting a run
+        # inside a paragraph already deleted), so keep what they may change
+        saved = {}
+        for operation, editor, node, xml in resolved:
+            nodes, deep_nodes = saved.setdefault(editor, ([], []))
+            nodes.append(node if operation == "append_to" else node.parentNode)
+            if operation in self.TRACKED_CHANGE_OPERATIONS:
+                deep_nodes.append(node)
+        saved = {
+            editor: editor._save_state(nodes, deep_nodes)
+            for editor, (nodes, deep_nodes) in saved.items()
+        }
+
+        # Apply the edits, then inject attributes once per inserted subtree
+        results = []
+        inserted = {}
+        try:
+            for index, (operation, editor, node, xml) in enumerate(resolved):
+                try:
+                    if operation in self.FRAGMENT_OPERATIONS:
+                        method = getattr(editor, self.FRAGMENT_OPERATIONS[operation])
+                        results.append(method(node, fragments[index]))
+                        inserted.setdefault(editor, []).extend(fragments[index])
+                    else:
+                        results.append(getattr(editor, operation)(node))
+                except (TypeError, ValueError) as e:
+                    raise ValueError(f"Edit {index} ({operation}): {e}") from e
+
+            for editor, nodes in inserted.items():
+                editor._inject_attributes_to_nodes(_subtree_roots(nodes))
+        except BaseException:
+            for editor, state in saved.items():
+                editor._restore_state(state)
+            raise
+
+        self.results = results
+        return results
+
+    def _resolve(self, target, part):
+        """Return the editor and node an edit applies to."""
+        if isinstance(target, dict):
+            locator = dict(target)
+            part = part or locator.pop("part", None)
+            editor = self._document[part or "word/document.xml"]
+            line_number = locator.get("line_number")
+            if isinstance(line_number, list):
+                locator["line_number"] = range(*line_number)
+            return editor, editor.get_node(**locator)
+
+        editor = self._document[part or "word/document.xml"]
+        if target is None or not editor._is_current_match(target, None):
+            raise ValueError(f"Target node is not part of {editor.xml_path.name}")
+        return editor, target
+
+    def _parse_fragments(self, resolved):
+        """Parse the XML of all fragment edits, in one pass per editor.
+
+        Returns:
+            dict: edit index -> parsed nodes
+        """
+        by_editor = {}
+        for index, (operation, editor, node, xml) in enumerate(resolved):
+            if operation in self.FRAGMENT_OPERATIONS:
+                by_editor.setdefault(editor, []).append(index)
+
+        fragments = {}
+        for editor, indexes in by_editor.items():
+            contents = [resolved[index][3] for index in indexes]
+            try:
+                parsed = editor._parse_fragments(contents)
+            except Exception:
+                # Find the edit whose XML is invalid
+                for index in indexes:
+                    try:
+                        editor._parse_fragment(resolved[index][3])
+                    except Exception as e:
+                        operation = resolved[index][0]
+                        raise ValueError(
+                            f"Edit {index} ({operation}): invalid XML content: {e}"
+                        ) from e
+                raise
+            fragments.update(zip(indexes, parsed))
+        return fragments
+
+
+def _subtree_roots(nodes):
+    """Return the element nodes that are not inside another of the nodes."""
+    elements = [n for n in nodes if n.nodeType == n.ELEMENT_NODE]
+    members = set(elements)
+    roots = []
+    for elem in elements:
+        parent = elem.parentNode
+        while parent is not None and parent not in members:
+            parent = parent.parentNode
+        if parent is None:
+            roots.append(elem)
+    return roots
 
 
 def _generate_rsid() -> str:
@@ -619,31 +1420,54 @@ class Document:
         track_revisions=False,
         author="Claude",
         initials="C",
+        lxml_editor_min_size=LXML_EDITOR_MIN_SIZE,
     ):
         """
-        Initialize with path to unpacked Word document directory.
+        Initialize with path to unpacked Word document directory, or a .docx file.
         Automatically sets up comment infrastructure (people.xml, RSIDs).
 
+        A .docx is edited without unpacking it: only the parts opened with
+        doc["..."] are extracted (as-is, not pretty-printed, so locate nodes by
+        contains/attrs rather than line_number), and save() writes a .docx
+        that copies every other part byte-for-byte from the source.
+
         Args:
-            unpacked_dir: Path to unpacked DOCX directory (must contain word/ subdirectory)
+            unpacked_dir: Path to unpacked DOCX directory (must contain word/ subdirectory),
+                or to a .docx file
             rsid: Optional RSID to use for all comment elements. If not provided, one will be generated.
             track_revisions: If True, enables track revisions in settings.xml (default: False)
             author: Default author name for comments (default: "Claude")
             initials: Default author initials for comments (default: "C")
+            lxml_editor_min_size: XML files of at least this many bytes are edited
+                with the faster, leaner lxml backend (default: 5 MB)
         """
         self.original_path = Path(unpacked_dir)
 
-        if not self.original_path.exists() or not self.original_path.is_dir():
-            raise ValueError(f"Directory not found: {unpacked_dir}")
+        if self.original_path.is_file() and zipfile.is_zipfile(self.original_path):
+            workspace_class = PackageWorkspace
+        elif self.original_path.is_dir():
+            workspace_class = Workspace
+        else:
+            raise ValueError(f"Directory or .docx file not found: {unpacked_dir}")
 
-        # Create temporary directory with subdirectories for unpacked content and baseline
+        # Create temporary directory with a copy-on-write workspace for editing
         self.temp_dir = tempfile.mkdtemp(prefix="docx_")
-        self.unpacked_path = Path(self.temp_dir) / "unpacked"
-        shutil.copytree(self.original_path, self.unpacked_path)
+        self.workspace = workspace_class(
+            self.original_path, Path(self.temp_dir) / "unpacked"
+        )
+        self.unpacked_path = self.workspace.path
 
-        # Pack original directory into temporary .docx for validation baseline (outside unpacked dir)
+        # Validation baseline, packed from the original on first validate().
+        # A snapshot (hard-linked where possible) keeps the original bytes
+        # even after save() has replaced files in the original directory.
         self.original_docx = Path(self.temp_dir) / "original.docx"
-        pack_document(self.original_path, self.original_docx, validate=False)
+        self._original_snapshot = None
+        if workspace_class is PackageWorkspace:
+            self.original_docx = self.workspace.snapshot
+        else:
+            self._original_snapshot = Workspace(
+                self.original_path, Path(self.temp_dir) / "original", share=True
+            )
 
         self.word_path = self.unpacked_path / "word"
 
@@ -657,6 +1481,7 @@ class Document:
 
         # Cache for lazy-loaded editors
         self._editors = {}
+        self.lxml_editor_min_size = lxml_editor_min_size
 
         # Comment file paths
         self.comments_path = self.word_path / "comments.xml"
@@ -664,9 +1489,13 @@ class Document:
         self.comments_ids_path = self.word_path / "commentsIds.xml"
         self.comments_extensible_path = self.word_path / "commentsExtensible.xml"
 
+        # Para/durable IDs already used by any part, so new ones are unique
+        self.hex_ids = HexIdAllocator()
+        for content in self.workspace.read_parts("word/*.xml"):
+            self.hex_ids.add_from_xml(content)
+
         # Load existing comments and determine next ID (before setup modifies files)
-        self.existing_comments = self._load_existing_comments()
-        self.next_comment_id = self._get_next_comment_id()
+        self.existing_comments, self.next_comment_id = self._load_existing_comments()
 
         # Convenient access to document.xml editor (semi-private)
         self._document = self["word/document.xml"]
@@ -687,6 +1516,9 @@ class Document:
         Args:
             xml_path: Relative path to XML file (e.g., "word/document.xml", "word/comments.xml")
 
+        Files of at least lxml_editor_min_size bytes get an LxmlDocxXMLEditor,
+        whose nodes are lxml elements, instead of a minidom-based one.
+
         Returns:
             DocxXMLEditor instance for the specified file
 
@@ -701,12 +1533,21 @@ class Document:
             comment = doc["word/comments.xml"].get_node(tag="w:comment", attrs={"w:id": "0"})
         """
         if xml_path not in self._editors:
-            file_path = self.unpacked_path / xml_path
-            if not file_path.exists():
+            if not self.workspace.exists(xml_path):
                 raise ValueError(f"XML file not found: {xml_path}")
-            # Use DocxXMLEditor with RSID, author, and initials for all editors
-            self._editors[xml_path] = DocxXMLEditor(
-                file_path, rsid=self.rsid, author=self.author, initials=self.initials
+            file_path = self.workspace.materialize(xml_path)
+            # Use DocxXMLEditor with RSID, author, and initials for all editors,
+            # backed by lxml for large files
+            if file_path.stat().st_size >= self.lxml_editor_min_size:
+                editor_class = LxmlDocxXMLEditor
+            else:
+                editor_class = DocxXMLEditor
+            self._editors[xml_path] = editor_class(
+                file_path,
+                rsid=self.rsid,
+                author=self.author,
+                initials=self.initials,
+                hex_ids=self.hex_ids,
             )
         return self._editors[xml_path]
 
@@ -728,8 +1569,8 @@ class Document:
             cm.add_comment(start=start_node, end=end_node, text="Explanation")
         """
         comment_id = self.next_comment_id
-        para_id = _generate_hex_id()
-        durable_id = _generate_hex_id()
+        para_id = self.hex_ids.allocate()
+        durable_id = self.hex_ids.allocate()
         timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
         # Add comment ranges to document.xml immediately
@@ -785,8 +1626,8 @@ class Document:
 
         parent_info = self.existing_comments[parent_comment_id]
         comment_id = self.next_comment_id
-        para_id = _generate_hex_id()
-        durable_id = _generate_hex_id()
+        para_id = self.hex_ids.allocate()
+        durable_id = self.hex_ids.allocate()
         timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
         # Add comment ranges to document.xml immediately
@@ -830,8 +1671,36 @@ class Document:
         self.next_comment_id += 1
         return comment_id
 
+    @contextmanager
+    def batch(self):
+        """
+        Queue many edits and apply them together when the block ends.
+
+        Much faster than calling the editor methods one by one for hundreds
+        of edits. If an edit can't be applied (or the block raises), none of
+        them are. See EditBatch.
+
+        Yields:
+            EditBatch: Takes edits as nodes or get_node locators
+
+        Example:
+            with doc.batch() as batch:
+                batch.suggest_deletion({"tag": "w:r", "contains": "old text"})
+                batch.insert_after(
+                    {"tag": "w:p", "line_number": 42},
+                    '<w:p><w:ins><w:r><w:t>New paragraph</w:t></w:r></w:ins></w:p>',
+                )
+                batch.extend(json.loads(Path("plan.json").read_text()))
+            new_nodes = batch.results[1]
+        """
+        batch = EditBatch(self)
+        yield batch
+        batch.commit()
+
     def __del__(self):
         """Clean up temporary directory on deletion."""
+        if hasattr(self, "workspace"):
+            self.workspace.close()
         if hasattr(self, "temp_dir") and Path(self.temp_dir).exists():
             shutil.rmtree(self.temp_dir)
 
@@ -843,11 +1712,13 @@ class Document:
             ValueError: If validation fails.
         """
         # Create validators with current state
+        self.workspace.extract_all()
+        original_docx = self._pack_baseline()
         schema_validator = DOCXSchemaValidator(
-            self.unpacked_path, self.original_docx, verbose=False
+            self.unpacked_path, original_docx, verbose=False
         )
         redlining_validator = RedliningValidator(
-            self.unpacked_path, self.original_docx, verbose=False
+            self.unpacked_path, original_docx, verbose=False
         )
 
         # Run validations
@@ -861,13 +1732,17 @@ class Document:
         Save all modified XML files to disk and copy to destination directory.
 
         This persists all changes made via add_comment() and reply_to_comment().
+        Saving back to the original directory only writes the files that were
+        edited or added.
 
         Args:
-            destination: Optional path to save to. If None, saves back to original directory.
+            destination: Optional path to save to. If None, saves back to original directory
+                (or .docx file). A document opened from a .docx can be saved to a .docx or
+                to a directory, which gets it unpacked.
             validate: If True, validates document before saving (default: True).
         """
         # Only ensure comment relationships and content types if comment files exist
-        if self.comments_path.exists():
+        if self._has_part(self.comments_path):
             self._ensure_comment_relationships()
             self._ensure_comment_content_types()
 
@@ -879,40 +1754,47 @@ class Document:
         if validate:
             self.validate()
 
-        # Copy contents from temp directory to destination (or original directory)
-        target_path = Path(destination) if destination else self.original_path
-        shutil.copytree(self.unpacked_path, target_path, dirs_exist_ok=True)
+        # Copy changed files to the original directory, or everything to destination
+        self.workspace.write_back(destination)
 
-    # ==================== Private: Initialization ====================
+    def _pack_baseline(self):
+        """Pack the original document into the validation baseline, once.
+
+        Returns:
+            Path: The baseline .docx
+        """
+        if not self.original_docx.exists():
+            pack_document(self._original_snapshot.path, self.original_docx, validate=False)
+        return self.original_docx
 
-    def _get_next_comment_id(self):
-        """Get the next available comment ID."""
-        if not self.comments_path.exists():
-            return 0
+    # ==================== Private: Initialization ====================
 
-        editor = self["word/comments.xml"]
-        max_id = -1
-        for comment_elem in editor.dom.getElementsByTagName("w:comment"):
-            comment_id = comment_elem.getAttribute("w:id")
-            if comment_id:
-                try:
-                    max_id = max(max_id, int(comment_id))
-                except ValueError:
-                    pass
-        return max_id + 1
+    def _has_part(self, path):
+        """Return True if the document has the part at path (under unpacked_path)."""
+        return self.workspace.exists(Path(path).relative_to(self.unpacked_path))
 
     def _load_existing_comments(self):
-        """Load existing comments from files to enable replies."""
-        if not self.comments_path.exists():
-            return {}
+        """Load existing comments from files to enable replies.
+
+        Returns:
+            tuple: (comment id -> {"para_id": ...}, next available comment ID)
+        """
+        if not self._has_part(self.comments_path):
+            return {}, 0
 
         editor = self["word/comments.xml"]
         existing = {}
+        max_id = -1
 
         for comment_elem in editor.dom.getElementsByTagName("w:comment"):
             comment_id = comment_elem.getAttribute("w:id")
             if not comment_id:
                 continue
+            try:
+                comment_id = int(comment_id)
+            except ValueError:
+                continue
+            max_id = max(max_id, comment_id)
 
             # Find para_id from the w:p element within the comment
             para_id = None
@@ -924,9 +1806,9 @@ class Document:
             if not para_id:
                 continue
 
-            existing[int(comment_id)] = {"para_id": para_id}
+            existing[comment_id] = {"para_id": para_id}
 
-        return existing
+        return existing, max_id + 1
 
     # ==================== Private: Setup Methods ====================
 
@@ -953,7 +1835,7 @@ class Document:
 
     def _update_people_xml(self, path):
         """Create people.xml if it doesn't exist."""
-        if not path.exists():
+        if not self._has_part(path):
             # Copy from template
             shutil.copy(TEMPLATE_DIR / "people.xml", path)
 
@@ -1069,7 +1951,7 @@ class Document:
         self, comment_id, para_id, text, author, initials, timestamp
     ):
         """Add a single comment to comments.xml."""
-        if not self.comments_path.exists():
+        if not self._has_part(self.comments_path):
             shutil.copy(TEMPLATE_DIR / "comments.xml", self.comments_path)
 
         editor = self["word/comments.xml"]
@@ -1090,7 +1972,7 @@ class Document:
 
     def _add_to_comments_extended_xml(self, para_id, parent_para_id):
         """Add a single comment to commentsExtended.xml."""
-        if not self.comments_extended_path.exists():
+        if not self._has_part(self.comments_extended_path):
             shutil.copy(
                 TEMPLATE_DIR / "commentsExtended.xml", self.comments_extended_path
             )
@@ -1106,7 +1988,7 @@ class Document:
 
     def _add_to_comments_ids_xml(self, para_id, durable_id):
         """Add a single comment to commentsIds.xml."""
-        if not self.comments_ids_path.exists():
+        if not self._has_part(self.comments_ids_path):
             shutil.copy(TEMPLATE_DIR / "commentsIds.xml", self.comments_ids_path)
 
         editor = self["word/commentsIds.xml"]
@@ -1117,7 +1999,7 @@ class Document:
 
     def _add_to_comments_extensible_xml(self, durable_id):
         """Add a single comment to commentsExtensible.xml."""
-        if not self.comments_extensible_path.exists():
+        if not self._has_part(self.comments_extensible_path):
             shutil.copy(
                 TEMPLATE_DIR / "commentsExtensible.xml", self.comments_extensible_path
             )
@@ -1183,7 +2065,7 @@ class Document:
         people_path = self.word_path / "people.xml"
 
         # people.xml should already exist from _setup_tracking
-        if not people_path.exists():
+        if not self._has_part(people_path):
             raise ValueError("people.xml should exist after _setup_tracking")
 
         editor = self["word/people.xml"]
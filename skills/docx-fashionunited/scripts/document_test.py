@@ -0,0 +1,500 @@
+import io
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+import lxml.etree
+
+try:
+    import docx  # python-docx, to build the fixture document
+    from PIL import Image
+except ImportError:
+    docx = None
+
+from .document import (
+    LXML_EDITOR_MIN_SIZE,
+    Document,
+    DocxXMLEditor,
+    HexIdAllocator,
+    LxmlDocxXMLEditor,
+    Workspace,
+)
+
+W_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+TRACKED_XML = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="{W_NAMESPACE}">
+  <w:body>
+    <w:p>
+      <w:r w:rsidR="00AB0001"><w:t>Keep this</w:t></w:r>
+      <w:r w:rsidR="00AB0001"><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">Delete this </w:t></w:r>
+    </w:p>
+    <w:p>
+      <w:ins w:id="4" w:author="Someone" w:date="2024-01-01T00:00:00Z">
+        <w:r><w:t>Inserted by someone</w:t></w:r>
+      </w:ins>
+    </w:p>
+    <w:p>
+      <w:del w:id="5" w:author="Someone" w:date="2024-01-01T00:00:00Z">
+        <w:r><w:delText>Deleted by someone</w:delText></w:r>
+      </w:del>
+    </w:p>
+    <w:p><w:r><w:t>Whole paragraph</w:t></w:r></w:p>
+  </w:body>
+</w:document>
+"""
+
+
+def make_docx(path):
+    """Write a small .docx with a paragraph and an image, and return its path."""
+    image = io.BytesIO()
+    Image.new("RGB", (4, 4), "red").save(image, "PNG")
+    document = docx.Document()
+    document.add_paragraph("Hello world")
+    document.add_picture(image)
+    document.save(path)
+    return Path(path)
+
+
+@unittest.skipIf(docx is None, "needs python-docx and Pillow for the fixture")
+class DocumentTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.docx_path = make_docx(self.temp_dir / "fixture.docx")
+        self.source = self.temp_dir / "unpacked"
+        with zipfile.ZipFile(self.docx_path) as zf:
+            zf.extractall(self.source)
+        self.media = next(self.source.glob("word/media/*")).relative_to(self.source)
+
+    def source_bytes(self):
+        return {
+            path.relative_to(self.source): path.read_bytes()
+            for path in sorted(self.source.rglob("*"))
+            if path.is_file()
+        }
+
+    def open_document(self, path=None):
+        with mock.patch("builtins.print"):
+            return Document(path or self.source)
+
+
+class TestWorkspace(DocumentTestCase):
+    def test_writes_through_the_workspace_leave_the_source_unchanged(self):
+        """Test that writing to files under unpacked_path, without materialize(), keeps the source"""
+        before = self.source_bytes()
+        doc = self.open_document()
+        doc.workspace.extract_all()
+
+        document_xml = doc.unpacked_path / "word/document.xml"
+        document_xml.write_text(document_xml.read_text().replace("Hello", "Goodbye"))
+        with open(doc.unpacked_path / self.media, "r+b") as f:
+            f.write(b"\0\0\0\0")
+
+        self.assertEqual(self.source_bytes(), before)
+
+    def test_stray_writes_are_saved(self):
+        """Test that save() writes back files written directly under unpacked_path"""
+        doc = self.open_document()
+        (doc.unpacked_path / self.media).write_bytes(b"new image")
+
+        doc.save(validate=False)
+        self.assertEqual((self.source / self.media).read_bytes(), b"new image")
+
+    def test_save_only_replaces_changed_files(self):
+        """Test that saving back leaves the files that weren't written to alone"""
+        media_inode = os.stat(self.source / self.media).st_ino
+        doc = self.open_document()
+        paragraph = doc["word/document.xml"].get_node(tag="w:p", contains="Hello world")
+        doc["word/document.xml"].insert_after(paragraph, "<w:p><w:r><w:t>Added</w:t></w:r></w:p>")
+
+        doc.save(validate=False)
+        self.assertIn("Added", (self.source / "word/document.xml").read_text())
+        self.assertEqual(os.stat(self.source / self.media).st_ino, media_inode)
+
+    def test_baseline_keeps_the_original_after_save(self):
+        """Test that the validation baseline holds the original bytes after save() replaced them"""
+        original_media = (self.source / self.media).read_bytes()
+        doc = self.open_document()
+        paragraph = doc["word/document.xml"].get_node(tag="w:p", contains="Hello world")
+        doc["word/document.xml"].insert_after(paragraph, "<w:p><w:r><w:t>Added</w:t></w:r></w:p>")
+        (doc.unpacked_path / self.media).write_bytes(b"new image")
+        doc.save(validate=False)
+        self.assertIn("Added", (self.source / "word/document.xml").read_text())
+
+        with zipfile.ZipFile(doc._pack_baseline()) as zf:
+            self.assertNotIn(b"Added", zf.read("word/document.xml"))
+            self.assertEqual(zf.read(self.media.as_posix()), original_media)
+
+    def test_files_are_copied_when_materialized(self):
+        """Test that only materialized files are copied, and the others read from the source"""
+        workspace = Workspace(self.source, self.temp_dir / "work")
+        self.assertTrue((workspace.path / self.media.parent).is_dir())
+        self.assertFalse((workspace.path / self.media).exists())
+        self.assertTrue(workspace.exists(self.media))
+        self.assertTrue(workspace.is_unchanged(self.media))
+        self.assertEqual(
+            list(workspace.read_parts("word/media/*")), [(self.source / self.media).read_bytes()]
+        )
+
+        document_xml = workspace.materialize("word/document.xml")
+        self.assertTrue(document_xml.is_file())
+        self.assertEqual(workspace.changed_files(), [])
+        document_xml.write_text(document_xml.read_text().replace("Hello", "Goodbye"))
+
+        # Another destination gets every file, from wherever it is
+        destination = self.temp_dir / "copy"
+        workspace.write_back(destination)
+        self.assertIn("Goodbye", (destination / "word/document.xml").read_text())
+        self.assertEqual(
+            (destination / self.media).read_bytes(), (self.source / self.media).read_bytes()
+        )
+        self.assertFalse((workspace.path / self.media).exists())
+
+    def test_snapshot_without_hard_links(self):
+        """Test that the baseline snapshot is copied where hard links aren't possible"""
+        with mock.patch("os.link", side_effect=OSError("cross-device link")):
+            snapshot = Workspace(self.source, self.temp_dir / "snapshot", share=True)
+        self.assertFalse(snapshot.linked)
+        self.assertFalse(os.path.samefile(snapshot.path / self.media, self.source / self.media))
+        self.assertEqual(snapshot.changed_files(), [])
+
+    def test_shared_snapshot_links_the_source(self):
+        """Test that share=True hard-links files, for snapshots that are never written to"""
+        snapshot = Workspace(self.source, self.temp_dir / "snapshot", share=True)
+        if snapshot.linked:
+            self.assertTrue(os.path.samefile(snapshot.path / self.media, self.source / self.media))
+
+    def test_new_files_are_changed(self):
+        """Test that a file created in the workspace is written back, with its directories"""
+        workspace = Workspace(self.source, self.temp_dir / "work")
+        target = workspace.materialize("word/media/new/image9.png")
+        target.write_bytes(b"png")
+
+        self.assertEqual([p.as_posix() for p in workspace.changed_files()], ["word/media/new/image9.png"])
+        workspace.write_back()
+        self.assertEqual((self.source / "word/media/new/image9.png").read_bytes(), b"png")
+        self.assertEqual(workspace.changed_files(), [])
+
+
+class TestLxmlDocxXMLEditor(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def edit(self, editor_class):
+        """Apply the same tracked changes with an editor class; return the C14N result."""
+        xml_path = self.temp_dir / f"{editor_class.__name__}.xml"
+        xml_path.write_text(TRACKED_XML)
+        editor = editor_class(xml_path, rsid="00CC0001", author="Tester")
+        editor.suggest_deletion(editor.get_node(tag="w:r", contains="Delete this"))
+        editor.suggest_deletion(editor.get_node(tag="w:p", contains="Whole paragraph"))
+        editor.revert_insertion(editor.get_node(tag="w:ins", attrs={"w:id": "4"}))
+        editor.revert_deletion(editor.get_node(tag="w:del", attrs={"w:id": "5"}))
+        editor.insert_after(
+            editor.get_node(tag="w:p", contains="Keep this"),
+            "<w:p><w:ins><w:r><w:t>New paragraph</w:t></w:r></w:ins></w:p>",
+        )
+        editor.save()
+        # Dates are the time of the edit
+        content = re.sub(rb' w(?:16du)?:date(?:Utc)?="[^"]*"', b"", xml_path.read_bytes())
+        return lxml.etree.tostring(lxml.etree.fromstring(content), method="c14n")
+
+    def test_same_tracked_changes_as_minidom(self):
+        """Test that the lxml editor makes the same tracked changes as DocxXMLEditor"""
+        expected = self.edit(DocxXMLEditor)
+        self.assertEqual(self.edit(LxmlDocxXMLEditor), expected)
+        for text in (b"<w:delText", b'w:author="Tester"', b"w14:paraId", b"New paragraph"):
+            self.assertIn(text, expected)
+
+    def test_unused_namespaces_are_not_saved(self):
+        """Test that namespaces declared up front are only kept when edits use them"""
+        xml_path = self.temp_dir / "document.xml"
+        xml_path.write_text(TRACKED_XML)
+        editor = LxmlDocxXMLEditor(xml_path, rsid="00CC0001")
+        editor.suggest_deletion(editor.get_node(tag="w:r", contains="Delete this"))
+        editor.save()
+
+        root = lxml.etree.parse(str(xml_path)).getroot()
+        self.assertEqual(set(root.nsmap), {"w", "w16du"})
+
+
+class TestEditorSelection(DocumentTestCase):
+    def test_large_parts_get_the_lxml_editor(self):
+        """Test that parts of at least lxml_editor_min_size bytes are edited with lxml"""
+        self.assertIs(type(self.open_document()["word/document.xml"]), DocxXMLEditor)
+
+        with mock.patch("builtins.print"):
+            doc = Document(self.source, lxml_editor_min_size=0)
+        editor = doc["word/document.xml"]
+        self.assertIs(type(editor), LxmlDocxXMLEditor)
+        paragraph = editor.get_node(tag="w:p", contains="Hello world")
+        editor.insert_after(paragraph, "<w:p><w:r><w:t>Added</w:t></w:r></w:p>")
+        doc.save(validate=False)
+        self.assertIn("Added", (self.source / "word/document.xml").read_text())
+
+
+class TestIdAllocation(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def test_change_ids_continue_from_the_largest_in_use(self):
+        """Test that change ids are never reissued, including ids of inserted fragments"""
+        for editor_class in (DocxXMLEditor, LxmlDocxXMLEditor):
+            with self.subTest(editor_class.__name__):
+                xml_path = self.temp_dir / "document.xml"
+                xml_path.write_text(TRACKED_XML)
+                editor = editor_class(xml_path, rsid="00CC0001")
+                self.assertEqual(editor._get_next_change_id(), 6)
+
+                editor.insert_after(
+                    editor.get_node(tag="w:p", contains="Keep this"),
+                    '<w:p><w:ins w:id="20"><w:r><w:t>New</w:t></w:r></w:ins></w:p>',
+                )
+                deleted = editor.suggest_deletion(
+                    editor.get_node(tag="w:p", contains="Whole paragraph")
+                )
+                self.assertEqual(deleted.getElementsByTagName("w:del")[0].getAttribute("w:id"), "21")
+
+                # invalidate() reseeds the counter from the tree
+                editor.invalidate()
+                self.assertEqual(editor._get_next_change_id(), 22)
+
+    def test_next_rid(self):
+        """Test that rIds follow the largest in use, including relationships added since"""
+        rels_path = self.temp_dir / "document.xml.rels"
+        rels_path.write_text(
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="styles" Target="styles.xml"/>'
+            '<Relationship Id="rId7" Type="theme" Target="theme/theme1.xml"/>'
+            '<Relationship Id="custom" Type="other" Target="other.xml"/>'
+            "</Relationships>"
+        )
+        editor = DocxXMLEditor(rels_path, rsid="00CC0001")
+        self.assertEqual(editor.get_next_rid(), "rId8")
+        self.assertEqual(editor.get_next_rid(), "rId8")  # Only taken once added
+
+        editor.append_to(
+            editor.dom.documentElement,
+            '<Relationship Id="rId8" Type="comments" Target="comments.xml"/>',
+        )
+        self.assertEqual(editor.get_next_rid(), "rId9")
+
+    def test_hex_ids_skip_ids_in_use(self):
+        """Test that hex ids count up from the largest in use and skip used ones"""
+        allocator = HexIdAllocator()
+        allocator.add("0000000A")
+        allocator.add("00000003")
+        allocator.add("not hex")
+        self.assertEqual(allocator.allocate(), "0000000B")
+        allocator.add("0000000C")
+        self.assertEqual(allocator.allocate(), "0000000D")
+
+        allocator = HexIdAllocator()
+        allocator.add(f"{HexIdAllocator.LIMIT - 2:08X}")
+        allocator.add("00000001")
+        # Past the limit, allocation wraps around to the unused ids
+        self.assertEqual(allocator.allocate(), f"{HexIdAllocator.LIMIT - 1:08X}")
+        self.assertEqual(allocator.allocate(), "00000002")
+
+    def test_new_paragraphs_get_unique_hex_ids(self):
+        """Test that inserted paragraphs get para/text ids unused by the file"""
+        xml_path = self.temp_dir / "document.xml"
+        xml_path.write_text(
+            TRACKED_XML.replace(
+                "<w:p>",
+                '<w:p xmlns:w14="http://schemas.microsoft.com/office/word/2010/wordml" '
+                'w14:paraId="00000100">',
+                1,
+            )
+        )
+        editor = DocxXMLEditor(xml_path, rsid="00CC0001")
+        paragraph = editor.append_to(
+            editor.get_node(tag="w:body"), "<w:p><w:r><w:t>New</w:t></w:r></w:p>"
+        )[0]
+        self.assertEqual(
+            (paragraph.getAttribute("w14:paraId"), paragraph.getAttribute("w14:textId")),
+            ("00000101", "00000102"),
+        )
+
+
+class TestDocumentIds(DocumentTestCase):
+    def test_hex_ids_are_unique_across_parts(self):
+        """Test that ids used by parts no editor has opened aren't handed out"""
+        (self.source / "word/footer9.xml").write_text(
+            f'<w:ftr xmlns:w="{W_NAMESPACE}" '
+            'xmlns:w14="http://schemas.microsoft.com/office/word/2010/wordml">'
+            '<w:p w14:paraId="0ABCDEF0"/></w:ftr>'
+        )
+        doc = self.open_document()
+        paragraph = doc["word/document.xml"].get_node(tag="w:p", contains="Hello world")
+        comment_id = doc.add_comment(paragraph, paragraph, "A comment")
+
+        self.assertEqual(comment_id, 0)
+        self.assertEqual(doc.existing_comments[0]["para_id"], "0ABCDEF1")
+        comment = doc["word/comments.xml"].get_node(tag="w:comment", attrs={"w:id": "0"})
+        self.assertEqual(
+            comment.getElementsByTagName("w:p")[0].getAttribute("w14:paraId"), "0ABCDEF1"
+        )
+        self.assertEqual(doc.reply_to_comment(0, "A reply"), 1)
+
+
+class TestBatch(DocumentTestCase):
+    def setUp(self):
+        super().setUp()
+        document = docx.Document(self.docx_path)
+        for index in range(1, 6):
+            document.add_paragraph(f"Paragraph {index}")
+        document.save(self.docx_path)
+        shutil.rmtree(self.source)
+        with zipfile.ZipFile(self.docx_path) as zf:
+            zf.extractall(self.source)
+
+    def document_xml(self, doc):
+        """Return the C14N of a document's edited document.xml, without dates."""
+        editor = doc["word/document.xml"]
+        editor.save()
+        content = re.sub(rb' w(?:16du)?:date(?:Utc)?="[^"]*"', b"", editor.xml_path.read_bytes())
+        return lxml.etree.tostring(lxml.etree.fromstring(content), method="c14n")
+
+    def test_same_result_as_single_edits(self):
+        """Test that a batch makes the same changes as the editor methods one by one"""
+        doc = self.open_document()
+        doc.rsid = "00CC0001"
+        editor = doc["word/document.xml"]
+        editor.rsid = doc.rsid
+        editor.replace_node(
+            editor.get_node(tag="w:p", contains="Paragraph 1"),
+            "<w:p><w:r><w:t>Replaced 1</w:t></w:r></w:p>",
+        )
+        editor.suggest_deletion(editor.get_node(tag="w:r", contains="Paragraph 2"))
+        editor.insert_after(
+            editor.get_node(tag="w:p", contains="Paragraph 3"),
+            "<w:p><w:r><w:t>After 3</w:t></w:r></w:p>",
+        )
+        editor.insert_before(
+            editor.get_node(tag="w:p", contains="Paragraph 3"),
+            "<w:p><w:r><w:t>Before 3</w:t></w:r></w:p>",
+        )
+        editor.append_to(
+            editor.get_node(tag="w:p", contains="Paragraph 4"),
+            "<w:r><w:t xml:space=\"preserve\"> appended</w:t></w:r>",
+        )
+        expected = self.document_xml(doc)
+
+        doc = self.open_document()
+        doc.rsid = doc["word/document.xml"].rsid = "00CC0001"
+        with doc.batch() as batch:
+            batch.replace_node(
+                {"tag": "w:p", "contains": "Paragraph 1"},
+                "<w:p><w:r><w:t>Replaced 1</w:t></w:r></w:p>",
+            )
+            batch.suggest_deletion({"tag": "w:r", "contains": "Paragraph 2"})
+            batch.extend(
+                [
+                    {
+                        "operation": "insert_after",
+                        "locator": {"tag": "w:p", "contains": "Paragraph 3"},
+                        "xml": "<w:p><w:r><w:t>After 3</w:t></w:r></w:p>",
+                    },
+                    (
+                        {"tag": "w:p", "contains": "Paragraph 3"},
+                        "insert_before",
+                        "<w:p><w:r><w:t>Before 3</w:t></w:r></w:p>",
+                    ),
+                ]
+            )
+            batch.append_to(
+                doc["word/document.xml"].get_node(tag="w:p", contains="Paragraph 4"),
+                "<w:r><w:t xml:space=\"preserve\"> appended</w:t></w:r>",
+            )
+        self.assertEqual(self.document_xml(doc), expected)
+        self.assertEqual(len(batch.results), 5)
+        self.assertEqual(batch.results[0][0].getElementsByTagName("w:t")[0].firstChild.data, "Replaced 1")
+
+    def test_line_number_locators(self):
+        """Test that a [start, stop] line_number locator is read as a range"""
+        doc = self.open_document()
+        paragraph = doc["word/document.xml"].get_node(tag="w:p", contains="Paragraph 5")
+        line = paragraph.parse_position[0]
+        with doc.batch() as batch:
+            batch.extend(
+                [
+                    {
+                        "operation": "suggest_deletion",
+                        "locator": {
+                            "tag": "w:p",
+                            "line_number": [line, line + 1],
+                            "contains": "Paragraph 5",
+                        },
+                    }
+                ]
+            )
+        self.assertIs(batch.results[0], paragraph)
+        self.assertTrue(paragraph.getElementsByTagName("w:delText"))
+
+    def test_bad_edits_change_nothing(self):
+        """Test that a batch with an edit that can't be applied leaves the document alone"""
+        doc = self.open_document()
+        before = self.document_xml(doc)
+        paragraph = {"tag": "w:p", "contains": "Paragraph 1"}
+        other = {"tag": "w:p", "contains": "Paragraph 2"}
+        # Each follows a valid replace_node edit of paragraph
+        bad_edits = [
+            (("insert_after", other, "<w:p><w:t>Unclosed</w:p>"), "invalid XML"),
+            (("suggest_deletion", {"tag": "w:p", "contains": "Missing"}), "Node not found"),
+            (("revert_insertion", other), "requires w:ins"),
+            (("replace_node", paragraph, "<w:p/>"), "replaced twice"),
+            (("append_to", paragraph, "<w:r/>"), "removed by a replace_node"),
+        ]
+        for (operation, target, *xml), message in bad_edits:
+            with self.subTest(message):
+                with self.assertRaisesRegex(ValueError, f"Edit 1 .*{message}"):
+                    with doc.batch() as batch:
+                        batch.replace_node(paragraph, "<w:p><w:r><w:t>Replaced</w:t></w:r></w:p>")
+                        batch.add(operation, target, *xml)
+                self.assertEqual(self.document_xml(doc), before)
+
+        with self.assertRaisesRegex(ValueError, "Unknown edit operation"):
+            doc.batch().__enter__().add("remove", paragraph)
+        with self.assertRaisesRegex(RuntimeError, "stop"):
+            with doc.batch() as batch:
+                batch.replace_node(paragraph, "<w:p><w:r><w:t>Replaced</w:t></w:r></w:p>")
+                raise RuntimeError("stop")
+        self.assertEqual(self.document_xml(doc), before)
+
+    def test_edits_failing_halfway_are_undone(self):
+        """Test that edits applied before one that fails on their changes are undone"""
+        for lxml_editor_min_size in (0, LXML_EDITOR_MIN_SIZE):
+            with self.subTest(lxml_editor_min_size=lxml_editor_min_size):
+                with mock.patch("builtins.print"):
+                    doc = Document(self.source, lxml_editor_min_size=lxml_editor_min_size)
+                before = self.document_xml(doc)
+                editor = doc["word/document.xml"]
+                paragraph = editor.get_node(tag="w:p", contains="Paragraph 3")
+                with self.assertRaisesRegex(ValueError, "Edit 3 .*already contains w:delText"):
+                    with doc.batch() as batch:
+                        batch.insert_after(paragraph, "<w:p><w:r><w:t>After 3</w:t></w:r></w:p>")
+                        batch.append_to(paragraph, "<w:r><w:t>Appended</w:t></w:r>")
+                        batch.suggest_deletion({"tag": "w:p", "contains": "Paragraph 3"})
+                        batch.suggest_deletion({"tag": "w:r", "contains": "Paragraph 3"})
+                self.assertEqual(self.document_xml(doc), before)
+
+                # The same nodes are still there, and found again
+                self.assertIs(editor.get_node(tag="w:p", contains="Paragraph 3"), paragraph)
+                with self.assertRaises(ValueError):
+                    editor.get_node(tag="w:p", contains="After 3")
+                with doc.batch() as batch:
+                    batch.suggest_deletion({"tag": "w:r", "contains": "Paragraph 3"})
+                self.assertTrue(paragraph.getElementsByTagName("w:delText"))
+
+
+if __name__ == "__main__":
+    unittest.main()
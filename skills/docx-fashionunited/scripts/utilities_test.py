@@ -0,0 +1,227 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import lxml.etree
+
+from .utilities import LXML_MAX_SOURCELINE, LxmlXMLEditor, XMLEditor
+
+W_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+DOCUMENT_XML = f"""<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<w:document xmlns:w="{W_NAMESPACE}">
+  <w:body>
+    <w:p w:rsidR="00AB0001">
+      <w:r>
+        <w:t>First paragraph</w:t>
+      </w:r>
+    </w:p>
+    <w:p w:rsidR="00AB0002">
+      <w:r>
+        <w:t>Second &#8220;quoted&#8221; paragraph</w:t>
+      </w:r>
+    </w:p>
+    <w:p w:rsidR="00AB0003">
+      <w:r>
+        <w:t>Third paragraph</w:t>
+      </w:r>
+    </w:p>
+  </w:body>
+</w:document>
+"""
+
+
+class EditorTestCase(unittest.TestCase):
+    editor_class = XMLEditor
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.xml_path = self.temp_dir / "document.xml"
+        self.xml_path.write_text(DOCUMENT_XML)
+        self.editor = self.editor_class(self.xml_path)
+
+    def canonical(self, path):
+        """Return the C14N form of an XML file, to compare files across editors."""
+        return lxml.etree.tostring(lxml.etree.parse(str(path)), method="c14n")
+
+    def rescan(self, tag, attrs=None, line_number=None, contains=None):
+        """Find elements the way get_node did before it had indexes."""
+        return [
+            elem
+            for elem in self.editor.dom.getElementsByTagName(tag)
+            if (line_number is None or elem.parse_position[0] == line_number)
+            and all(elem.getAttribute(k) == v for k, v in (attrs or {}).items())
+            and (contains is None or contains in self.editor._get_element_text(elem))
+        ]
+
+
+class TestGetNode(EditorTestCase):
+    def test_lookups(self):
+        """Test that attrs, line_number, and contains lookups find the single match"""
+        second = self.editor.get_node(tag="w:p", attrs={"w:rsidR": "00AB0002"})
+        self.assertEqual(second.parse_position[0], 9)
+        self.assertIs(self.editor.get_node(tag="w:p", line_number=9), second)
+        self.assertIs(self.editor.get_node(tag="w:p", line_number=range(8, 11)), second)
+        self.assertIs(self.editor.get_node(tag="w:p", contains="&#8220;quoted"), second)
+        self.assertIs(self.editor.get_node(tag="w:p", contains="“quoted"), second)
+
+        with self.assertRaisesRegex(ValueError, "Multiple nodes found"):
+            self.editor.get_node(tag="w:p", contains="paragraph")
+        with self.assertRaisesRegex(ValueError, "Node not found"):
+            self.editor.get_node(tag="w:p", attrs={"w:rsidR": "00AB0009"})
+
+    def test_index_follows_editor_methods(self):
+        """Test that nodes inserted or removed by the editor are found, or not, at once"""
+        first = self.editor.get_node(tag="w:p", contains="First")
+        self.editor.get_node(tag="w:p", attrs={"w:rsidR": "00AB0001"})  # Builds the attr index
+        self.editor.insert_after(
+            first, '<w:p w:rsidR="00AB0004"><w:r><w:t>Inserted</w:t></w:r></w:p>'
+        )
+        inserted = self.editor.get_node(tag="w:p", contains="Inserted")
+        self.assertIs(self.editor.get_node(tag="w:p", attrs={"w:rsidR": "00AB0004"}), inserted)
+
+        third = self.editor.get_node(tag="w:p", contains="Third")
+        self.editor.replace_node(
+            third, '<w:p w:rsidR="00AB0005"><w:r><w:t>Replacement</w:t></w:r></w:p>'
+        )
+        with self.assertRaises(ValueError):
+            self.editor.get_node(tag="w:p", contains="Third")
+        with self.assertRaises(ValueError):
+            self.editor.get_node(tag="w:p", attrs={"w:rsidR": "00AB0003"})
+        # The old element's line no longer finds anything
+        with self.assertRaises(ValueError):
+            self.editor.get_node(tag="w:p", line_number=third.parse_position[0])
+
+        # Text cached for the ancestors includes the new content
+        body = self.editor.get_node(tag="w:body")
+        self.assertIn("Inserted", self.editor._get_element_text(body))
+        self.assertIs(self.editor.get_node(tag="w:body", contains="Replacement"), body)
+
+        for tag, attrs, contains in [
+            ("w:p", None, "paragraph"),
+            ("w:r", None, "Replacement"),
+            ("w:p", {"w:rsidR": "00AB0005"}, None),
+            ("w:t", None, "Inserted"),
+        ]:
+            expected = self.rescan(tag, attrs, contains=contains)
+            self.assertEqual(self.editor._find_nodes(tag, attrs, None, contains), expected)
+
+    def test_direct_dom_edits_are_seen(self):
+        """Test that lookups stay correct after the DOM is changed without the editor"""
+        second = self.editor.get_node(tag="w:p", contains="Second")
+        text = second.getElementsByTagName("w:t")[0].firstChild
+        text.data = "Changed directly"
+        self.assertIs(self.editor.get_node(tag="w:p", contains="Changed directly"), second)
+        with self.assertRaises(ValueError):
+            self.editor.get_node(tag="w:p", contains="Second")
+
+        second.parentNode.removeChild(second)
+        with self.assertRaises(ValueError):
+            self.editor.get_node(tag="w:p", attrs={"w:rsidR": "00AB0002"})
+
+    def test_invalidate(self):
+        """Test that invalidate() makes the next lookup see attributes set directly"""
+        first = self.editor.get_node(tag="w:p", contains="First")
+        self.editor.get_node(tag="w:p", attrs={"w:rsidR": "00AB0001"})
+        first.setAttribute("w:rsidR", "00AB0002")
+
+        self.editor.invalidate()
+        with self.assertRaisesRegex(ValueError, "Multiple nodes found"):
+            self.editor.get_node(tag="w:p", attrs={"w:rsidR": "00AB0002"})
+
+    def test_invalidate_after_adding_a_match(self):
+        """Test that invalidate() makes the next lookup see a second match added directly"""
+        body = self.editor.get_node(tag="w:body")
+        self.editor.get_node(tag="w:p", contains="Third")
+        self.append_directly(body, "<w:p><w:r><w:t>Third again</w:t></w:r></w:p>")
+
+        self.editor.invalidate()
+        with self.assertRaisesRegex(ValueError, "Multiple nodes found"):
+            self.editor.get_node(tag="w:p", contains="Third")
+
+    def append_directly(self, parent, xml_content):
+        parent.appendChild(self.editor._parse_fragment(xml_content)[0])
+
+
+class TestLxmlGetNode(TestGetNode):
+    editor_class = LxmlXMLEditor
+
+    def test_direct_dom_edits_are_seen(self):
+        """Test that lookups stay correct after the tree is changed without the editor"""
+        second = self.editor.get_node(tag="w:p", contains="Second")
+        second.getElementsByTagName("w:t")[0].text = "Changed directly"
+        self.assertIs(self.editor.get_node(tag="w:p", contains="Changed directly"), second)
+
+        second.getparent().remove(second)
+        with self.assertRaises(ValueError):
+            self.editor.get_node(tag="w:p", attrs={"w:rsidR": "00AB0002"})
+
+    def append_directly(self, parent, xml_content):
+        parent.append(self.editor._parse_fragment(xml_content)[0])
+
+
+class TestLxmlXMLEditor(EditorTestCase):
+    def test_same_lines_as_minidom(self):
+        """Test that every element has the start tag line XMLEditor gives it"""
+        minidom_editor = XMLEditor(self.xml_path)
+        expected = [
+            (elem.tagName, elem.parse_position[0])
+            for elem in minidom_editor.dom.getElementsByTagName("*")
+        ]
+        lxml_editor = LxmlXMLEditor(self.xml_path)
+        self.assertEqual(
+            [
+                (elem.tagName, elem.parse_position[0])
+                for elem in lxml_editor.dom.getElementsByTagName("*")
+            ],
+            expected,
+        )
+
+    def test_lines_beyond_lxml_limit(self):
+        """Test that line numbers past lxml's 16-bit limit are still right"""
+        paragraphs = "".join(
+            f'<w:p w:rsidR="{index:08X}">\n<w:r>\n<w:t>Text {index}</w:t>\n</w:r>\n</w:p>\n'
+            for index in range(LXML_MAX_SOURCELINE // 5 + 100)
+        )
+        self.xml_path.write_text(
+            f'<?xml version="1.0" encoding="UTF-8"?>\n<w:document xmlns:w="{W_NAMESPACE}">'
+            f"<w:body>\n{paragraphs}</w:body></w:document>"
+        )
+        editor = LxmlXMLEditor(self.xml_path)
+        last = editor.get_node(tag="w:p", contains=f"Text {LXML_MAX_SOURCELINE // 5 + 99}")
+        line = last.parse_position[0]
+        self.assertGreater(line, LXML_MAX_SOURCELINE)
+        self.assertEqual(
+            self.xml_path.read_text().splitlines()[line - 1],
+            f'<w:p w:rsidR="{LXML_MAX_SOURCELINE // 5 + 99:08X}">',
+        )
+        self.assertIs(editor.get_node(tag="w:t", line_number=line + 2).getparent().getparent(), last)
+
+    def test_same_output_as_minidom(self):
+        """Test that the same edits give the same XML with both editors"""
+        outputs = []
+        for editor_class in (XMLEditor, LxmlXMLEditor):
+            xml_path = self.temp_dir / f"{editor_class.__name__}.xml"
+            shutil.copy(self.xml_path, xml_path)
+            editor = editor_class(xml_path)
+            first = editor.get_node(tag="w:p", contains="First")
+            editor.insert_after(first, "<w:p><w:r><w:t>After first</w:t></w:r></w:p>")
+            editor.insert_before(first, "<w:p><w:r><w:t>Before first</w:t></w:r></w:p>")
+            editor.replace_node(
+                editor.get_node(tag="w:r", contains="Third"),
+                "<w:r><w:t>Replaced run</w:t></w:r><w:r><w:t> and another</w:t></w:r>",
+            )
+            editor.append_to(
+                editor.get_node(tag="w:body"), "<w:p><w:r><w:t>Last</w:t></w:r></w:p>"
+            )
+            editor.get_node(tag="w:p", contains="Second").setAttribute("w:rsidP", "00AB0009")
+            editor.save()
+            outputs.append(self.canonical(xml_path))
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertIn(b"Replaced run", outputs[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
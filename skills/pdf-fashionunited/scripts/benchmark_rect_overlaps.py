@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Benchmark rect_overlaps.find_overlaps against comparing every pair.
+
+Synthetic slides (clusters of shapes, as in dashboards and org charts) and
+forms (label and entry boxes in rows, over several pages) of 1k-10k
+rectangles are checked with the NumPy path, the pure-Python path and a
+pairwise reference, and all three results are compared. Where the call site
+of this skill is importable (inventory.py or check_bounding_boxes.py), it is
+timed and checked too.
+
+Shared by the pdf and pptx skills; the two copies are identical.
+
+Example usage:
+    python benchmark_rect_overlaps.py [--sizes 1000 5000 10000] [--no-pairwise]
+"""
+
+import argparse
+import io
+import json
+import random
+import time
+from types import SimpleNamespace
+
+import rect_overlaps
+from rect_overlaps import find_overlaps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rectangle overlap detection")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 5000, 10000],
+        help="Numbers of rectangles (default: 1000 5000 10000)",
+    )
+    parser.add_argument(
+        "--no-pairwise",
+        dest="pairwise",
+        action="store_false",
+        help="Skip the (slow) pairwise reference",
+    )
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        for name, rects, tolerance in (
+            ("slide", synthetic_slide(size), 0.05),
+            ("form page", synthetic_form_page(size), 0.0),
+        ):
+            print(f"{name}, {size} rectangles")
+            results = {}
+            if rect_overlaps.np is not None:
+                results["numpy"] = timed(
+                    "find_overlaps (numpy)",
+                    rect_overlaps._find_overlaps_numpy,
+                    rects,
+                    tolerance,
+                )
+            results["python"] = timed(
+                "find_overlaps (python)",
+                rect_overlaps._find_overlaps_python,
+                rects,
+                tolerance,
+            )
+            if args.pairwise:
+                results["pairwise"] = timed(
+                    "pairwise", pairwise_overlaps, rects, tolerance
+                )
+            outcomes = {key: sorted(value) for key, value in results.items()}
+            reference = next(iter(outcomes.values()))
+            same = all(outcome == reference for outcome in outcomes.values())
+            print(f"  {len(reference)} overlapping pairs, identical: {same}")
+
+        benchmark_call_sites(size, args.pairwise)
+
+
+def timed(label, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    print(f"  {label:<28} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def pairwise_overlaps(rects, tolerance):
+    """Reference: compare every pair, as the call sites used to."""
+    overlaps = []
+    for i, (x0, y0, x1, y1) in enumerate(rects):
+        for j in range(i + 1, len(rects)):
+            other = rects[j]
+            width = min(x1, other[2]) - max(x0, other[0])
+            height = min(y1, other[3]) - max(y0, other[1])
+            if width > tolerance and height > tolerance:
+                overlaps.append((i, j, width, height))
+    return overlaps
+
+
+def synthetic_slide(size, seed=0):
+    """Shapes in inches, in clusters of overlapping boxes on a 13.33" x 7.5" slide."""
+    rnd = random.Random(seed)
+    rects = []
+    while len(rects) < size:
+        cx, cy = rnd.uniform(0, 13.33), rnd.uniform(0, 7.5)
+        for _ in range(rnd.randint(1, 8)):
+            left = cx + rnd.uniform(-0.5, 0.5)
+            top = cy + rnd.uniform(-0.3, 0.3)
+            rects.append((left, top, left + rnd.uniform(0.1, 1.2), top + rnd.uniform(0.1, 0.5)))
+    return rects[:size]
+
+
+def synthetic_form_page(size, seed=0):
+    """Label and entry boxes in PDF points, in rows with a few overlapping pairs."""
+    rnd = random.Random(seed)
+    rects = []
+    row = 0
+    while len(rects) < size:
+        top = row * 20.0
+        for column in range(4):
+            left = column * 150.0
+            label = [left, top, left + 50.0, top + 16.0]
+            entry = [left + 55.0, top, left + 140.0, top + 16.0]
+            if rnd.random() < 0.01:
+                entry[0] -= 10.0  # Overlaps its label
+            rects.extend([label, entry])
+        row += 1
+    return rects[:size]
+
+
+def benchmark_call_sites(size, pairwise):
+    try:
+        import inventory
+    except ImportError:
+        inventory = None
+    if inventory is not None:
+        print(f"inventory.detect_overlaps, {size} shapes")
+        shapes = slide_shapes(synthetic_slide(size))
+        timed("detect_overlaps", inventory.detect_overlaps, shapes)
+        if pairwise:
+            reference = slide_shapes(synthetic_slide(size))
+            timed("calculate_overlap per pair", detect_overlaps_pairwise, inventory, reference)
+            same = all(
+                list(a.overlapping_shapes.items()) == list(b.overlapping_shapes.items())
+                for a, b in zip(shapes, reference)
+            )
+            print(f"  identical overlapping_shapes: {same}")
+
+    try:
+        import check_bounding_boxes
+    except ImportError:
+        check_bounding_boxes = None
+    if check_bounding_boxes is not None:
+        print(f"check_bounding_boxes, {size // 2} fields on 5 pages")
+        fields_json = json.dumps(synthetic_fields(size))
+        messages = timed(
+            "get_bounding_box_messages",
+            check_bounding_boxes.get_bounding_box_messages,
+            io.StringIO(fields_json),
+        )
+        print(f"  {len(messages)} messages")
+
+
+def slide_shapes(rects):
+    """Stand-ins for ShapeData with the attributes detect_overlaps uses."""
+    return [
+        SimpleNamespace(
+            shape_id=f"shape-{i}",
+            left=x0,
+            top=y0,
+            width=x1 - x0,
+            height=y1 - y0,
+            overlapping_shapes={},
+        )
+        for i, (x0, y0, x1, y1) in enumerate(rects)
+    ]
+
+
+def detect_overlaps_pairwise(inventory, shapes):
+    for i, shape1 in enumerate(shapes):
+        for shape2 in shapes[i + 1 :]:
+            rect1 = (shape1.left, shape1.top, shape1.width, shape1.height)
+            rect2 = (shape2.left, shape2.top, shape2.width, shape2.height)
+            overlaps, overlap_area = inventory.calculate_overlap(rect1, rect2)
+            if overlaps:
+                shape1.overlapping_shapes[shape2.shape_id] = overlap_area
+                shape2.overlapping_shapes[shape1.shape_id] = overlap_area
+
+
+def synthetic_fields(size):
+    """A fields.json with size boxes that don't overlap, spread over 5 pages."""
+    fields = []
+    for i in range(size // 2):
+        page, index = divmod(i, max(1, size // 10))
+        top = (index // 4) * 20.0
+        left = (index % 4) * 150.0
+        fields.append(
+            {
+                "description": f"Field {i}",
+                "page_number": page + 1,
+                "label_bounding_box": [left, top, left + 50.0, top + 16.0],
+                "entry_bounding_box": [left + 55.0, top, left + 140.0, top + 16.0],
+            }
+        )
+    return {"form_fields": fields}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import unittest
+import random
+import rect_overlaps
+from rect_overlaps import find_overlaps
+
+
+class TestFindOverlaps(unittest.TestCase):
+
+    def test_overlap_extents(self):
+        """Test that overlapping pairs are reported with their overlap width and height"""
+        rects = [[0, 0, 10, 10], [5, 8, 20, 30], [50, 50, 60, 60]]
+        self.assertEqual(find_overlaps(rects), [(0, 1, 5, 2)])
+
+    def test_touching_boxes_do_not_overlap(self):
+        """Test that boxes sharing an edge don't overlap"""
+        rects = [[0, 0, 10, 10], [10, 0, 20, 10], [0, 10, 10, 20]]
+        self.assertEqual(find_overlaps(rects), [])
+
+    def test_tolerance(self):
+        """Test that overlaps no wider than the tolerance are ignored"""
+        rects = [(0.0, 0.0, 1.0, 1.0), (0.96, 0.0, 2.0, 1.0), (0.5, 0.5, 1.5, 1.5)]
+        pairs = [(i, j) for i, j, _, _ in find_overlaps(rects, tolerance=0.05)]
+        self.assertEqual(pairs, [(0, 2), (1, 2)])
+
+    def test_numpy_and_python_paths_agree_with_pairwise(self):
+        """Test that both sweep implementations match comparing every pair"""
+        rnd = random.Random(0)
+        rects = []
+        for _ in range(300):
+            x, y = rnd.uniform(0, 100), rnd.uniform(0, 20)
+            rects.append((x, y, x + rnd.uniform(0, 10), y + rnd.uniform(0, 3)))
+        expected = []
+        for i, a in enumerate(rects):
+            for j in range(i + 1, len(rects)):
+                b = rects[j]
+                width = min(a[2], b[2]) - max(a[0], b[0])
+                height = min(a[3], b[3]) - max(a[1], b[1])
+                if width > 0.05 and height > 0.05:
+                    expected.append((i, j, width, height))
+
+        self.assertEqual(sorted(rect_overlaps._find_overlaps_python(rects, 0.05)), expected)
+        if rect_overlaps.np is not None:
+            self.assertEqual(sorted(rect_overlaps._find_overlaps_numpy(rects, 0.05)), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
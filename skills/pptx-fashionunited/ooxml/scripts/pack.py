@@ -3,29 +3,88 @@
 Tool to pack a directory into a .docx, .pptx, or .xlsx file with XML formatting undone.
 
 Example usage:
-    python pack.py <input_directory> <office_file> [--force]
+    python pack.py <input_directory> <office_file> [--force] [--compress-level N] [--store-media]
+                   [--engine lxml|minidom]
 """
 
 import argparse
+import copy
+import os
 import shutil
+import struct
 import subprocess
 import sys
 import tempfile
 import defusedxml.minidom
+import lxml.etree
 import zipfile
 from pathlib import Path
 
+try:
+    from office_worker import convert_document
+except ImportError:  # Imported as a package (ooxml.scripts.pack)
+    from .office_worker import convert_document
+
+# XML engines available for condensing parts
+XML_ENGINES = ("lxml", "minidom")
+
+# CPython versions whose ZipFile internals _copy_raw() was checked against;
+# other versions copy members through the public zipfile API
+RAW_COPY_VERSIONS = ((3, 8), (3, 14))
+
+# Media formats that are already compressed; deflating them again only costs time
+COMPRESSED_MEDIA_EXTENSIONS = {
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".tif",
+    ".tiff",
+    ".wdp",
+    ".mp3",
+    ".m4a",
+    ".mp4",
+    ".m4v",
+    ".mov",
+    ".avi",
+    ".wmv",
+    ".wma",
+}
+
 
 def main():
     parser = argparse.ArgumentParser(description="Pack a directory into an Office file")
     parser.add_argument("input_directory", help="Unpacked Office document directory")
     parser.add_argument("output_file", help="Output Office file (.docx/.pptx/.xlsx)")
     parser.add_argument("--force", action="store_true", help="Skip validation")
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        choices=range(10),
+        metavar="{0-9}",
+        help="Deflate level for compressed parts (default: zlib default)",
+    )
+    parser.add_argument(
+        "--store-media",
+        action="store_true",
+        help="Store already-compressed media (png/jpg/mp4/...) without deflating",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=XML_ENGINES,
+        default="lxml",
+        help="XML engine used to condense parts (default: lxml)",
+    )
     args = parser.parse_args()
 
     try:
         success = pack_document(
-            args.input_directory, args.output_file, validate=not args.force
+            args.input_directory,
+            args.output_file,
+            validate=not args.force,
+            compresslevel=args.compress_level,
+            store_media=args.store_media,
+            engine=args.engine,
         )
 
         # Show warning if validation was skipped
@@ -42,13 +101,26 @@ def main():
         sys.exit(f"Error: {e}")
 
 
-def pack_document(input_dir, output_file, validate=False):
+def pack_document(
+    input_dir,
+    output_file,
+    validate=False,
+    compresslevel=None,
+    store_media=False,
+    engine="lxml",
+):
     """Pack a directory into an Office file (.docx/.pptx/.xlsx).
 
+    Parts are streamed straight from input_dir into the archive: XML and .rels
+    parts are condensed in memory, everything else is copied as-is.
+
     Args:
         input_dir: Path to unpacked Office document directory
         output_file: Path to output Office file
         validate: If True, validates with soffice (default: False)
+        compresslevel: Deflate level 0-9, or None for the zlib default
+        store_media: If True, already-compressed media is stored without deflating
+        engine: XML engine used to condense parts ("lxml" or "minidom")
 
     Returns:
         bool: True if successful, False if validation failed
@@ -61,32 +133,144 @@ def pack_document(input_dir, output_file, validate=False):
     if output_file.suffix.lower() not in {".docx", ".pptx", ".xlsx"}:
         raise ValueError(f"{output_file} must be a .docx, .pptx, or .xlsx file")
 
-    # Work in temporary directory to avoid modifying original
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_content_dir = Path(temp_dir) / "content"
-        shutil.copytree(input_dir, temp_content_dir)
-
-        # Process XML files to remove pretty-printing whitespace
-        for pattern in ["*.xml", "*.rels"]:
-            for xml_file in temp_content_dir.rglob(pattern):
-                condense_xml(xml_file)
-
-        # Create final Office file as zip archive
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zf:
-            for f in temp_content_dir.rglob("*"):
-                if f.is_file():
-                    zf.write(f, f.relative_to(temp_content_dir))
-
-        # Validate if requested
-        if validate:
-            if not validate_document(output_file):
-                output_file.unlink()  # Delete the corrupt file
-                return False
+    # Create final Office file as zip archive
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(
+        output_file, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel
+    ) as zf:
+        for f in input_dir.rglob("*"):
+            if not f.is_file():
+                continue
+            arcname = f.relative_to(input_dir)
+
+            if f.name.endswith((".xml", ".rels")):
+                # Remove pretty-printing whitespace without touching the source
+                zinfo = zipfile.ZipInfo.from_file(f, arcname)
+                zf.writestr(
+                    zinfo,
+                    condense_xml_bytes(f.read_bytes(), engine=engine),
+                    compress_type=zipfile.ZIP_DEFLATED,
+                    compresslevel=compresslevel,
+                )
+            elif store_media and f.suffix.lower() in COMPRESSED_MEDIA_EXTENSIONS:
+                zf.write(f, arcname, compress_type=zipfile.ZIP_STORED)
+            else:
+                zf.write(f, arcname)
+
+    # Validate if requested
+    if validate:
+        if not validate_document(output_file):
+            output_file.unlink()  # Delete the corrupt file
+            return False
 
     return True
 
 
+def repack_document(source_file, output_file, parts, compresslevel=None, engine="lxml"):
+    """Write a copy of an Office file with some of its parts replaced or added.
+
+    Members that aren't replaced are copied byte-for-byte, still compressed,
+    so only the new XML parts are condensed and deflated. output_file may be
+    source_file; the archive is then replaced once it is complete.
+
+    Args:
+        source_file: Office file (.docx/.pptx/.xlsx) to copy
+        output_file: Path to output Office file
+        parts: Dict of part name (e.g. "word/document.xml") -> file with its content
+        compresslevel: Deflate level 0-9, or None for the zlib default
+        engine: XML engine used to condense parts ("lxml" or "minidom")
+    """
+    output_file = Path(output_file)
+    if output_file.suffix.lower() not in {".docx", ".pptx", ".xlsx"}:
+        raise ValueError(f"{output_file} must be a .docx, .pptx, or .xlsx file")
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = output_file.with_name(output_file.name + ".tmp")
+
+    with zipfile.ZipFile(source_file) as source, zipfile.ZipFile(
+        temp_file, "w", zipfile.ZIP_DEFLATED, compresslevel=compresslevel
+    ) as zf:
+        pending = dict(parts)
+        for info in source.infolist():
+            part = pending.pop(info.filename, None)
+            if part is None:
+                _copy_member(source, info, zf)
+            else:
+                _write_part(zf, info.filename, Path(part), compresslevel, engine)
+        for name, part in pending.items():
+            _write_part(zf, name, Path(part), compresslevel, engine)
+
+    os.replace(temp_file, output_file)
+
+
+def _write_part(zf, arcname, path, compresslevel, engine):
+    if path.name.endswith((".xml", ".rels")):
+        zinfo = zipfile.ZipInfo.from_file(path, arcname)
+        zf.writestr(
+            zinfo,
+            condense_xml_bytes(path.read_bytes(), engine=engine),
+            compress_type=zipfile.ZIP_DEFLATED,
+            compresslevel=compresslevel,
+        )
+    else:
+        zf.write(path, arcname)
+
+
+def _copy_member(source, info, zf):
+    """Copy a member from source into zf, still compressed where possible.
+
+    zipfile has no public API for copying compressed data, so on the CPython
+    versions whose ZipFile internals this was checked against, the local
+    header and data are written directly and the entry registered the way
+    ZipFile.write does. Elsewhere, and for encrypted and zip64 members, the
+    member is streamed through ZipFile.open() and compressed again.
+    """
+    if _can_copy_raw(info, zf):
+        _copy_raw(source, info, zf)
+        return
+
+    zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+    zinfo.compress_type = info.compress_type
+    zinfo.external_attr = info.external_attr
+    zinfo.comment = info.comment
+    zinfo.file_size = info.file_size  # Lets ZipFile.open() pick zip64 up front
+    with source.open(info) as src, zf.open(zinfo, "w") as dst:
+        shutil.copyfileobj(src, dst)
+
+
+def _can_copy_raw(info, zf):
+    return (
+        sys.implementation.name == "cpython"
+        and RAW_COPY_VERSIONS[0] <= sys.version_info[:2] <= RAW_COPY_VERSIONS[1]
+        and not info.flag_bits & 0x01
+        and info.file_size < zipfile.ZIP64_LIMIT
+        and info.compress_size < zipfile.ZIP64_LIMIT
+        and zf._seekable
+        and not zf._writing
+    )
+
+
+def _copy_raw(source, info, zf):
+    # Skip the source's local header, whose name and extra field may differ
+    # in length from the central directory's
+    source.fp.seek(info.header_offset)
+    header = source.fp.read(zipfile.sizeFileHeader)
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    source.fp.seek(name_length + extra_length, os.SEEK_CUR)
+    data = source.fp.read(info.compress_size)
+
+    zinfo = copy.copy(info)
+    zinfo.flag_bits &= ~0x08  # Sizes go in the header, not a data descriptor
+    with zf._lock:
+        zf.fp.seek(zf.start_dir)
+        zinfo.header_offset = zf.fp.tell()
+        zf.fp.write(zinfo.FileHeader())
+        zf.fp.write(data)
+        zf.filelist.append(zinfo)
+        zf.NameToInfo[zinfo.filename] = zinfo
+        zf.start_dir = zf.fp.tell()
+        zf._didModify = True
+
+
 def validate_document(doc_path):
     """Validate document by converting to HTML with soffice."""
     # Determine the correct filter based on file extension
@@ -100,20 +284,8 @@ def validate_document(doc_path):
 
     with tempfile.TemporaryDirectory() as temp_dir:
         try:
-            result = subprocess.run(
-                [
-                    "soffice",
-                    "--headless",
-                    "--convert-to",
-                    filter_name,
-                    "--outdir",
-                    temp_dir,
-                    str(doc_path),
-                ],
-                capture_output=True,
-                timeout=10,
-                text=True,
-            )
+            # Uses a running office_worker.py pool if there is one
+            result = convert_document(doc_path, temp_dir, filter_name, timeout=10)
             if not (Path(temp_dir) / f"{doc_path.stem}.html").exists():
                 error_msg = result.stderr.strip() or "Document validation failed"
                 print(f"Validation error: {error_msg}", file=sys.stderr)
@@ -130,10 +302,29 @@ def validate_document(doc_path):
             return False
 
 
-def condense_xml(xml_file):
+def condense_xml(xml_file, engine="lxml"):
     """Strip unnecessary whitespace and remove comments."""
-    with open(xml_file, "r", encoding="utf-8") as f:
-        dom = defusedxml.minidom.parse(f)
+    xml_file = Path(xml_file)
+    xml_file.write_bytes(condense_xml_bytes(xml_file.read_bytes(), engine=engine))
+
+
+def condense_xml_bytes(content, engine="lxml"):
+    """Return XML content with unnecessary whitespace and comments removed.
+
+    Whitespace-only text and comments are dropped from every element except
+    prefixed text elements (w:t, a:t, ...), whose content is kept verbatim.
+    Both engines implement the same rules; lxml is much faster and uses a
+    fraction of the memory on multi-MB parts.
+    """
+    if engine == "minidom":
+        return _condense_xml_minidom(content)
+    if engine == "lxml":
+        return _condense_xml_lxml(content)
+    raise ValueError(f"Unknown XML engine: {engine}")
+
+
+def _condense_xml_minidom(content):
+    dom = defusedxml.minidom.parseString(content)
 
     # Process each element to remove whitespace and comments
     for element in dom.getElementsByTagName("*"):
@@ -150,9 +341,59 @@ def condense_xml(xml_file):
             ) or child.nodeType == child.COMMENT_NODE:
                 element.removeChild(child)
 
-    # Write back the condensed XML
-    with open(xml_file, "wb") as f:
-        f.write(dom.toxml(encoding="UTF-8"))
+    return dom.toxml(encoding="UTF-8")
+
+
+def _is_text_element(element):
+    """True for prefixed text elements (w:t, a:t, ...), as minidom's ':t' check."""
+    return element.tag[-2:] == "}t" and element.prefix is not None
+
+
+def _condense_xml_lxml(content):
+    parser = lxml.etree.XMLParser(resolve_entities=False, no_network=True)
+    root = lxml.etree.fromstring(content, parser)
+
+    # In lxml an element's text nodes are its .text and its children's .tail;
+    # each one corresponds to a single minidom text node
+    for element in root.iter(lxml.etree.Element):
+        if _is_text_element(element):
+            continue
+        if element.text is not None and not element.text.strip():
+            element.text = None
+        for child in element:
+            if child.tail is not None and not child.tail.strip():
+                child.tail = None
+
+    # Remove comment nodes, keeping any text that follows them
+    for comment in list(root.iter(lxml.etree.Comment)):
+        parent = comment.getparent()
+        if parent is not None and not _is_text_element(parent):
+            _remove_keeping_tail(comment)
+
+    # Serialize like minidom's toxml: double-quoted declaration, no newline
+    parts = [b'<?xml version="1.0" encoding="UTF-8"?>']
+    parts.extend(
+        lxml.etree.tostring(node, encoding="UTF-8", with_tail=False)
+        for node in reversed(list(root.itersiblings(preceding=True)))
+    )
+    parts.append(lxml.etree.tostring(root, encoding="UTF-8", xml_declaration=False))
+    parts.extend(
+        lxml.etree.tostring(node, encoding="UTF-8", with_tail=False)
+        for node in root.itersiblings()
+    )
+    return b"".join(parts)
+
+
+def _remove_keeping_tail(node):
+    """Remove node from its parent without dropping the text that follows it."""
+    parent = node.getparent()
+    if node.tail:
+        previous = node.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + node.tail
+        else:
+            parent.text = (parent.text or "") + node.tail
+    parent.remove(node)
 
 
 if __name__ == "__main__":
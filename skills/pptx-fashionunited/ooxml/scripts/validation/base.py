@@ -2,11 +2,17 @@
 Base validator with common validation logic for document files.
 """
 
+import copy
 import re
 from pathlib import Path
 
 import lxml.etree
 
+from .original import open_original_package
+from .cache import ValidationCache
+from .parallel import run_file_checks
+from .schema_cache import get_schema
+
 
 class BaseSchemaValidator:
     """Base validator with common validation logic for document files."""
@@ -41,6 +47,18 @@ class BaseSchemaValidator:
     # Subclasses should override this with format-specific mappings
     ELEMENT_RELATIONSHIP_TYPES = {}
 
+    # Per-file check methods that are fanned out to worker processes when
+    # jobs > 1. Each takes a single path and returns a picklable result.
+    PARALLEL_FILE_CHECKS = (
+        "_xml_syntax_error",
+        "_namespace_errors",
+        "_unique_id_events",
+        "_relationship_id_errors",
+        "_relationship_targets",
+        "_root_name",
+        "validate_file_against_xsd",
+    )
+
     # Unified schema mappings for all Office document types
     SCHEMA_MAPPINGS = {
         # Document type specific schemas
@@ -103,10 +121,13 @@ class BaseSchemaValidator:
         "http://www.w3.org/XML/1998/namespace",
     }
 
-    def __init__(self, unpacked_dir, original_file, verbose=False):
+    def __init__(
+        self, unpacked_dir, original_file, verbose=False, jobs=1, cache_file=None
+    ):
         self.unpacked_dir = Path(unpacked_dir).resolve()
         self.original_file = Path(original_file)
         self.verbose = verbose
+        self.jobs = jobs
 
         # Set schemas directory
         self.schemas_dir = Path(__file__).parent.parent.parent / "schemas"
@@ -120,28 +141,114 @@ class BaseSchemaValidator:
         if not self.xml_files:
             print(f"Warning: No XML files found in {self.unpacked_dir}")
 
+        # Parsed trees shared by all checks: path -> ((mtime_ns, size), tree)
+        self._tree_cache = {}
+
+        # XSD errors of parts in the original file: part name -> error set
+        self._original_xsd_errors = {}
+
+        # Results of per-file checks run in a process pool: (check, path) -> result
+        self._file_check_results = None
+
+        # Optional sidecar manifest of per-part results from previous runs
+        self.cache = ValidationCache(cache_file, self) if cache_file else None
+
     def validate(self):
         """Run all validation checks and return True if all pass."""
         raise NotImplementedError("Subclasses must implement the validate method")
 
+    def _parse(self, xml_file):
+        """Parse an XML file once and share the tree between all checks.
+
+        Entries are keyed by path and invalidated when the file's mtime or size
+        changes. Parse errors are cached as well and re-raised on every lookup.
+        The returned tree is shared, so callers must not modify it; use
+        _parse_copy for checks that mutate the tree.
+        """
+        key = str(xml_file)
+        stat = Path(xml_file).stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self._tree_cache.get(key)
+        if cached is None or cached[0] != stamp:
+            try:
+                result = lxml.etree.parse(key)
+            except lxml.etree.XMLSyntaxError as e:
+                result = e
+            cached = (stamp, result)
+            self._tree_cache[key] = cached
+
+        if isinstance(cached[1], Exception):
+            raise cached[1]
+        return cached[1]
+
+    def _parse_copy(self, xml_file):
+        """Return a private copy of the cached tree that may be modified freely."""
+        return copy.deepcopy(self._parse(xml_file))
+
+    def _file_check(self, check, xml_file):
+        """Return the result of the per-file check method named check for xml_file.
+
+        Results are served from the sidecar cache when the part (and the parts
+        the check depends on) are unchanged since the last run. With jobs > 1,
+        the first call runs every check in PARALLEL_FILE_CHECKS for all
+        uncached files in a process pool and later calls read those results.
+        The validate_* methods still consume results in self.xml_files order,
+        so the report is identical to a serial run.
+        """
+        if self.jobs > 1 and self._file_check_results is None:
+            self._file_check_results = run_file_checks(
+                self, self.PARALLEL_FILE_CHECKS, self._uncached_files()
+            )
+
+        dependencies = self._check_dependencies(check, xml_file)
+        if self.cache is not None:
+            hit, result = self.cache.get(check, xml_file, dependencies)
+            if hit:
+                return result
+
+        key = (check, str(xml_file))
+        if self._file_check_results and key in self._file_check_results:
+            result = self._file_check_results[key]
+        else:
+            result = getattr(self, check)(xml_file)
+
+        if self.cache is not None:
+            self.cache.put(check, xml_file, result, dependencies)
+        return result
+
+    def _check_dependencies(self, check, xml_file):
+        """Return the other parts whose content a per-file check reads."""
+        if check == "_relationship_id_errors":
+            return [xml_file.parent / "_rels" / f"{xml_file.name}.rels"]
+        return []
+
+    def _uncached_files(self):
+        """Return the files that miss the cache for at least one parallel check."""
+        if self.cache is None:
+            return list(self.xml_files)
+        return [
+            f
+            for f in self.xml_files
+            if not all(
+                self.cache.get(check, f, self._check_dependencies(check, f))[0]
+                for check in self.PARALLEL_FILE_CHECKS
+            )
+        ]
+
+    def save_cache(self):
+        """Write the sidecar cache, if enabled, so the next run can reuse results."""
+        if self.cache is not None:
+            self.cache.save(self.xml_files)
+
     def validate_xml(self):
         """Validate that all XML files are well-formed."""
         errors = []
 
         for xml_file in self.xml_files:
-            try:
-                # Try to parse the XML file
-                lxml.etree.parse(str(xml_file))
-            except lxml.etree.XMLSyntaxError as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                    f"Line {e.lineno}: {e.msg}"
-                )
-            except Exception as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                    f"Unexpected error: {str(e)}"
-                )
+            error = self._file_check("_xml_syntax_error", xml_file)
+            if error:
+                errors.append(error)
 
         if errors:
             print(f"FAILED - Found {len(errors)} XML violations:")
@@ -153,26 +260,29 @@ class BaseSchemaValidator:
                 print("PASSED - All XML files are well-formed")
             return True
 
+    def _xml_syntax_error(self, xml_file):
+        """Return the well-formedness error for a single file, or None."""
+        try:
+            # Try to parse the XML file
+            self._parse(xml_file)
+        except lxml.etree.XMLSyntaxError as e:
+            return (
+                f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                f"Line {e.lineno}: {e.msg}"
+            )
+        except Exception as e:
+            return (
+                f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                f"Unexpected error: {str(e)}"
+            )
+        return None
+
     def validate_namespaces(self):
         """Validate that namespace prefixes in Ignorable attributes are declared."""
         errors = []
 
         for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                declared = set(root.nsmap.keys()) - {None}  # Exclude default namespace
-
-                for attr_val in [
-                    v for k, v in root.attrib.items() if k.endswith("Ignorable")
-                ]:
-                    undeclared = set(attr_val.split()) - declared
-                    errors.extend(
-                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                        f"Namespace '{ns}' in Ignorable but not declared"
-                        for ns in undeclared
-                    )
-            except lxml.etree.XMLSyntaxError:
-                continue
+            errors.extend(self._file_check("_namespace_errors", xml_file))
 
         if errors:
             print(f"FAILED - {len(errors)} namespace issues:")
@@ -183,86 +293,53 @@ class BaseSchemaValidator:
             print("PASSED - All namespace prefixes properly declared")
         return True
 
+    def _namespace_errors(self, xml_file):
+        """Return undeclared Ignorable namespace prefixes in a single file."""
+        errors = []
+        try:
+            root = self._parse(xml_file).getroot()
+            declared = set(root.nsmap.keys()) - {None}  # Exclude default namespace
+
+            for attr_val in [
+                v for k, v in root.attrib.items() if k.endswith("Ignorable")
+            ]:
+                undeclared = set(attr_val.split()) - declared
+                errors.extend(
+                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                    f"Namespace '{ns}' in Ignorable but not declared"
+                    for ns in undeclared
+                )
+        except lxml.etree.XMLSyntaxError:
+            pass
+        return errors
+
     def validate_unique_ids(self):
         """Validate that specific IDs are unique according to OOXML requirements."""
         errors = []
         global_ids = {}  # Track globally unique IDs across all files
 
         for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                file_ids = {}  # Track IDs that must be unique within this file
+            # File-level errors come back ready to report; globally scoped IDs
+            # are checked here since they span files
+            for event in self._file_check("_unique_id_events", xml_file):
+                if event[0] == "error":
+                    errors.append(event[1])
+                    continue
 
-                # Remove all mc:AlternateContent elements from the tree
-                mc_elements = root.xpath(
-                    ".//mc:AlternateContent", namespaces={"mc": self.MC_NAMESPACE}
-                )
-                for elem in mc_elements:
-                    elem.getparent().remove(elem)
-
-                # Now check IDs in the cleaned tree
-                for elem in root.iter():
-                    # Get the element name without namespace
-                    tag = (
-                        elem.tag.split("}")[-1].lower()
-                        if "}" in elem.tag
-                        else elem.tag.lower()
+                _, id_value, line, tag = event
+                if id_value in global_ids:
+                    prev_file, prev_line, prev_tag = global_ids[id_value]
+                    errors.append(
+                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                        f"Line {line}: Global ID '{id_value}' in <{tag}> "
+                        f"already used in {prev_file} at line {prev_line} in <{prev_tag}>"
+                    )
+                else:
+                    global_ids[id_value] = (
+                        xml_file.relative_to(self.unpacked_dir),
+                        line,
+                        tag,
                     )
-
-                    # Check if this element type has ID uniqueness requirements
-                    if tag in self.UNIQUE_ID_REQUIREMENTS:
-                        attr_name, scope = self.UNIQUE_ID_REQUIREMENTS[tag]
-
-                        # Look for the specified attribute
-                        id_value = None
-                        for attr, value in elem.attrib.items():
-                            attr_local = (
-                                attr.split("}")[-1].lower()
-                                if "}" in attr
-                                else attr.lower()
-                            )
-                            if attr_local == attr_name:
-                                id_value = value
-                                break
-
-                        if id_value is not None:
-                            if scope == "global":
-                                # Check global uniqueness
-                                if id_value in global_ids:
-                                    prev_file, prev_line, prev_tag = global_ids[
-                                        id_value
-                                    ]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Global ID '{id_value}' in <{tag}> "
-                                        f"already used in {prev_file} at line {prev_line} in <{prev_tag}>"
-                                    )
-                                else:
-                                    global_ids[id_value] = (
-                                        xml_file.relative_to(self.unpacked_dir),
-                                        elem.sourceline,
-                                        tag,
-                                    )
-                            elif scope == "file":
-                                # Check file-level uniqueness
-                                key = (tag, attr_name)
-                                if key not in file_ids:
-                                    file_ids[key] = {}
-
-                                if id_value in file_ids[key]:
-                                    prev_line = file_ids[key][id_value]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
-                                        f"(first occurrence at line {prev_line})"
-                                    )
-                                else:
-                                    file_ids[key][id_value] = elem.sourceline
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
 
         if errors:
             print(f"FAILED - Found {len(errors)} ID uniqueness violations:")
@@ -274,6 +351,77 @@ class BaseSchemaValidator:
                 print("PASSED - All required IDs are unique")
             return True
 
+    def _unique_id_events(self, xml_file):
+        """Check file-scoped ID uniqueness in a single file.
+
+        Returns:
+            list: In document order, ("error", message) for file-level violations
+            and ("global", id_value, line, tag) for every globally scoped ID
+        """
+        events = []
+        try:
+            # Work on a copy since AlternateContent is stripped below
+            root = self._parse_copy(xml_file).getroot()
+            file_ids = {}  # Track IDs that must be unique within this file
+
+            # Remove all mc:AlternateContent elements from the tree
+            mc_elements = root.xpath(
+                ".//mc:AlternateContent", namespaces={"mc": self.MC_NAMESPACE}
+            )
+            for elem in mc_elements:
+                elem.getparent().remove(elem)
+
+            # Now check IDs in the cleaned tree
+            for elem in root.iter():
+                # Get the element name without namespace
+                tag = (
+                    elem.tag.split("}")[-1].lower()
+                    if "}" in elem.tag
+                    else elem.tag.lower()
+                )
+
+                # Check if this element type has ID uniqueness requirements
+                if tag in self.UNIQUE_ID_REQUIREMENTS:
+                    attr_name, scope = self.UNIQUE_ID_REQUIREMENTS[tag]
+
+                    # Look for the specified attribute
+                    id_value = None
+                    for attr, value in elem.attrib.items():
+                        attr_local = (
+                            attr.split("}")[-1].lower() if "}" in attr else attr.lower()
+                        )
+                        if attr_local == attr_name:
+                            id_value = value
+                            break
+
+                    if id_value is not None:
+                        if scope == "global":
+                            events.append(("global", id_value, elem.sourceline, tag))
+                        elif scope == "file":
+                            # Check file-level uniqueness
+                            key = (tag, attr_name)
+                            if key not in file_ids:
+                                file_ids[key] = {}
+
+                            if id_value in file_ids[key]:
+                                prev_line = file_ids[key][id_value]
+                                events.append(
+                                    (
+                                        "error",
+                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
+                                        f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
+                                        f"(first occurrence at line {prev_line})",
+                                    )
+                                )
+                            else:
+                                file_ids[key][id_value] = elem.sourceline
+
+        except (lxml.etree.XMLSyntaxError, Exception) as e:
+            events.append(
+                ("error", f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}")
+            )
+        return events
+
     def validate_file_references(self):
         """
         Validate that all .rels files properly reference files and that all files are referenced.
@@ -308,57 +456,46 @@ class BaseSchemaValidator:
 
         # Check each .rels file
         for rels_file in rels_files:
-            try:
-                # Parse relationships file
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
+            targets, parse_error = self._file_check("_relationship_targets", rels_file)
+            if parse_error is not None:
+                rel_path = rels_file.relative_to(self.unpacked_dir)
+                errors.append(f"  Error parsing {rel_path}: {parse_error}")
+                continue
 
-                # Get the directory where this .rels file is located
-                rels_dir = rels_file.parent
+            # Get the directory where this .rels file is located
+            rels_dir = rels_file.parent
 
-                # Find all relationships and their targets
-                referenced_files = set()
-                broken_refs = []
+            # Resolve all relationship targets
+            broken_refs = []
 
-                for rel in rels_root.findall(
-                    ".//ns:Relationship",
-                    namespaces={"ns": self.PACKAGE_RELATIONSHIPS_NAMESPACE},
-                ):
-                    target = rel.get("Target")
-                    if target and not target.startswith(
-                        ("http", "mailto:")
-                    ):  # Skip external URLs
-                        # Resolve the target path relative to the .rels file location
-                        if rels_file.name == ".rels":
-                            # Root .rels file - targets are relative to unpacked_dir
-                            target_path = self.unpacked_dir / target
-                        else:
-                            # Other .rels files - targets are relative to their parent's parent
-                            # e.g., word/_rels/document.xml.rels -> targets relative to word/
-                            base_dir = rels_dir.parent
-                            target_path = base_dir / target
-
-                        # Normalize the path and check if it exists
-                        try:
-                            target_path = target_path.resolve()
-                            if target_path.exists() and target_path.is_file():
-                                referenced_files.add(target_path)
-                                all_referenced_files.add(target_path)
-                            else:
-                                broken_refs.append((target, rel.sourceline))
-                        except (OSError, ValueError):
-                            broken_refs.append((target, rel.sourceline))
-
-                # Report broken references
-                if broken_refs:
-                    rel_path = rels_file.relative_to(self.unpacked_dir)
-                    for broken_ref, line_num in broken_refs:
-                        errors.append(
-                            f"  {rel_path}: Line {line_num}: Broken reference to {broken_ref}"
-                        )
+            for target, line_num in targets:
+                # Resolve the target path relative to the .rels file location
+                if rels_file.name == ".rels":
+                    # Root .rels file - targets are relative to unpacked_dir
+                    target_path = self.unpacked_dir / target
+                else:
+                    # Other .rels files - targets are relative to their parent's parent
+                    # e.g., word/_rels/document.xml.rels -> targets relative to word/
+                    base_dir = rels_dir.parent
+                    target_path = base_dir / target
 
-            except Exception as e:
+                # Normalize the path and check if it exists
+                try:
+                    target_path = target_path.resolve()
+                    if target_path.exists() and target_path.is_file():
+                        all_referenced_files.add(target_path)
+                    else:
+                        broken_refs.append((target, line_num))
+                except (OSError, ValueError):
+                    broken_refs.append((target, line_num))
+
+            # Report broken references
+            if broken_refs:
                 rel_path = rels_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Error parsing {rel_path}: {e}")
+                for broken_ref, line_num in broken_refs:
+                    errors.append(
+                        f"  {rel_path}: Line {line_num}: Broken reference to {broken_ref}"
+                    )
 
         # Check for unreferenced files (files that exist but are not referenced anywhere)
         unreferenced_files = set(all_files) - all_referenced_files
@@ -385,92 +522,43 @@ class BaseSchemaValidator:
                 )
             return True
 
+    def _relationship_targets(self, rels_file):
+        """Return the internal relationship targets of a single .rels file.
+
+        Returns:
+            tuple: ([(target, line), ...], None), or ([], error_message) if the
+            file cannot be parsed
+        """
+        if not rels_file.name.endswith(".rels"):
+            return [], None
+
+        try:
+            rels_root = self._parse(rels_file).getroot()
+        except Exception as e:
+            return [], str(e)
+
+        targets = []
+        for rel in rels_root.findall(
+            ".//ns:Relationship",
+            namespaces={"ns": self.PACKAGE_RELATIONSHIPS_NAMESPACE},
+        ):
+            target = rel.get("Target")
+            if target and not target.startswith(
+                ("http", "mailto:")
+            ):  # Skip external URLs
+                targets.append((target, rel.sourceline))
+        return targets, None
+
     def validate_all_relationship_ids(self):
         """
         Validate that all r:id attributes in XML files reference existing IDs
         in their corresponding .rels files, and optionally validate relationship types.
         """
-        import lxml.etree
-
         errors = []
 
         # Process each XML file that might contain r:id references
         for xml_file in self.xml_files:
-            # Skip .rels files themselves
-            if xml_file.suffix == ".rels":
-                continue
-
-            # Determine the corresponding .rels file
-            # For dir/file.xml, it's dir/_rels/file.xml.rels
-            rels_dir = xml_file.parent / "_rels"
-            rels_file = rels_dir / f"{xml_file.name}.rels"
-
-            # Skip if there's no corresponding .rels file (that's okay)
-            if not rels_file.exists():
-                continue
-
-            try:
-                # Parse the .rels file to get valid relationship IDs and their types
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-                rid_to_type = {}
-
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rid = rel.get("Id")
-                    rel_type = rel.get("Type", "")
-                    if rid:
-                        # Check for duplicate rIds
-                        if rid in rid_to_type:
-                            rels_rel_path = rels_file.relative_to(self.unpacked_dir)
-                            errors.append(
-                                f"  {rels_rel_path}: Line {rel.sourceline}: "
-                                f"Duplicate relationship ID '{rid}' (IDs must be unique)"
-                            )
-                        # Extract just the type name from the full URL
-                        type_name = (
-                            rel_type.split("/")[-1] if "/" in rel_type else rel_type
-                        )
-                        rid_to_type[rid] = type_name
-
-                # Parse the XML file to find all r:id references
-                xml_root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # Find all elements with r:id attributes
-                for elem in xml_root.iter():
-                    # Check for r:id attribute (relationship ID)
-                    rid_attr = elem.get(f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id")
-                    if rid_attr:
-                        xml_rel_path = xml_file.relative_to(self.unpacked_dir)
-                        elem_name = (
-                            elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
-                        )
-
-                        # Check if the ID exists
-                        if rid_attr not in rid_to_type:
-                            errors.append(
-                                f"  {xml_rel_path}: Line {elem.sourceline}: "
-                                f"<{elem_name}> references non-existent relationship '{rid_attr}' "
-                                f"(valid IDs: {', '.join(sorted(rid_to_type.keys())[:5])}{'...' if len(rid_to_type) > 5 else ''})"
-                            )
-                        # Check if we have type expectations for this element
-                        elif self.ELEMENT_RELATIONSHIP_TYPES:
-                            expected_type = self._get_expected_relationship_type(
-                                elem_name
-                            )
-                            if expected_type:
-                                actual_type = rid_to_type[rid_attr]
-                                # Check if the actual type matches or contains the expected type
-                                if expected_type not in actual_type.lower():
-                                    errors.append(
-                                        f"  {xml_rel_path}: Line {elem.sourceline}: "
-                                        f"<{elem_name}> references '{rid_attr}' which points to '{actual_type}' "
-                                        f"but should point to a '{expected_type}' relationship"
-                                    )
-
-            except Exception as e:
-                xml_rel_path = xml_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Error processing {xml_rel_path}: {e}")
+            errors.extend(self._file_check("_relationship_id_errors", xml_file))
 
         if errors:
             print(f"FAILED - Found {len(errors)} relationship ID reference errors:")
@@ -483,6 +571,88 @@ class BaseSchemaValidator:
                 print("PASSED - All relationship ID references are valid")
             return True
 
+    def _relationship_id_errors(self, xml_file):
+        """Return r:id reference errors for a single XML file and its .rels file."""
+        errors = []
+
+        # Skip .rels files themselves
+        if xml_file.suffix == ".rels":
+            return errors
+
+        # Determine the corresponding .rels file
+        # For dir/file.xml, it's dir/_rels/file.xml.rels
+        rels_dir = xml_file.parent / "_rels"
+        rels_file = rels_dir / f"{xml_file.name}.rels"
+
+        # Skip if there's no corresponding .rels file (that's okay)
+        if not rels_file.exists():
+            return errors
+
+        try:
+            # Parse the .rels file to get valid relationship IDs and their types
+            rels_root = self._parse(rels_file).getroot()
+            rid_to_type = {}
+
+            for rel in rels_root.findall(
+                f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
+            ):
+                rid = rel.get("Id")
+                rel_type = rel.get("Type", "")
+                if rid:
+                    # Check for duplicate rIds
+                    if rid in rid_to_type:
+                        rels_rel_path = rels_file.relative_to(self.unpacked_dir)
+                        errors.append(
+                            f"  {rels_rel_path}: Line {rel.sourceline}: "
+                            f"Duplicate relationship ID '{rid}' (IDs must be unique)"
+                        )
+                    # Extract just the type name from the full URL
+                    type_name = (
+                        rel_type.split("/")[-1] if "/" in rel_type else rel_type
+                    )
+                    rid_to_type[rid] = type_name
+
+            # Parse the XML file to find all r:id references
+            xml_root = self._parse(xml_file).getroot()
+
+            # Find all elements with r:id attributes
+            for elem in xml_root.iter():
+                # Check for r:id attribute (relationship ID)
+                rid_attr = elem.get(f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id")
+                if rid_attr:
+                    xml_rel_path = xml_file.relative_to(self.unpacked_dir)
+                    elem_name = (
+                        elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
+                    )
+
+                    # Check if the ID exists
+                    if rid_attr not in rid_to_type:
+                        errors.append(
+                            f"  {xml_rel_path}: Line {elem.sourceline}: "
+                            f"<{elem_name}> references non-existent relationship '{rid_attr}' "
+                            f"(valid IDs: {', '.join(sorted(rid_to_type.keys())[:5])}{'...' if len(rid_to_type) > 5 else ''})"
+                        )
+                    # Check if we have type expectations for this element
+                    elif self.ELEMENT_RELATIONSHIP_TYPES:
+                        expected_type = self._get_expected_relationship_type(
+                            elem_name
+                        )
+                        if expected_type:
+                            actual_type = rid_to_type[rid_attr]
+                            # Check if the actual type matches or contains the expected type
+                            if expected_type not in actual_type.lower():
+                                errors.append(
+                                    f"  {xml_rel_path}: Line {elem.sourceline}: "
+                                    f"<{elem_name}> references '{rid_attr}' which points to '{actual_type}' "
+                                    f"but should point to a '{expected_type}' relationship"
+                                )
+
+        except Exception as e:
+            xml_rel_path = xml_file.relative_to(self.unpacked_dir)
+            errors.append(f"  Error processing {xml_rel_path}: {e}")
+
+        return errors
+
     def _get_expected_relationship_type(self, element_name):
         """
         Get the expected relationship type for an element.
@@ -531,7 +701,7 @@ class BaseSchemaValidator:
 
         try:
             # Parse and get all declared parts and extensions
-            root = lxml.etree.parse(str(content_types_file)).getroot()
+            root = self._parse(content_types_file).getroot()
             declared_parts = set()
             declared_extensions = set()
 
@@ -592,18 +762,15 @@ class BaseSchemaValidator:
                 ):
                     continue
 
-                try:
-                    root_tag = lxml.etree.parse(str(xml_file)).getroot().tag
-                    root_name = root_tag.split("}")[-1] if "}" in root_tag else root_tag
-
-                    if root_name in declarable_roots and path_str not in declared_parts:
-                        errors.append(
-                            f"  {path_str}: File with <{root_name}> root not declared in [Content_Types].xml"
-                        )
-
-                except Exception:
+                root_name = self._file_check("_root_name", xml_file)
+                if root_name is None:
                     continue  # Skip unparseable files
 
+                if root_name in declarable_roots and path_str not in declared_parts:
+                    errors.append(
+                        f"  {path_str}: File with <{root_name}> root not declared in [Content_Types].xml"
+                    )
+
             # Check all non-XML files for Default extension declarations
             for file_path in all_files:
                 # Skip XML files and metadata files (already checked above)
@@ -638,6 +805,14 @@ class BaseSchemaValidator:
                 )
             return True
 
+    def _root_name(self, xml_file):
+        """Return the local name of a file's root element, or None if unparseable."""
+        try:
+            root_tag = self._parse(xml_file).getroot().tag
+        except Exception:
+            return None
+        return root_tag.split("}")[-1] if "}" in root_tag else root_tag
+
     def validate_file_against_xsd(self, xml_file, verbose=False):
         """Validate a single XML file against XSD schema, comparing with original.
 
@@ -694,8 +869,8 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             relative_path = str(xml_file.relative_to(self.unpacked_dir))
-            is_valid, new_file_errors = self.validate_file_against_xsd(
-                xml_file, verbose=False
+            is_valid, new_file_errors = self._file_check(
+                "validate_file_against_xsd", xml_file
             )
 
             if is_valid is None:
@@ -765,8 +940,7 @@ class BaseSchemaValidator:
     def _clean_ignorable_namespaces(self, xml_doc):
         """Remove attributes and elements not in allowed namespaces."""
         # Create a clean copy
-        xml_string = lxml.etree.tostring(xml_doc, encoding="unicode")
-        xml_copy = lxml.etree.fromstring(xml_string)
+        xml_copy = copy.deepcopy(xml_doc.getroot())
 
         # Remove attributes not in allowed namespaces
         for elem in xml_copy.iter():
@@ -830,78 +1004,80 @@ class BaseSchemaValidator:
             return None, None  # Skip file
 
         try:
-            # Load schema
-            with open(schema_path, "rb") as xsd_file:
-                parser = lxml.etree.XMLParser()
-                xsd_doc = lxml.etree.parse(
-                    xsd_file, parser=parser, base_url=str(schema_path)
-                )
-                schema = lxml.etree.XMLSchema(xsd_doc)
+            # Load XML (parts of the unpacked document share the tree cache;
+            # preprocessing works on copies)
+            if Path(base_path) == self.unpacked_dir:
+                xml_doc = self._parse(xml_file)
+            else:
+                with open(xml_file, "r") as f:
+                    xml_doc = lxml.etree.parse(f)
 
-            # Load and preprocess XML
-            with open(xml_file, "r") as f:
-                xml_doc = lxml.etree.parse(f)
+            return self._validate_tree_xsd(
+                xml_doc, schema_path, xml_file.relative_to(base_path)
+            )
 
-            xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
-            xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
+        except Exception as e:
+            return False, {str(e)}
 
-            # Clean ignorable namespaces if needed
-            relative_path = xml_file.relative_to(base_path)
-            if (
-                relative_path.parts
-                and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
-            ):
-                xml_doc = self._clean_ignorable_namespaces(xml_doc)
+    def _validate_tree_xsd(self, xml_doc, schema_path, relative_path):
+        """Validate a parsed XML tree against XSD schema. Returns (is_valid, errors_set)."""
+        # Load schema (compiled once per process)
+        schema = get_schema(schema_path)
 
-            # Validate
-            if schema.validate(xml_doc):
-                return True, set()
-            else:
-                errors = set()
-                for error in schema.error_log:
-                    # Store normalized error message (without line numbers for comparison)
-                    errors.add(error.message)
-                return False, errors
+        # Preprocess XML
+        xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
+        xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
 
-        except Exception as e:
-            return False, {str(e)}
+        # Clean ignorable namespaces if needed
+        if relative_path.parts and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS:
+            xml_doc = self._clean_ignorable_namespaces(xml_doc)
+
+        # Validate
+        if schema.validate(xml_doc):
+            return True, set()
+        else:
+            errors = set()
+            for error in schema.error_log:
+                # Store normalized error message (without line numbers for comparison)
+                errors.add(error.message)
+            return False, errors
 
     def _get_original_file_errors(self, xml_file):
         """Get XSD validation errors from a single file in the original document.
 
+        The part is read straight from the original archive and the result is
+        memoized per part for the lifetime of the validator.
+
         Args:
             xml_file: Path to the XML file in unpacked_dir to check
 
         Returns:
             set: Set of error messages from the original file
         """
-        import tempfile
-        import zipfile
-
         # Resolve both paths to handle symlinks (e.g., /var vs /private/var on macOS)
         xml_file = Path(xml_file).resolve()
         unpacked_dir = self.unpacked_dir.resolve()
         relative_path = xml_file.relative_to(unpacked_dir)
+        part_name = relative_path.as_posix()
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
+        if part_name in self._original_xsd_errors:
+            return self._original_xsd_errors[part_name]
 
-            # Extract original file
-            with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                zip_ref.extractall(temp_path)
-
-            # Find corresponding file in original
-            original_xml_file = temp_path / relative_path
+        errors = set()
+        package = open_original_package(self.original_file)
+        schema_path = self._get_schema_path(xml_file)
 
-            if not original_xml_file.exists():
-                # File didn't exist in original, so no original errors
-                return set()
+        # A part that didn't exist in the original has no original errors
+        if schema_path and package.has(part_name):
+            try:
+                _, errors = self._validate_tree_xsd(
+                    package.parse(part_name), schema_path, relative_path
+                )
+            except Exception as e:
+                errors = {str(e)}
 
-            # Validate the specific file in original
-            is_valid, errors = self._validate_single_file_xsd(
-                original_xml_file, temp_path
-            )
-            return errors if errors else set()
+        self._original_xsd_errors[part_name] = errors
+        return errors
 
     def _remove_template_tags_from_text_nodes(self, xml_doc):
         """Remove template tags from XML text nodes and collect warnings.
@@ -917,8 +1093,7 @@ class BaseSchemaValidator:
         template_pattern = re.compile(r"\{\{[^}]*\}\}")
 
         # Create a copy of the document to avoid modifying the original
-        xml_string = lxml.etree.tostring(xml_doc, encoding="unicode")
-        xml_copy = lxml.etree.fromstring(xml_string)
+        xml_copy = copy.deepcopy(xml_doc.getroot())
 
         def process_text_content(text, content_type):
             if not text:
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from . import cache
+from .cache import ValidationCache
+
+
+class ValidationCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+        self.unpacked = self.temp_dir / "unpacked"
+        self.slide = self.unpacked / "ppt/slides/slide1.xml"
+        self.rels = self.unpacked / "ppt/slides/_rels/slide1.xml.rels"
+        self.other = self.unpacked / "ppt/slides/slide2.xml"
+        for path in (self.slide, self.rels, self.other):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(f"<{path.stem}/>")
+
+        self.schemas = self.temp_dir / "schemas"
+        self.schemas.mkdir()
+        self.xsd = self.schemas / "pml.xsd"
+        self.xsd.write_text("<xs:schema/>")
+        self.original = self.temp_dir / "original.pptx"
+        self.original.write_bytes(b"PK")
+
+        self.validator = SimpleNamespace(
+            unpacked_dir=self.unpacked.resolve(),
+            original_file=self.original,
+            schemas_dir=self.schemas,
+        )
+        self.manifest = self.temp_dir / "manifest.json"
+
+    def fill(self):
+        """Cache results for both slides and write the manifest."""
+        validation_cache = ValidationCache(self.manifest, self.validator)
+        validation_cache.put("xsd", self.slide, ["error"], dependencies=[self.rels])
+        validation_cache.put("xsd", self.other, [])
+        validation_cache.save([self.slide, self.rels, self.other])
+
+    def lookup(self, path, dependencies=()):
+        return ValidationCache(self.manifest, self.validator).get("xsd", path, dependencies)
+
+    def touch(self, path, content):
+        """Rewrite a file with a different size and a later mtime."""
+        mtime = path.stat().st_mtime_ns
+        path.write_text(content)
+        os.utime(path, ns=(mtime + 10**9, mtime + 10**9))
+
+
+class TestValidationCache(ValidationCacheTestCase):
+    def test_unchanged_parts_hit(self):
+        """Test that results are reused by the next run while nothing changed"""
+        self.fill()
+        self.assertEqual(self.lookup(self.slide, [self.rels]), (True, ["error"]))
+        self.assertEqual(self.lookup(self.other), (True, []))
+
+    def test_only_changed_parts_miss(self):
+        """Test that editing a part, or a part its check reads, re-checks only that part"""
+        self.fill()
+        self.touch(self.rels, "<relationships/>")
+        self.assertEqual(self.lookup(self.slide, [self.rels]), (False, None))
+        self.assertEqual(self.lookup(self.other), (True, []))
+
+    def test_schema_change_discards_the_manifest(self):
+        """Test that results checked against other schemas aren't reused"""
+        self.fill()
+        self.touch(self.xsd, "<xs:schema><xs:element/></xs:schema>")
+        self.assertEqual(self.lookup(self.other), (False, None))
+
+        self.fill()
+        (self.schemas / "extra.xsd").write_text("<xs:schema/>")
+        self.assertEqual(self.lookup(self.other), (False, None))
+
+    def test_code_change_discards_the_manifest(self):
+        """Test that results from another version of the validation modules aren't reused"""
+        self.fill()
+        with mock.patch.object(cache, "_code_digest", return_value="changed"):
+            self.assertEqual(self.lookup(self.other), (False, None))
+
+    def test_code_digest_covers_the_validation_modules(self):
+        """Test that the code digest changes with any validation module"""
+        modules = self.temp_dir / "validation"
+        modules.mkdir()
+        for name in ("base.py", "pptx.py"):
+            shutil.copy(Path(cache.__file__).with_name(name), modules / name)
+        fake_file = str(modules / "cache.py")
+
+        with mock.patch.object(cache, "__file__", fake_file):
+            before = cache._code_digest()
+            (modules / "cache_test.py").write_text("# tests don't count")
+            self.assertEqual(cache._code_digest(), before)
+            (modules / "pptx.py").write_text("# changed check")
+            self.assertNotEqual(cache._code_digest(), before)
+
+    def test_original_change_discards_the_manifest(self):
+        """Test that results for another original file aren't reused"""
+        self.fill()
+        self.touch(self.original, "PK changed")
+        self.assertEqual(self.lookup(self.other), (False, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
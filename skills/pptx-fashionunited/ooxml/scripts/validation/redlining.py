@@ -2,22 +2,44 @@
 Validator for tracked changes in Word documents.
 """
 
-import subprocess
-import tempfile
-import zipfile
+import difflib
+import re
+from itertools import zip_longest
 from pathlib import Path
 
+import lxml.etree
+
+from .original import open_original_package
+
+WORD_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+P_TAG = f"{{{WORD_NAMESPACE}}}p"
+T_TAG = f"{{{WORD_NAMESPACE}}}t"
+INS_TAG = f"{{{WORD_NAMESPACE}}}ins"
+DEL_TAG = f"{{{WORD_NAMESPACE}}}del"
+DELTEXT_TAG = f"{{{WORD_NAMESPACE}}}delText"
+AUTHOR_ATTR = f"{{{WORD_NAMESPACE}}}author"
+
+# Author whose tracked changes are validated
+AUTHOR = "Claude"
+
+# Words, runs of whitespace and single punctuation marks, for the word diff
+_DIFF_TOKEN = re.compile(r"\w+|\s+|[^\w\s]")
+
 
 class RedliningValidator:
-    """Validator for tracked changes in Word documents."""
+    """Validator for tracked changes in Word documents.
+
+    Checks that removing Claude's tracked changes from the modified document
+    gives back the text of the original: insertions by Claude are dropped,
+    deletions by Claude are kept as plain text. Both documents are streamed
+    paragraph by paragraph, so memory stays flat on huge documents, and the
+    comparison stops at the first paragraph that differs.
+    """
 
     def __init__(self, unpacked_dir, original_docx, verbose=False):
         self.unpacked_dir = Path(unpacked_dir)
         self.original_docx = Path(original_docx)
         self.verbose = verbose
-        self.namespaces = {
-            "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
-        }
 
     def validate(self):
         """Main validation method that returns True if valid, False otherwise."""
@@ -27,92 +49,142 @@ class RedliningValidator:
             print(f"FAILED - Modified document.xml not found at {modified_file}")
             return False
 
-        # First, check if there are any tracked changes by Claude to validate
+        # Redlining validation is only needed if tracked changes by Claude have been used.
         try:
-            import xml.etree.ElementTree as ET
-
-            tree = ET.parse(modified_file)
-            root = tree.getroot()
-
-            # Check for w:del or w:ins tags authored by Claude
-            del_elements = root.findall(".//w:del", self.namespaces)
-            ins_elements = root.findall(".//w:ins", self.namespaces)
-
-            # Filter to only include changes by Claude
-            claude_del_elements = [
-                elem
-                for elem in del_elements
-                if elem.get(f"{{{self.namespaces['w']}}}author") == "Claude"
-            ]
-            claude_ins_elements = [
-                elem
-                for elem in ins_elements
-                if elem.get(f"{{{self.namespaces['w']}}}author") == "Claude"
-            ]
-
-            # Redlining validation is only needed if tracked changes by Claude have been used.
-            if not claude_del_elements and not claude_ins_elements:
+            if not self._has_tracked_changes(modified_file):
                 if self.verbose:
                     print("PASSED - No tracked changes by Claude found.")
                 return True
-
-        except Exception:
+        except lxml.etree.XMLSyntaxError:
             # If we can't parse the XML, continue with full validation
             pass
 
-        # Create temporary directory for unpacking original docx
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            # Unpack original docx
-            try:
-                with zipfile.ZipFile(self.original_docx, "r") as zip_ref:
-                    zip_ref.extractall(temp_path)
-            except Exception as e:
-                print(f"FAILED - Error unpacking original docx: {e}")
-                return False
-
-            original_file = temp_path / "word" / "document.xml"
-            if not original_file.exists():
+        # Stream the original document.xml straight from the original docx
+        try:
+            package = open_original_package(self.original_docx)
+            if not package.has("word/document.xml"):
                 print(
                     f"FAILED - Original document.xml not found in {self.original_docx}"
                 )
                 return False
+            original_stream = package.open("word/document.xml")
+        except Exception as e:
+            print(f"FAILED - Error reading original docx: {e}")
+            return False
 
-            # Parse both XML files using xml.etree.ElementTree for redlining validation
-            try:
-                import xml.etree.ElementTree as ET
-
-                modified_tree = ET.parse(modified_file)
-                modified_root = modified_tree.getroot()
-                original_tree = ET.parse(original_file)
-                original_root = original_tree.getroot()
-            except ET.ParseError as e:
-                print(f"FAILED - Error parsing XML files: {e}")
-                return False
-
-            # Remove Claude's tracked changes from both documents
-            self._remove_claude_tracked_changes(original_root)
-            self._remove_claude_tracked_changes(modified_root)
-
-            # Extract and compare text content
-            modified_text = self._extract_text_content(modified_root)
-            original_text = self._extract_text_content(original_root)
-
-            if modified_text != original_text:
-                # Show detailed character-level differences for each paragraph
-                error_message = self._generate_detailed_diff(
-                    original_text, modified_text
+        try:
+            with original_stream, open(modified_file, "rb") as modified_stream:
+                difference = self._first_difference(
+                    self._paragraph_texts(original_stream),
+                    self._paragraph_texts(modified_stream),
                 )
-                print(error_message)
-                return False
+        except lxml.etree.XMLSyntaxError as e:
+            print(f"FAILED - Error parsing XML files: {e}")
+            return False
 
-            if self.verbose:
-                print("PASSED - All changes by Claude are properly tracked")
-            return True
+        if difference is not None:
+            print(self._generate_detailed_diff(*difference))
+            return False
 
-    def _generate_detailed_diff(self, original_text, modified_text):
-        """Generate detailed word-level differences using git word diff."""
+        if self.verbose:
+            print("PASSED - All changes by Claude are properly tracked")
+        return True
+
+    def _is_tracked_change(self, elem):
+        return elem.tag in (INS_TAG, DEL_TAG) and elem.get(AUTHOR_ATTR) == AUTHOR
+
+    def _has_tracked_changes(self, xml_file):
+        """Return True as soon as a w:ins or w:del by Claude is found."""
+        context = lxml.etree.iterparse(
+            str(xml_file),
+            events=("start", "end"),
+            tag=(INS_TAG, DEL_TAG, P_TAG),
+            resolve_entities=False,
+            no_network=True,
+            huge_tree=True,
+        )
+        for event, elem in context:
+            if event == "start":
+                if self._is_tracked_change(elem):
+                    return True
+            elif elem.tag == P_TAG:
+                _discard(elem)
+        return False
+
+    def _paragraph_texts(self, source):
+        """Yield the text of each non-empty paragraph, in document order.
+
+        Text inside Claude's insertions is left out and text deleted by Claude
+        counts as if it were never deleted, which gives the document as it was
+        before Claude's changes. A paragraph's text includes that of any
+        paragraph nested in it (e.g. in a text box), which is also yielded on
+        its own right after it. Empty paragraphs are skipped to avoid false
+        positives when tracked insertions add only structural elements.
+        """
+        context = lxml.etree.iterparse(
+            source,
+            events=("start", "end"),
+            tag=(P_TAG, T_TAG, DELTEXT_TAG, INS_TAG, DEL_TAG),
+            resolve_entities=False,
+            no_network=True,
+            huge_tree=True,
+        )
+        inserted_depth = 0  # Open w:ins by Claude
+        deleted_depth = 0  # Open w:del by Claude
+        open_paragraphs = []  # Text parts of open paragraphs, None if inserted
+        finished = []  # (start order, text) of paragraphs nested in an open one
+        started = 0
+
+        for event, elem in context:
+            tag = elem.tag
+            if event == "start":
+                if tag == P_TAG:
+                    open_paragraphs.append(None if inserted_depth else (started, []))
+                    started += 1
+                elif self._is_tracked_change(elem):
+                    if tag == INS_TAG:
+                        inserted_depth += 1
+                    else:
+                        deleted_depth += 1
+                continue
+
+            if tag == T_TAG or (tag == DELTEXT_TAG and deleted_depth):
+                if elem.text and not inserted_depth:
+                    for paragraph in open_paragraphs:
+                        if paragraph is not None:
+                            paragraph[1].append(elem.text)
+            elif tag == P_TAG:
+                paragraph = open_paragraphs.pop()
+                if paragraph is not None:
+                    finished.append((paragraph[0], "".join(paragraph[1])))
+            elif self._is_tracked_change(elem):
+                if tag == INS_TAG:
+                    inserted_depth -= 1
+                else:
+                    deleted_depth -= 1
+
+            if not open_paragraphs:
+                # Paragraphs nested in another end first; yield by start order
+                for _, text in sorted(finished):
+                    if text:
+                        yield text
+                finished.clear()
+
+                _discard(elem)
+
+    def _first_difference(self, original_paragraphs, modified_paragraphs):
+        """Return (index, original, modified) of the first differing paragraph.
+
+        A paragraph missing from one side is None. Returns None if all match.
+        """
+        pairs = zip_longest(original_paragraphs, modified_paragraphs)
+        for index, (original, modified) in enumerate(pairs):
+            if original != modified:
+                return index, original, modified
+        return None
+
+    def _generate_detailed_diff(self, index, original_text, modified_text):
+        """Describe the first differing paragraph, with a word-level diff."""
         error_parts = [
             "FAILED - Document text doesn't match after removing Claude's tracked changes",
             "",
@@ -125,154 +197,43 @@ class RedliningValidator:
             "  - To reject another's INSERTION: Nest <w:del> inside their <w:ins>",
             "  - To restore another's DELETION: Add new <w:ins> AFTER their <w:del>",
             "",
+            f"First difference, in non-empty paragraph {index + 1}:",
+            "============",
         ]
-
-        # Show git word diff
-        git_diff = self._get_git_word_diff(original_text, modified_text)
-        if git_diff:
-            error_parts.extend(["Differences:", "============", git_diff])
+        if original_text is None:
+            error_parts.append(f"Paragraph added: {{+{modified_text}+}}")
+        elif modified_text is None:
+            error_parts.append(f"Paragraph removed: [-{original_text}-]")
         else:
-            error_parts.append("Unable to generate word diff (git not available)")
-
+            error_parts.append(self._word_diff(original_text, modified_text))
         return "\n".join(error_parts)
 
-    def _get_git_word_diff(self, original_text, modified_text):
-        """Generate word diff using git with character-level precision."""
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-
-                # Create two files
-                original_file = temp_path / "original.txt"
-                modified_file = temp_path / "modified.txt"
-
-                original_file.write_text(original_text, encoding="utf-8")
-                modified_file.write_text(modified_text, encoding="utf-8")
-
-                # Try character-level diff first for precise differences
-                result = subprocess.run(
-                    [
-                        "git",
-                        "diff",
-                        "--word-diff=plain",
-                        "--word-diff-regex=.",  # Character-by-character diff
-                        "-U0",  # Zero lines of context - show only changed lines
-                        "--no-index",
-                        str(original_file),
-                        str(modified_file),
-                    ],
-                    capture_output=True,
-                    text=True,
-                )
-
-                if result.stdout.strip():
-                    # Clean up the output - remove git diff header lines
-                    lines = result.stdout.split("\n")
-                    # Skip the header lines (diff --git, index, +++, ---, @@)
-                    content_lines = []
-                    in_content = False
-                    for line in lines:
-                        if line.startswith("@@"):
-                            in_content = True
-                            continue
-                        if in_content and line.strip():
-                            content_lines.append(line)
-
-                    if content_lines:
-                        return "\n".join(content_lines)
-
-                # Fallback to word-level diff if character-level is too verbose
-                result = subprocess.run(
-                    [
-                        "git",
-                        "diff",
-                        "--word-diff=plain",
-                        "-U0",  # Zero lines of context
-                        "--no-index",
-                        str(original_file),
-                        str(modified_file),
-                    ],
-                    capture_output=True,
-                    text=True,
-                )
-
-                if result.stdout.strip():
-                    lines = result.stdout.split("\n")
-                    content_lines = []
-                    in_content = False
-                    for line in lines:
-                        if line.startswith("@@"):
-                            in_content = True
-                            continue
-                        if in_content and line.strip():
-                            content_lines.append(line)
-                    return "\n".join(content_lines)
-
-        except (subprocess.CalledProcessError, FileNotFoundError, Exception):
-            # Git not available or other error, return None to use fallback
-            pass
-
-        return None
-
-    def _remove_claude_tracked_changes(self, root):
-        """Remove tracked changes authored by Claude from the XML root."""
-        ins_tag = f"{{{self.namespaces['w']}}}ins"
-        del_tag = f"{{{self.namespaces['w']}}}del"
-        author_attr = f"{{{self.namespaces['w']}}}author"
-
-        # Remove w:ins elements
-        for parent in root.iter():
-            to_remove = []
-            for child in parent:
-                if child.tag == ins_tag and child.get(author_attr) == "Claude":
-                    to_remove.append(child)
-            for elem in to_remove:
-                parent.remove(elem)
-
-        # Unwrap content in w:del elements where author is "Claude"
-        deltext_tag = f"{{{self.namespaces['w']}}}delText"
-        t_tag = f"{{{self.namespaces['w']}}}t"
-
-        for parent in root.iter():
-            to_process = []
-            for child in parent:
-                if child.tag == del_tag and child.get(author_attr) == "Claude":
-                    to_process.append((child, list(parent).index(child)))
-
-            # Process in reverse order to maintain indices
-            for del_elem, del_index in reversed(to_process):
-                # Convert w:delText to w:t before moving
-                for elem in del_elem.iter():
-                    if elem.tag == deltext_tag:
-                        elem.tag = t_tag
-
-                # Move all children of w:del to its parent before removing w:del
-                for child in reversed(list(del_elem)):
-                    parent.insert(del_index, child)
-                parent.remove(del_elem)
-
-    def _extract_text_content(self, root):
-        """Extract text content from Word XML, preserving paragraph structure.
-
-        Empty paragraphs are skipped to avoid false positives when tracked
-        insertions add only structural elements without text content.
-        """
-        p_tag = f"{{{self.namespaces['w']}}}p"
-        t_tag = f"{{{self.namespaces['w']}}}t"
-
-        paragraphs = []
-        for p_elem in root.findall(f".//{p_tag}"):
-            # Get all text elements within this paragraph
-            text_parts = []
-            for t_elem in p_elem.findall(f".//{t_tag}"):
-                if t_elem.text:
-                    text_parts.append(t_elem.text)
-            paragraph_text = "".join(text_parts)
-            # Skip empty paragraphs - they don't affect content validation
-            if paragraph_text:
-                paragraphs.append(paragraph_text)
-
-        return "\n".join(paragraphs)
+    def _word_diff(self, original_text, modified_text):
+        """Return a word diff like git's plain format: [-removed-]{+added+}."""
+        original_tokens = _DIFF_TOKEN.findall(original_text)
+        modified_tokens = _DIFF_TOKEN.findall(modified_text)
+        matcher = difflib.SequenceMatcher(
+            None, original_tokens, modified_tokens, autojunk=False
+        )
+        parts = []
+        for op, i1, i2, j1, j2 in matcher.get_opcodes():
+            if op == "equal":
+                parts.append("".join(original_tokens[i1:i2]))
+                continue
+            if i2 > i1:
+                parts.append(f"[-{''.join(original_tokens[i1:i2])}-]")
+            if j2 > j1:
+                parts.append(f"{{+{''.join(modified_tokens[j1:j2])}+}}")
+        return "".join(parts)
+
+
+def _discard(elem):
+    """Free an element that iterparse has finished, and its finished siblings."""
+    elem.clear(keep_tail=True)
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,157 @@
+import contextlib
+import io
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from .redlining import WORD_NAMESPACE, RedliningValidator
+
+
+def document_xml(*paragraphs):
+    """Return a document.xml whose body holds the given paragraph contents."""
+    body = "".join(f"<w:p>{content}</w:p>" for content in paragraphs)
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>'
+        f'<w:document xmlns:w="{WORD_NAMESPACE}"><w:body>{body}</w:body></w:document>'
+    )
+
+
+def run(text):
+    return f"<w:r><w:t>{text}</w:t></w:r>"
+
+
+def tracked(tag, author, content):
+    return f'<w:{tag} w:id="1" w:author="{author}" w:date="2024-01-01T00:00:00Z">{content}</w:{tag}>'
+
+
+def deleted_run(text):
+    return f"<w:r><w:delText>{text}</w:delText></w:r>"
+
+
+ORIGINAL = document_xml(
+    run("The quick brown fox"),
+    "",
+    run("jumps over") + run(" the lazy dog"),
+)
+
+
+class TestRedliningValidator(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.original = self.temp_dir / "original.docx"
+        self.write_original(ORIGINAL)
+        self.unpacked = self.temp_dir / "unpacked"
+        (self.unpacked / "word").mkdir(parents=True)
+
+    def write_original(self, content):
+        with zipfile.ZipFile(self.original, "w") as zf:
+            zf.writestr("word/document.xml", content)
+
+    def validate(self, modified):
+        """Return (result, report) of validating a modified document.xml."""
+        (self.unpacked / "word/document.xml").write_text(modified)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            result = RedliningValidator(self.unpacked, self.original, verbose=True).validate()
+        return result, output.getvalue()
+
+    def test_tracked_changes_pass(self):
+        """Test that text deleted or inserted by Claude with tracked changes is accepted"""
+        result, report = self.validate(
+            document_xml(
+                run("The quick ")
+                + tracked("del", "Claude", deleted_run("brown"))
+                + tracked("ins", "Claude", run("red"))
+                + run(" fox"),
+                tracked("ins", "Claude", run("A whole new paragraph")),
+                run("jumps over") + run(" the lazy dog"),
+            )
+        )
+        self.assertTrue(result, report)
+        self.assertIn("PASSED - All changes by Claude are properly tracked", report)
+
+    def test_untracked_edit_fails_with_word_diff(self):
+        """Test that an untracked edit is reported with a word diff of its paragraph"""
+        result, report = self.validate(
+            document_xml(
+                run("The quick brown fox") + tracked("ins", "Claude", run("!")),
+                run("jumps over") + run(" the sleepy dog"),
+            )
+        )
+        self.assertFalse(result)
+        self.assertIn("First difference, in non-empty paragraph 2:", report)
+        self.assertIn("jumps over the [-lazy-]{+sleepy+} dog", report)
+
+    def test_other_authors_changes_are_text(self):
+        """Test that tracked changes by other authors are compared as plain text"""
+        self.write_original(
+            document_xml(tracked("ins", "Someone", run("Their text")) + run(" stays"))
+        )
+        # Rejecting another author's insertion means nesting a deletion inside it
+        result, report = self.validate(
+            document_xml(
+                tracked("ins", "Someone", tracked("del", "Claude", deleted_run("Their text")))
+                + run(" stays")
+            )
+        )
+        self.assertTrue(result, report)
+
+        # Editing inside it without tracked changes is not
+        result, report = self.validate(
+            document_xml(
+                tracked("ins", "Someone", run("Their own text"))
+                + tracked("ins", "Claude", run(" stays"))
+            )
+        )
+        self.assertFalse(result)
+        self.assertIn("Their {+own +}text[- stays-]", report)
+
+    def test_added_and_removed_paragraphs(self):
+        """Test that paragraphs added or removed without tracked changes are reported"""
+        extra = run("The quick brown fox"), run("jumps over the lazy dog"), run("Extra")
+        result, report = self.validate(
+            document_xml(*extra, tracked("ins", "Claude", run("tracked")))
+        )
+        self.assertFalse(result)
+        self.assertIn("Paragraph added: {+Extra+}", report)
+
+        result, report = self.validate(
+            document_xml(run("The quick brown fox"), tracked("ins", "Claude", run("tracked")))
+        )
+        self.assertFalse(result)
+        self.assertIn("Paragraph removed: [-jumps over the lazy dog-]", report)
+
+    def test_nested_paragraphs(self):
+        """Test that paragraphs nested in another (e.g. in a text box) are compared in order"""
+        def text_box(*paragraphs):
+            content = "".join(f"<w:p>{paragraph}</w:p>" for paragraph in paragraphs)
+            return f"<w:r><w:pict><w:txbxContent>{content}</w:txbxContent></w:pict></w:r>"
+
+        self.write_original(
+            document_xml(run("Outside") + text_box(run("Inside")), run("After"))
+        )
+        added = tracked("ins", "Claude", run("New inside"))
+        result, report = self.validate(
+            document_xml(run("Outside") + text_box(run("Inside"), added), run("After"))
+        )
+        self.assertTrue(result, report)
+
+        validator = RedliningValidator(self.unpacked, self.original)
+        with open(self.unpacked / "word/document.xml", "rb") as stream:
+            self.assertEqual(
+                list(validator._paragraph_texts(stream)), ["OutsideInside", "Inside", "After"]
+            )
+
+    def test_documents_without_claude_changes_are_not_compared(self):
+        """Test that the comparison is skipped when Claude made no tracked changes"""
+        self.write_original(b"not xml")
+        result, report = self.validate(document_xml(tracked("ins", "Someone", run("Text"))))
+        self.assertTrue(result)
+        self.assertIn("No tracked changes by Claude found", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import lxml.etree
+
+from . import schema_cache
+from .schema_cache import ensure_schema_bundle, get_schema, load_schema_bundle
+
+MAIN_XSD = """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    xmlns:t="urn:test" targetNamespace="urn:test" elementFormDefault="qualified">
+  <xs:include schemaLocation="common/types.xsd"/>
+  <xs:element name="root" type="t:RootType"/>
+</xs:schema>
+"""
+
+TYPES_XSD = """<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    targetNamespace="urn:test" elementFormDefault="qualified">
+  <xs:complexType name="RootType">
+    <xs:sequence><xs:element name="value" type="xs:int"/></xs:sequence>
+  </xs:complexType>
+</xs:schema>
+"""
+
+
+class SchemaCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.schemas = self.temp_dir / "schemas"
+        (self.schemas / "common").mkdir(parents=True)
+        self.main_xsd = self.schemas / "main.xsd"
+        self.main_xsd.write_text(MAIN_XSD)
+        (self.schemas / "common/types.xsd").write_text(TYPES_XSD)
+        self.bundle = self.temp_dir / "bundle.zip"
+
+        # Each test starts without compiled or bundled schemas
+        for cache in (schema_cache._compiled_schemas, schema_cache._bundled_sources):
+            patch = mock.patch.dict(cache, clear=True)
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def assertSchemaWorks(self, schema):
+        valid = lxml.etree.fromstring(b'<root xmlns="urn:test"><value>1</value></root>')
+        invalid = lxml.etree.fromstring(b'<root xmlns="urn:test"><value>x</value></root>')
+        self.assertTrue(schema.validate(valid))
+        self.assertFalse(schema.validate(invalid))
+
+
+class TestCompiledSchemas(SchemaCacheTestCase):
+    def test_compiled_once_per_schema(self):
+        """Test that every path to the same schema gets the same compiled instance"""
+        schema = get_schema(self.main_xsd)
+        self.assertSchemaWorks(schema)
+        self.assertIs(get_schema(self.schemas / "common" / ".." / "main.xsd"), schema)
+        self.assertIs(get_schema(str(self.main_xsd)), schema)
+
+        with mock.patch.object(lxml.etree, "XMLSchema") as compile_schema:
+            get_schema(self.main_xsd)
+        compile_schema.assert_not_called()
+
+
+class TestSchemaBundle(SchemaCacheTestCase):
+    def test_bundle_serves_schemas_and_imports(self):
+        """Test that a loaded bundle compiles schemas without their files on disk"""
+        ensure_schema_bundle(self.bundle, self.schemas)
+        shutil.rmtree(self.schemas)
+        self.assertSchemaWorks(get_schema(self.main_xsd))
+
+    def test_stale_bundle_is_rebuilt(self):
+        """Test that a bundle is rebuilt once a schema file changes"""
+        ensure_schema_bundle(self.bundle, self.schemas)
+        self.assertTrue(load_schema_bundle(self.bundle, self.schemas))
+
+        types_xsd = self.schemas / "common/types.xsd"
+        types_xsd.write_text(TYPES_XSD.replace('type="xs:int"', 'type="xs:string"'))
+        mtime = types_xsd.stat().st_mtime_ns + 10**9
+        os.utime(types_xsd, ns=(mtime, mtime))
+        self.assertFalse(load_schema_bundle(self.bundle, self.schemas))
+
+        ensure_schema_bundle(self.bundle, self.schemas)
+        self.assertTrue(load_schema_bundle(self.bundle, self.schemas))
+        shutil.rmtree(self.schemas)
+        text_value = lxml.etree.fromstring(b'<root xmlns="urn:test"><value>x</value></root>')
+        self.assertTrue(get_schema(self.main_xsd).validate(text_value))
+
+    def test_missing_or_broken_bundle(self):
+        """Test that an unusable bundle is reported as not loaded"""
+        self.assertFalse(load_schema_bundle(self.bundle, self.schemas))
+        self.bundle.write_bytes(b"not a zip")
+        self.assertFalse(load_schema_bundle(self.bundle, self.schemas))
+
+
+if __name__ == "__main__":
+    unittest.main()
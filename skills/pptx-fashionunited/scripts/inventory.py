@@ -24,16 +24,21 @@ Usage:
 
 import argparse
 import json
+import os
 import platform
 import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Union
 
 from PIL import Image, ImageDraw, ImageFont
 from pptx import Presentation
+from pptx.enum.dml import MSO_FILL
 from pptx.enum.text import PP_ALIGN
 from pptx.shapes.base import BaseShape
+from pptx.text.text import Font
+from rect_overlaps import find_overlaps
 
 # Type aliases for cleaner signatures
 JsonValue = Union[str, int, float, bool, None]
@@ -60,6 +65,9 @@ Examples:
   python inventory.py presentation.pptx inventory.json --issues-only
     Extracts only text shapes that have overflow or overlap issues
 
+  python inventory.py presentation.pptx inventory.json --font-cache fonts.json
+    Reuses the index of installed fonts across runs
+
 The output JSON includes:
   - All text content organized by slide and shape
   - Correct absolute positions for shapes in groups
@@ -76,6 +84,12 @@ The output JSON includes:
         action="store_true",
         help="Include only text shapes that have overflow or overlap issues",
     )
+    parser.add_argument(
+        "--font-cache",
+        metavar="FILE",
+        help="Save the index of installed fonts to FILE and reuse it while the "
+        "font directories are unchanged",
+    )
 
     args = parser.parse_args()
 
@@ -94,6 +108,7 @@ The output JSON includes:
             print(
                 "Filtering to include only text shapes with issues (overflow/overlap)"
             )
+        get_font_index(args.font_cache)
         inventory = extract_text_inventory(input_path, issues_only=args.issues_only)
 
         output_path = Path(args.output)
@@ -158,69 +173,70 @@ class ParagraphData:
         self.theme_color: Optional[str] = None
         self.line_spacing: Optional[float] = None
 
+        # Read properties from the XML elements: python-pptx's accessors for
+        # alignment, level and font add missing elements, and font.color
+        # replaces a run's fill, so the inventory never modifies the slides
+        pPr = paragraph._p.pPr
+
         # Check for bullet formatting
-        if (
-            hasattr(paragraph, "_p")
-            and paragraph._p is not None
-            and paragraph._p.pPr is not None
-        ):
-            pPr = paragraph._p.pPr
+        if pPr is not None:
             ns = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
             if (
                 pPr.find(f"{ns}buChar") is not None
                 or pPr.find(f"{ns}buAutoNum") is not None
             ):
                 self.bullet = True
-                if hasattr(paragraph, "level"):
-                    self.level = paragraph.level
+                self.level = pPr.lvl
 
         # Add alignment if not LEFT (default)
-        if hasattr(paragraph, "alignment") and paragraph.alignment is not None:
+        alignment = pPr.algn if pPr is not None else None
+        if alignment is not None:
             alignment_map = {
                 PP_ALIGN.CENTER: "CENTER",
                 PP_ALIGN.RIGHT: "RIGHT",
                 PP_ALIGN.JUSTIFY: "JUSTIFY",
             }
-            if paragraph.alignment in alignment_map:
-                self.alignment = alignment_map[paragraph.alignment]
+            if alignment in alignment_map:
+                self.alignment = alignment_map[alignment]
 
         # Add spacing properties if set
-        if hasattr(paragraph, "space_before") and paragraph.space_before:
+        if paragraph.space_before:
             self.space_before = paragraph.space_before.pt
-        if hasattr(paragraph, "space_after") and paragraph.space_after:
+        if paragraph.space_after:
             self.space_after = paragraph.space_after.pt
 
         # Extract font properties from first run
-        if paragraph.runs:
-            first_run = paragraph.runs[0]
-            if hasattr(first_run, "font"):
-                font = first_run.font
-                if font.name:
-                    self.font_name = font.name
-                if font.size:
-                    self.font_size = font.size.pt
-                if font.bold is not None:
-                    self.bold = font.bold
-                if font.italic is not None:
-                    self.italic = font.italic
-                if font.underline is not None:
-                    self.underline = font.underline
-
-                # Handle color - both RGB and theme colors
+        rPr = paragraph._p.r_lst[0].rPr if paragraph._p.r_lst else None
+        if rPr is not None:
+            font = Font(rPr)
+            if font.name:
+                self.font_name = font.name
+            if font.size:
+                self.font_size = font.size.pt
+            if font.bold is not None:
+                self.bold = font.bold
+            if font.italic is not None:
+                self.italic = font.italic
+            if font.underline is not None:
+                self.underline = font.underline
+
+            # Handle color - both RGB and theme colors
+            if font.fill.type == MSO_FILL.SOLID:
+                color = font.fill.fore_color
                 try:
                     # Try RGB color first
-                    if font.color.rgb:
-                        self.color = str(font.color.rgb)
+                    if color.rgb:
+                        self.color = str(color.rgb)
                 except (AttributeError, TypeError):
                     # Fall back to theme color
                     try:
-                        if font.color.theme_color:
-                            self.theme_color = font.color.theme_color.name
+                        if color.theme_color:
+                            self.theme_color = color.theme_color.name
                     except (AttributeError, TypeError):
                         pass
 
         # Add line spacing if set
-        if hasattr(paragraph, "line_spacing") and paragraph.line_spacing is not None:
+        if paragraph.line_spacing is not None:
             if hasattr(paragraph.line_spacing, "pt"):
                 self.line_spacing = round(paragraph.line_spacing.pt, 2)
             else:
@@ -263,6 +279,317 @@ class ParagraphData:
         return result
 
 
+# Font directories and font file extensions, by platform
+if platform.system() == "Darwin":  # macOS
+    FONT_DIRS = ["/System/Library/Fonts/", "/Library/Fonts/", "~/Library/Fonts/"]
+    FONT_EXTENSIONS = (".ttf", ".otf", ".ttc", ".dfont")
+else:  # Linux
+    FONT_DIRS = ["/usr/share/fonts/", "/usr/local/share/fonts/", "~/.fonts/"]
+    FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+
+# Styles preferred when a family has several faces, best first
+REGULAR_STYLES = ("regular", "book", "normal", "roman", "medium")
+
+
+def normalize_font_name(name: str) -> str:
+    """Normalize a font name for matching, ignoring case, spaces, '-' and '_'."""
+    return name.lower().replace(" ", "").replace("-", "").replace("_", "")
+
+
+class FontIndex:
+    """Maps font names to font files, built once by scanning the font directories.
+
+    Each font file is indexed by its family and style names, read from the font
+    itself, and by its file name. Lookups match names the way fontconfig does,
+    ignoring case, spaces, hyphens and underscores:
+
+    1. a font family with that name, preferring its regular face, or a family
+       and style ('Lato Light')
+    2. a font file with that name ('Arial' -> arial.ttf)
+    3. a font file whose name contains it ('Arial' -> ArialMT-Regular.otf)
+
+    The index can be saved to a JSON cache file, which is reused for as long as
+    the modification times of the font directories don't change.
+    """
+
+    def __init__(self, font_dirs: List[str], fonts: List[List[Any]], dir_mtimes):
+        """
+        Args:
+            font_dirs: Directories the index was built from
+            fonts: [path, family, style] for each font file, family and style
+                None if the font could not be read
+            dir_mtimes: Modification time in ns of each scanned directory, None
+                for font directories that don't exist
+        """
+        self.font_dirs = font_dirs
+        self.fonts = fonts
+        self.dir_mtimes = dir_mtimes
+        self._matches: Dict[str, Optional[str]] = {}
+
+        self._families: Dict[str, List[Tuple[int, int, str]]] = {}
+        self._stems: List[Tuple[str, str]] = []
+        for order, (path, family, style) in enumerate(fonts):
+            if family:
+                style = normalize_font_name(style or "regular")
+                rank = (
+                    REGULAR_STYLES.index(style)
+                    if style in REGULAR_STYLES
+                    else len(REGULAR_STYLES)
+                )
+                family = normalize_font_name(family)
+                self._families.setdefault(family, []).append((rank, order, path))
+                # Faces can also be asked for by full name, e.g. 'Arial Narrow Bold'
+                self._families.setdefault(family + style, []).append((0, order, path))
+            self._stems.append((normalize_font_name(Path(path).stem), path))
+
+    @classmethod
+    def build(cls, font_dirs: List[str], known=None) -> "FontIndex":
+        """Scan font_dirs recursively and read the names of each font file.
+
+        Args:
+            font_dirs: Font directories to scan
+            known: Optional {path: (family, style)} of fonts already read
+        """
+        known = known or {}
+        fonts = []
+        dir_mtimes = {}
+        for font_dir in font_dirs:
+            root = str(Path(font_dir).expanduser())
+            dir_mtimes[root] = _mtime(root)
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames.sort()
+                dir_mtimes[dirpath] = _mtime(dirpath)
+                for filename in sorted(filenames):
+                    if not filename.lower().endswith(FONT_EXTENSIONS):
+                        continue
+                    path = os.path.join(dirpath, filename)
+                    if path in known:
+                        family, style = known[path]
+                    else:
+                        family, style = _read_font_names(path)
+                    fonts.append([path, family, style])
+        return cls(list(font_dirs), fonts, dir_mtimes)
+
+    @classmethod
+    def load(cls, font_dirs: List[str], cache_file=None) -> "FontIndex":
+        """Load the index from cache_file if it's current, or build it and save it.
+
+        Args:
+            font_dirs: Font directories to index
+            cache_file: Optional JSON file to persist the index in
+        """
+        cached = None
+        if cache_file:
+            try:
+                data = json.loads(Path(cache_file).read_text(encoding="utf-8"))
+                cached = cls(data["font_dirs"], data["fonts"], data["dir_mtimes"])
+            except (OSError, ValueError, KeyError, TypeError):
+                cached = None
+        if cached and cached.font_dirs == list(font_dirs) and cached.is_current():
+            return cached
+
+        # Font files that are still there don't need to be read again
+        known = {}
+        if cached:
+            known = {path: (family, style) for path, family, style in cached.fonts}
+        index = cls.build(font_dirs, known)
+        if cache_file:
+            try:
+                index.save(cache_file)
+            except OSError as e:
+                print(f"Warning: Could not save font cache to {cache_file}: {e}")
+        return index
+
+    def save(self, cache_file) -> None:
+        """Save the index to a JSON cache file."""
+        data = {
+            "font_dirs": self.font_dirs,
+            "dir_mtimes": self.dir_mtimes,
+            "fonts": self.fonts,
+        }
+        Path(cache_file).write_text(json.dumps(data, indent=1), encoding="utf-8")
+
+    def is_current(self) -> bool:
+        """Check that no font directory has changed since the index was built."""
+        return all(
+            _mtime(directory) == mtime for directory, mtime in self.dir_mtimes.items()
+        )
+
+    def find(self, font_name: str) -> Optional[str]:
+        """Get the font file path for a font name, or None if not found."""
+        key = normalize_font_name(font_name)
+        if key not in self._matches:
+            self._matches[key] = self._find(key)
+        return self._matches[key]
+
+    def _find(self, key: str) -> Optional[str]:
+        if not key:
+            return None
+        faces = self._families.get(key)
+        if faces:
+            return min(faces)[2]
+        for stem, path in self._stems:
+            if stem == key:
+                return path
+        for stem, path in self._stems:
+            if key in stem:
+                return path
+        return None
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _read_font_names(path: str) -> Tuple[Optional[str], Optional[str]]:
+    """Read the (family, style) names of a font file, (None, None) if unreadable."""
+    try:
+        return ImageFont.truetype(path, size=12).getname()
+    except Exception:
+        return None, None
+
+
+_font_index: Optional[FontIndex] = None
+
+
+def get_font_index(cache_file=None) -> FontIndex:
+    """Get the font index of this process, loading or building it on first use.
+
+    Args:
+        cache_file: Optional JSON file to persist the index in; only used by
+            the call that loads the index
+    """
+    global _font_index
+    if _font_index is None:
+        _font_index = FontIndex.load(FONT_DIRS, cache_file)
+    return _font_index
+
+
+@lru_cache(maxsize=128)
+def load_font(font_path: Optional[str], size: int):
+    """Load a font at a size, falling back to PIL's default font.
+
+    Loaded fonts are cached, as many paragraphs share a font and size.
+    """
+    if font_path:
+        try:
+            return ImageFont.truetype(font_path, size=size)
+        except Exception:
+            pass
+    return ImageFont.load_default()
+
+
+class TextLayout:
+    """Wraps text into lines no wider than a maximum width, as measured by PIL.
+
+    Gives the same lines as adding words to a line one at a time and measuring
+    the whole line each time, but measures each word only once per font and
+    size. A line's width is then a difference of prefix sums over its words and
+    spaces, plus the kerning between the edge characters of words and spaces,
+    which is exact with PIL's basic layout. With the Raqm layout (complex text
+    shaping) widths don't add up like this, so each candidate line is measured.
+    """
+
+    def __init__(self):
+        self._draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+        # (font_path, size) -> {text: width in pixels}
+        self._widths: Dict[Tuple[Optional[str], int], Dict[str, float]] = {}
+
+    def measure(self, text: str, font_path: Optional[str], size: int) -> float:
+        """Get the width of text in pixels, measuring it only the first time."""
+        widths = self._widths.setdefault((font_path, size), {})
+        width = widths.get(text)
+        if width is None:
+            font = load_font(font_path, size)
+            width = widths[text] = self._draw.textlength(text, font=font)
+        return width
+
+    def wrap(
+        self, line: str, max_width_px: float, font_path: Optional[str], size: int
+    ) -> List[str]:
+        """Wrap a single line of text to fit within max_width_px."""
+        if not line:
+            return [""]
+
+        words = line.split(" ")
+        font = load_font(font_path, size)
+        if (
+            isinstance(font, ImageFont.FreeTypeFont)
+            and font.layout_engine != ImageFont.Layout.BASIC
+        ):
+            span_width = lambda start, stop: self.measure(
+                " ".join(words[start:stop]), font_path, size
+            )
+        else:
+            span_width = self._span_widths(words, font_path, size)
+
+        if span_width(0, len(words)) <= max_width_px:
+            return [line]
+
+        # Start a new line at the first word that doesn't fit. As with a
+        # line built up word by word, empty words (from repeated spaces) at
+        # the start of a line are dropped.
+        wrapped = []
+        start = None  # First word of the current line, None while it's empty
+        for index, word in enumerate(words):
+            if start is None:
+                if word:
+                    start = index
+            elif span_width(start, index + 1) > max_width_px:
+                wrapped.append(" ".join(words[start:index]))
+                start = index if word else None
+
+        if start is not None:
+            wrapped.append(" ".join(words[start:]))
+
+        return wrapped
+
+    def _span_widths(self, words: List[str], font_path: Optional[str], size: int):
+        """Get a function giving the width of " ".join(words[start:stop]).
+
+        The joined text is split into tokens, each a word or a space, and
+        their widths are summed up front, so each call is a subtraction.
+        """
+        measure = lambda text: self.measure(text, font_path, size)
+        prefix = [0.0]  # Width of the first m tokens
+        kerning = []  # Kerning between token m - 1 and token m
+        starts = []  # Index of the first token of each word
+        stops = []  # Index after the last token of each word
+        previous = ""
+
+        def add(token):
+            nonlocal previous
+            kern = 0.0
+            if previous:
+                pair = previous[-1] + token[0]
+                kern = measure(pair) - measure(pair[0]) - measure(pair[1])
+            kerning.append(kern)
+            prefix.append(prefix[-1] + kern + measure(token))
+            previous = token
+
+        for index, word in enumerate(words):
+            if index:
+                add(" ")
+            starts.append(len(kerning))
+            if word:
+                add(word)
+            stops.append(len(kerning))
+
+        def span_width(start, stop):
+            first, last = starts[start], stops[stop - 1]
+            if last <= first:
+                return 0.0
+            return prefix[last] - prefix[first] - kerning[first]
+
+        return span_width
+
+
+_text_layout = TextLayout()
+
+
 class ShapeData:
     """Data structure for shape properties extracted from a PowerPoint shape."""
 
@@ -286,61 +613,7 @@ class ShapeData:
         Returns:
             Path to the font file, or None if not found
         """
-        system = platform.system()
-
-        # Common font file variations to try
-        font_variations = [
-            font_name,
-            font_name.lower(),
-            font_name.replace(" ", ""),
-            font_name.replace(" ", "-"),
-        ]
-
-        # Define font directories and extensions by platform
-        if system == "Darwin":  # macOS
-            font_dirs = [
-                "/System/Library/Fonts/",
-                "/Library/Fonts/",
-                "~/Library/Fonts/",
-            ]
-            extensions = [".ttf", ".otf", ".ttc", ".dfont"]
-        else:  # Linux
-            font_dirs = [
-                "/usr/share/fonts/truetype/",
-                "/usr/local/share/fonts/",
-                "~/.fonts/",
-            ]
-            extensions = [".ttf", ".otf"]
-
-        # Try to find the font file
-        from pathlib import Path
-
-        for font_dir in font_dirs:
-            font_dir_path = Path(font_dir).expanduser()
-            if not font_dir_path.exists():
-                continue
-
-            # First try exact matches
-            for variant in font_variations:
-                for ext in extensions:
-                    font_path = font_dir_path / f"{variant}{ext}"
-                    if font_path.exists():
-                        return str(font_path)
-
-            # Then try fuzzy matching - find files containing the font name
-            try:
-                for file_path in font_dir_path.iterdir():
-                    if file_path.is_file():
-                        file_name_lower = file_path.name.lower()
-                        font_name_lower = font_name.lower().replace(" ", "")
-                        if font_name_lower in file_name_lower and any(
-                            file_name_lower.endswith(ext) for ext in extensions
-                        ):
-                            return str(file_path)
-            except (OSError, PermissionError):
-                continue
-
-        return None
+        return get_font_index().find(font_name)
 
     @staticmethod
     def get_slide_dimensions(slide: Any) -> tuple[Optional[int], Optional[int]]:
@@ -531,34 +804,6 @@ class ShapeData:
             self.inches_to_pixels(usable_height),
         )
 
-    def _wrap_text_line(self, line: str, max_width_px: int, draw, font) -> List[str]:
-        """Wrap a single line of text to fit within max_width_px."""
-        if not line:
-            return [""]
-
-        # Use textlength for efficient width calculation
-        if draw.textlength(line, font=font) <= max_width_px:
-            return [line]
-
-        # Need to wrap - split into words
-        wrapped = []
-        words = line.split(" ")
-        current_line = ""
-
-        for word in words:
-            test_line = current_line + (" " if current_line else "") + word
-            if draw.textlength(test_line, font=font) <= max_width_px:
-                current_line = test_line
-            else:
-                if current_line:
-                    wrapped.append(current_line)
-                current_line = word
-
-        if current_line:
-            wrapped.append(current_line)
-
-        return wrapped
-
     def _estimate_frame_overflow(self) -> None:
         """Estimate if text overflows the shape bounds using PIL text measurement."""
         if not self.shape or not hasattr(self.shape, "text_frame"):
@@ -573,10 +818,6 @@ class ShapeData:
         if usable_width_px <= 0 or usable_height_px <= 0:
             return
 
-        # Set up PIL for text measurement
-        dummy_img = Image.new("RGB", (1, 1))
-        draw = ImageDraw.Draw(dummy_img)
-
         # Get default font size from placeholder or use conservative estimate
         default_font_size = self._get_default_font_size()
 
@@ -593,20 +834,14 @@ class ShapeData:
             font_name = para_data.font_name or "Arial"
             font_size = int(para_data.font_size or default_font_size)
 
-            font = None
             font_path = self.get_font_path(font_name)
-            if font_path:
-                try:
-                    font = ImageFont.truetype(font_path, size=font_size)
-                except Exception:
-                    font = ImageFont.load_default()
-            else:
-                font = ImageFont.load_default()
 
             # Wrap all lines in this paragraph
             all_wrapped_lines = []
             for line in paragraph.text.split("\n"):
-                wrapped = self._wrap_text_line(line, usable_width_px, draw, font)
+                wrapped = _text_layout.wrap(
+                    line, usable_width_px, font_path, font_size
+                )
                 all_wrapped_lines.extend(wrapped)
 
             if all_wrapped_lines:
@@ -879,36 +1114,32 @@ def calculate_overlap(
     return False, 0
 
 
-def detect_overlaps(shapes: List[ShapeData]) -> None:
+def detect_overlaps(shapes: List[ShapeData], tolerance: float = 0.05) -> None:
     """Detect overlapping shapes and update their overlapping_shapes dictionaries.
 
     This function requires each ShapeData to have its shape_id already set.
     It modifies the shapes in-place, adding shape IDs with overlap areas in square inches.
+    Overlaps are the same as calculate_overlap() finds for each pair, but are
+    found with a sweep line instead of comparing every pair of shapes.
 
     Args:
         shapes: List of ShapeData objects with shape_id attributes set
+        tolerance: Minimum overlap in inches to consider as overlapping (default: 0.05")
     """
-    n = len(shapes)
-
-    # Compare each pair of shapes
-    for i in range(n):
-        for j in range(i + 1, n):
-            shape1 = shapes[i]
-            shape2 = shapes[j]
-
-            # Ensure shape IDs are set
-            assert shape1.shape_id, f"Shape at index {i} has no shape_id"
-            assert shape2.shape_id, f"Shape at index {j} has no shape_id"
-
-            rect1 = (shape1.left, shape1.top, shape1.width, shape1.height)
-            rect2 = (shape2.left, shape2.top, shape2.width, shape2.height)
-
-            overlaps, overlap_area = calculate_overlap(rect1, rect2)
-
-            if overlaps:
-                # Add shape IDs with overlap area in square inches
-                shape1.overlapping_shapes[shape2.shape_id] = overlap_area
-                shape2.overlapping_shapes[shape1.shape_id] = overlap_area
+    for i, shape in enumerate(shapes):
+        # Ensure shape IDs are set
+        assert shape.shape_id, f"Shape at index {i} has no shape_id"
+
+    rects = [
+        (shape.left, shape.top, shape.left + shape.width, shape.top + shape.height)
+        for shape in shapes
+    ]
+    # Pairs come sorted by index, so each shape lists the others in slide order
+    for i, j, overlap_width, overlap_height in find_overlaps(rects, tolerance):
+        # Add shape IDs with overlap area in square inches
+        overlap_area = round(overlap_width * overlap_height, 2)
+        shapes[i].overlapping_shapes[shapes[j].shape_id] = overlap_area
+        shapes[j].overlapping_shapes[shapes[i].shape_id] = overlap_area
 
 
 def extract_text_inventory(
@@ -0,0 +1,220 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image, ImageDraw, ImageFont
+
+import inventory
+from inventory import FontIndex, TextLayout
+
+# (family, style) stored in each test font file, as the font would report them
+FONT_NAMES = {
+    "Lato-Light.ttf": ("Lato", "Light"),
+    "Lato-Regular.ttf": ("Lato", "Regular"),
+    "Lato-Bold.ttf": ("Lato", "Bold"),
+    "arial.ttf": ("Arial", "Regular"),
+    "ArialMT-Narrow.otf": (None, None),
+    "fake.ttf": ("Source Sans Pro", "Regular"),
+}
+
+
+class FontIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.font_dirs = [str(self.temp_dir / "fonts"), str(self.temp_dir / "missing")]
+        (self.temp_dir / "fonts/truetype/lato").mkdir(parents=True)
+        for name in FONT_NAMES:
+            subdir = "truetype/lato" if name.startswith("Lato") else ""
+            (self.temp_dir / "fonts" / subdir / name).write_bytes(b"")
+        (self.temp_dir / "fonts/README.txt").write_text("not a font")
+
+        self.read_paths = []
+        patch = mock.patch.object(inventory, "_read_font_names", self.read_font_names)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def read_font_names(self, path):
+        self.read_paths.append(Path(path).name)
+        return FONT_NAMES.get(Path(path).name, (None, None))
+
+    def touch(self, path):
+        """Make sure a changed directory gets a new mtime."""
+        mtime = os.stat(path).st_mtime_ns + 10**9
+        os.utime(path, ns=(mtime, mtime))
+
+
+class TestFontIndex(FontIndexTestCase):
+    def test_lookups(self):
+        """Test that names match families, faces, and file names, like fontconfig"""
+        index = FontIndex.build(self.font_dirs)
+        fonts = self.temp_dir / "fonts"
+        lato = fonts / "truetype/lato"
+        self.assertEqual(index.find("Lato"), str(lato / "Lato-Regular.ttf"))
+        self.assertEqual(index.find("lato light"), str(lato / "Lato-Light.ttf"))
+        self.assertEqual(index.find("Lato-Bold"), str(lato / "Lato-Bold.ttf"))
+        self.assertEqual(index.find("Source_Sans Pro"), str(fonts / "fake.ttf"))
+        self.assertEqual(index.find("ARIAL"), str(fonts / "arial.ttf"))
+        self.assertEqual(index.find("ArialMTNarrow"), str(fonts / "ArialMT-Narrow.otf"))
+        self.assertEqual(index.find("Narrow"), str(fonts / "ArialMT-Narrow.otf"))
+        self.assertIsNone(index.find("Calibri"))
+        self.assertIsNone(index.find(""))
+
+    def test_fonts_are_read_once(self):
+        """Test that building the index reads each font file once, and nothing else"""
+        index = FontIndex.build(self.font_dirs)
+        self.assertEqual(sorted(self.read_paths), sorted(FONT_NAMES))
+        for name in ("Lato", "Arial", "Calibri", "Lato"):
+            index.find(name)
+        self.assertEqual(len(self.read_paths), len(FONT_NAMES))
+
+
+class TestFontCache(FontIndexTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_file = self.temp_dir / "fonts.json"
+
+    def test_cache_reused_while_unchanged(self):
+        """Test that a saved index is loaded without reading any font"""
+        index = FontIndex.load(self.font_dirs, self.cache_file)
+        self.assertTrue(self.cache_file.exists())
+        self.read_paths.clear()
+
+        cached = FontIndex.load(self.font_dirs, self.cache_file)
+        self.assertEqual(self.read_paths, [])
+        self.assertEqual(cached.fonts, index.fonts)
+        self.assertEqual(cached.find("Lato Light"), index.find("Lato Light"))
+
+    def test_changed_directory_rebuilds_reading_new_fonts_only(self):
+        """Test that an added font is indexed, without reading the others again"""
+        FontIndex.load(self.font_dirs, self.cache_file)
+        self.read_paths.clear()
+        lato = self.temp_dir / "fonts/truetype/lato"
+        (lato / "Lato-Black.ttf").write_bytes(b"")
+        self.touch(lato)
+
+        index = FontIndex.load(self.font_dirs, self.cache_file)
+        self.assertEqual(self.read_paths, ["Lato-Black.ttf"])
+        self.assertEqual(index.find("Lato Black"), str(lato / "Lato-Black.ttf"))
+
+    def test_unusable_cache(self):
+        """Test that a broken cache file, or one for other directories, is replaced"""
+        self.cache_file.write_text("{not json")
+        FontIndex.load(self.font_dirs, self.cache_file)
+        self.assertEqual(len(self.read_paths), len(FONT_NAMES))
+
+        # Fonts already read are reused
+        self.read_paths.clear()
+        index = FontIndex.load(self.font_dirs[:1], self.cache_file)
+        self.assertEqual(index.font_dirs, self.font_dirs[:1])
+        self.assertEqual(self.read_paths, [])
+        self.assertEqual(FontIndex.load(self.font_dirs[:1], self.cache_file).fonts, index.fonts)
+
+    def test_loaded_fonts_are_cached(self):
+        """Test that load_font keeps fonts by path and size"""
+        inventory.load_font.cache_clear()
+        self.addCleanup(inventory.load_font.cache_clear)
+        with mock.patch.object(inventory.ImageFont, "truetype") as truetype:
+            font = inventory.load_font("/fonts/a.ttf", 12)
+            self.assertIs(inventory.load_font("/fonts/a.ttf", 12), font)
+            inventory.load_font("/fonts/a.ttf", 14)
+        self.assertEqual(truetype.call_count, 2)
+
+
+def wrap_line_by_line(line, max_width_px, textlength):
+    """Wrap text by measuring the whole line for each word added, as before TextLayout."""
+    if not line:
+        return [""]
+    if textlength(line) <= max_width_px:
+        return [line]
+    wrapped = []
+    current_line = ""
+    for word in line.split(" "):
+        test_line = current_line + (" " if current_line else "") + word
+        if textlength(test_line) <= max_width_px:
+            current_line = test_line
+        else:
+            if current_line:
+                wrapped.append(current_line)
+            current_line = word
+    if current_line:
+        wrapped.append(current_line)
+    return wrapped
+
+
+def kerned_textlength(text, font=None):
+    """Width of text in a made-up font with kerned pairs, including around spaces."""
+    kerning = {"AV": -2.5, "To": -1.75, "o ": -0.5, " T": 1.25, "Wa": -1.5}
+    width = sum(5.0 if char == " " else 7.0 + (ord(char) % 5) for char in text)
+    return width + sum(kerning.get(text[i : i + 2], 0.0) for i in range(len(text) - 1))
+
+
+class TestTextLayout(unittest.TestCase):
+    def setUp(self):
+        # Pillow's bundled FreeType font, so no installed font is needed
+        patch = mock.patch.object(
+            inventory, "load_font", lambda font_path, size: ImageFont.load_default(size)
+        )
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.layout = TextLayout()
+
+    def random_lines(self, count):
+        """Yield random lines with kerned pairs and repeated and leading spaces."""
+        rng = random.Random(7)
+        words = ["AV", "To", "Wa", "fly", "office", "LT", "yT", "i", "WAVE", "“quoted”", ""]
+        for _ in range(count):
+            line = " ".join(rng.choice(words) for _ in range(rng.randint(0, 25)))
+            yield " " * rng.randint(0, 2) + line, rng.randint(20, 300)
+
+    def test_same_lines_as_measuring_each_line(self):
+        """Test that wrapping from word widths gives the lines measuring whole lines gives"""
+        for size in (10, 14, 23):
+            font = ImageFont.load_default(size)
+            draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+            textlength = lambda text: draw.textlength(text, font=font)
+            for line, width in self.random_lines(100):
+                with self.subTest(line=line, size=size, width=width):
+                    self.assertEqual(
+                        self.layout.wrap(line, width, None, size),
+                        wrap_line_by_line(line, width, textlength),
+                    )
+
+    def test_kerning(self):
+        """Test that kerning between words and spaces is accounted for"""
+        self.layout._draw.textlength = kerned_textlength
+        for line, width in self.random_lines(300):
+            with self.subTest(line=line, width=width):
+                self.assertEqual(
+                    self.layout.wrap(line, width, None, 12),
+                    wrap_line_by_line(line, width, kerned_textlength),
+                )
+
+    def test_words_are_measured_once(self):
+        """Test that each word is measured once per font and size"""
+        measured = []
+        textlength = self.layout._draw.textlength
+
+        def counting_textlength(text, font):
+            measured.append((text, font.size))
+            return textlength(text, font=font)
+
+        self.layout._draw.textlength = counting_textlength
+        line = "alpha beta gamma delta " * 20
+        self.assertGreater(len(self.layout.wrap(line, 100, None, 12)), 1)
+        self.assertEqual(len(measured), len(set(measured)))
+
+        measured.clear()
+        self.layout.wrap(line, 150, None, 12)
+        self.layout.wrap("gamma alpha", 150, None, 12)
+        self.assertEqual(measured, [])
+        self.layout.wrap("gamma alpha", 150, None, 13)
+        self.assertIn(("gamma", 13), measured)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,6 +12,7 @@ Slides can be repeated (e.g., 34 appears twice).
 import argparse
 import shutil
 import sys
+from collections import Counter, deque
 from copy import deepcopy
 from pathlib import Path
 
@@ -73,11 +74,18 @@ Note: Slide indices are 0-based (first slide is 0, second is 1, etc.)
 
 
 def duplicate_slide(pres, index):
-    """Duplicate a slide in the presentation."""
+    """Duplicate a slide in the presentation.
+
+    The copy is a new slide part with the source's layout, its shapes and its
+    image and media relationships, built from the XML elements directly.
+    """
     source = pres.slides[index]
 
-    # Use source's layout to preserve formatting
-    new_slide = pres.slides.add_slide(source.slide_layout)
+    # New blank slide part, related to the source's layout
+    rId, new_slide = pres.part.add_slide(source.slide_layout)
+    pres.slides._sldIdLst.add_sldId(rId)
+    new_part = new_slide.part
+    new_tree = new_slide.shapes._spTree
 
     # Collect all image and media relationships from the source slide
     image_rels = {}
@@ -85,16 +93,10 @@ def duplicate_slide(pres, index):
         if "image" in rel.reltype or "media" in rel.reltype:
             image_rels[rel_id] = rel
 
-    # CRITICAL: Clear placeholder shapes to avoid duplicates
-    for shape in new_slide.shapes:
-        sp = shape.element
-        sp.getparent().remove(sp)
-
     # Copy all shapes from source
-    for shape in source.shapes:
-        el = shape.element
+    for el in source.shapes._spTree.iter_shape_elms():
         new_el = deepcopy(el)
-        new_slide.shapes._spTree.insert_element_before(new_el, "p:extLst")
+        new_tree.insert_element_before(new_el, "p:extLst")
 
         # Handle picture shapes - need to update the blip reference
         # Look for all blip elements (they can be in pic or other contexts)
@@ -108,9 +110,7 @@ def duplicate_slide(pres, index):
                 # Create a new relationship in the destination slide for this image
                 old_rel = image_rels[old_rId]
                 # get_or_add returns the rId directly, or adds and returns new rId
-                new_rId = new_slide.part.rels.get_or_add(
-                    old_rel.reltype, old_rel._target
-                )
+                new_rId = new_part.rels.get_or_add(old_rel.reltype, old_rel._target)
                 # Update the blip's embed reference to use the new relationship ID
                 blip.set(
                     "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed",
@@ -120,30 +120,57 @@ def duplicate_slide(pres, index):
     # Copy any additional image/media relationships that might be referenced elsewhere
     for rel_id, rel in image_rels.items():
         try:
-            new_slide.part.rels.get_or_add(rel.reltype, rel._target)
+            new_part.rels.get_or_add(rel.reltype, rel._target)
         except Exception:
             pass  # Relationship might already exist
 
     return new_slide
 
 
-def delete_slide(pres, index):
-    """Delete a slide from the presentation."""
-    rId = pres.slides._sldIdLst[index].rId
-    pres.part.drop_rel(rId)
-    del pres.slides._sldIdLst[index]
+def delete_slides(pres, slide_ids):
+    """Delete slides from the presentation, given their p:sldId elements."""
+    sldIdLst = pres.slides._sldIdLst
 
+    # As Part.drop_rel, keep the relationship if something besides the slide
+    # list refers to it (e.g. a custom show), but count references only once
+    ref_counts = Counter(pres.part._element.xpath("//@r:id"))
+    for sldId in slide_ids:
+        if ref_counts[sldId.rId] < 2:
+            pres.part.rels.pop(sldId.rId)
+        sldIdLst.remove(sldId)
 
-def reorder_slides(pres, slide_index, target_index):
-    """Move a slide from one position to another."""
-    slides = pres.slides._sldIdLst
 
-    # Remove slide element from current position
-    slide_element = slides[slide_index]
-    slides.remove(slide_element)
+def plan_sequence(slide_sequence, total_slides):
+    """Work out the final slide list in one pass over the sequence.
 
-    # Insert at target position
-    slides.insert(target_index, slide_element)
+    The first occurrence of a slide uses the template slide itself. All the
+    copies its repeats need are made then, and are appended to the slide
+    list in the order they are made.
+
+    Args:
+        slide_sequence: List of slide indices (0-based) to include
+        total_slides: Number of slides in the template
+
+    Returns:
+        (copies, order): the template slide index of each copy to make, in
+        order, and for each position in the sequence, the index of its slide
+        in the slide list once the copies are made
+    """
+    counts = Counter(slide_sequence)
+    copies = []
+    unused_copies = {}  # template index -> slide list indexes of unused copies
+    order = []
+    for template_idx in slide_sequence:
+        if template_idx in unused_copies:
+            order.append(unused_copies[template_idx].popleft())
+            continue
+        order.append(template_idx)
+        first_copy = total_slides + len(copies)
+        copies.extend([template_idx] * (counts[template_idx] - 1))
+        unused_copies[template_idx] = deque(
+            range(first_copy, total_slides + len(copies))
+        )
+    return copies, order
 
 
 def rearrange_presentation(template_path, output_path, slide_sequence):
@@ -169,57 +196,39 @@ def rearrange_presentation(template_path, output_path, slide_sequence):
         if idx < 0 or idx >= total_slides:
             raise ValueError(f"Slide index {idx} out of range (0-{total_slides - 1})")
 
-    # Track original slides and their duplicates
-    slide_map = []  # List of actual slide indices for final presentation
-    duplicated = {}  # Track duplicates: original_idx -> [duplicate_indices]
+    copies, order = plan_sequence(slide_sequence, total_slides)
 
     # Step 1: DUPLICATE repeated slides
     print(f"Processing {len(slide_sequence)} slides from template...")
-    for i, template_idx in enumerate(slide_sequence):
-        if template_idx in duplicated and duplicated[template_idx]:
-            # Already duplicated this slide, use the duplicate
-            slide_map.append(duplicated[template_idx].pop(0))
+    copy_counts = Counter(copies)
+    for i, (template_idx, slide_idx) in enumerate(zip(slide_sequence, order)):
+        if slide_idx >= total_slides:
             print(f"  [{i}] Using duplicate of slide {template_idx}")
-        elif slide_sequence.count(template_idx) > 1 and template_idx not in duplicated:
-            # First occurrence of a repeated slide - create duplicates
-            slide_map.append(template_idx)
-            duplicates = []
-            count = slide_sequence.count(template_idx) - 1
+        elif copy_counts[template_idx]:
             print(
-                f"  [{i}] Using original slide {template_idx}, creating {count} duplicate(s)"
+                f"  [{i}] Using original slide {template_idx}, "
+                f"creating {copy_counts[template_idx]} duplicate(s)"
             )
-            for _ in range(count):
-                duplicate_slide(prs, template_idx)
-                duplicates.append(len(prs.slides) - 1)
-            duplicated[template_idx] = duplicates
         else:
-            # Unique slide or first occurrence already handled, use original
-            slide_map.append(template_idx)
             print(f"  [{i}] Using original slide {template_idx}")
-
-    # Step 2: DELETE unwanted slides (work backwards)
-    slides_to_keep = set(slide_map)
-    print(f"\nDeleting {len(prs.slides) - len(slides_to_keep)} unused slides...")
-    for i in range(len(prs.slides) - 1, -1, -1):
-        if i not in slides_to_keep:
-            delete_slide(prs, i)
-            # Update slide_map indices after deletion
-            slide_map = [idx - 1 if idx > i else idx for idx in slide_map]
-
-    # Step 3: REORDER to final sequence
-    print(f"Reordering {len(slide_map)} slides to final sequence...")
-    for target_pos in range(len(slide_map)):
-        # Find which slide should be at target_pos
-        current_pos = slide_map[target_pos]
-        if current_pos != target_pos:
-            reorder_slides(prs, current_pos, target_pos)
-            # Update slide_map: the move shifts other slides
-            for i in range(len(slide_map)):
-                if slide_map[i] > current_pos and slide_map[i] <= target_pos:
-                    slide_map[i] -= 1
-                elif slide_map[i] < current_pos and slide_map[i] >= target_pos:
-                    slide_map[i] += 1
-            slide_map[target_pos] = target_pos
+    for template_idx in copies:
+        duplicate_slide(prs, template_idx)
+
+    # Step 2: DELETE unwanted slides
+    slide_ids = list(prs.slides._sldIdLst)
+    slides_to_keep = set(order)
+    unused = [
+        sldId for idx, sldId in enumerate(slide_ids) if idx not in slides_to_keep
+    ]
+    print(f"\nDeleting {len(unused)} unused slides...")
+    delete_slides(prs, unused)
+
+    # Step 3: REORDER to final sequence, rebuilding the slide list once
+    print(f"Reordering {len(order)} slides to final sequence...")
+    sldIdLst = prs.slides._sldIdLst
+    for sldId in list(sldIdLst):
+        sldIdLst.remove(sldId)
+    sldIdLst.extend(slide_ids[idx] for idx in order)
 
     # Save the presentation
     prs.save(output_path)
@@ -0,0 +1,107 @@
+import io
+import re
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from lxml import etree
+from PIL import Image
+from pptx import Presentation
+from pptx.oxml.ns import qn
+from pptx.util import Inches
+
+from rearrange import delete_slides, plan_sequence, rearrange_presentation
+
+
+def make_pptx(path, count):
+    """Write a template with titled slides; slide 1 also has a picture."""
+    presentation = Presentation()
+    for index in range(count):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+        slide.shapes.title.text = f"slide {index}"
+        if index == 1:
+            image = io.BytesIO()
+            Image.new("RGB", (4, 4), "red").save(image, "PNG")
+            slide.shapes.add_picture(image, Inches(1), Inches(2))
+    presentation.save(path)
+    return path
+
+
+def titles(presentation):
+    return [slide.shapes.title.text for slide in presentation.slides]
+
+
+class TestPlanSequence(unittest.TestCase):
+    def test_copies_and_order(self):
+        """Test that repeats use copies made in order, and first uses the template slide"""
+        copies, order = plan_sequence([2, 0, 2, 2, 1, 0], 3)
+        self.assertEqual(copies, [2, 2, 0])
+        self.assertEqual(order, [2, 0, 3, 4, 1, 5])
+
+    def test_no_repeats(self):
+        """Test that a sequence without repeats makes no copies"""
+        self.assertEqual(plan_sequence([3, 1], 4), ([], [3, 1]))
+
+
+class TestRearrangePresentation(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.template = make_pptx(self.temp_dir / "template.pptx", 4)
+        self.output = self.temp_dir / "output.pptx"
+        patch = mock.patch("builtins.print")
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_rearranged(self):
+        """Test that the output has the slides of the sequence, repeats included"""
+        rearrange_presentation(self.template, self.output, [3, 1, 1, 0, 3])
+
+        presentation = Presentation(str(self.output))
+        self.assertEqual(
+            titles(presentation), ["slide 3", "slide 1", "slide 1", "slide 0", "slide 3"]
+        )
+        # The copy of slide 1 shows the same picture
+        pictures = [
+            slide.shapes[1].image.blob for slide in list(presentation.slides)[1:3]
+        ]
+        self.assertEqual(pictures[0], pictures[1])
+        # Slide 2 is gone, part included
+        with zipfile.ZipFile(self.output) as zf:
+            slide_parts = [
+                name
+                for name in zf.namelist()
+                if re.fullmatch(r"ppt/slides/slide\d+\.xml", name)
+            ]
+        self.assertEqual(len(slide_parts), 5)
+
+    def test_out_of_range(self):
+        """Test that a sequence with a missing slide is rejected"""
+        with self.assertRaisesRegex(ValueError, r"Slide index 4 out of range \(0-3\)"):
+            rearrange_presentation(self.template, self.output, [0, 4])
+
+
+class TestDeleteSlides(unittest.TestCase):
+    def test_relationships_used_elsewhere_are_kept(self):
+        """Test that a deleted slide's relationship stays while a custom show uses it"""
+        template = make_pptx(Path(tempfile.mkdtemp()) / "template.pptx", 3)
+        self.addCleanup(shutil.rmtree, template.parent, ignore_errors=True)
+        presentation = Presentation(str(template))
+        slide_ids = list(presentation.slides._sldIdLst)
+        shows = etree.SubElement(presentation.part._element, qn("p:custShowLst"))
+        show = etree.SubElement(shows, qn("p:custShow"), name="Show", id="0")
+        etree.SubElement(etree.SubElement(show, qn("p:sldLst")), qn("p:sld")).set(
+            qn("r:id"), slide_ids[1].rId
+        )
+
+        delete_slides(presentation, slide_ids[:2])
+        self.assertEqual(titles(presentation), ["slide 2"])
+        self.assertNotIn(slide_ids[0].rId, presentation.part.rels)
+        self.assertIn(slide_ids[1].rId, presentation.part.rels)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Find all pairs of overlapping rectangles with a sweep line.
+
+Shared by the pdf skill (check_bounding_boxes.py) and the pptx skill
+(inventory.py); the two copies are identical.
+
+Rectangles are sorted by their left edge, so each one only needs to be
+tested against the rectangles that start before its right edge instead of
+against all others. The sweep runs top to bottom instead when that gives
+fewer candidates (e.g. forms, with many rows but few columns). Candidates
+are tested together with NumPy when it is installed, and one by one
+otherwise; both give the same results.
+"""
+
+from bisect import bisect_left
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Below this many rectangles the NumPy setup costs more than it saves
+VECTORIZE_MIN_RECTS = 64
+
+
+def find_overlaps(rects, tolerance=0.0):
+    """Return every pair of rectangles that overlap by more than tolerance.
+
+    Two rectangles overlap when the overlap extent in each direction,
+    min(right edges) - max(left edges), is greater than tolerance. With the
+    default tolerance of 0, rectangles that only touch don't overlap.
+
+    Args:
+        rects: Sequence of (x0, y0, x1, y1) rectangles, with x0 <= x1 and y0 <= y1
+        tolerance: Overlaps at most this wide or high are ignored
+
+    Returns:
+        List of (i, j, width, height) for each overlapping pair of indexes
+        i < j, sorted by (i, j), with the width and height of the overlap
+    """
+    if np is not None and len(rects) >= VECTORIZE_MIN_RECTS:
+        overlaps = _find_overlaps_numpy(rects, tolerance)
+    else:
+        overlaps = _find_overlaps_python(rects, tolerance)
+    overlaps.sort()
+    return overlaps
+
+
+def _sweep_python(rects, axis):
+    """Return the sweep order along axis and where each rectangle's candidates stop."""
+    order = sorted(range(len(rects)), key=lambda i: rects[i][axis])
+    starts = [rects[i][axis] for i in order]
+    # Rectangles sorted after one start at or after its start; only those
+    # starting before its end can overlap it
+    stops = [bisect_left(starts, rects[i][axis + 2]) for i in order]
+    return order, stops
+
+
+def _candidate_count(stops):
+    return sum(max(0, stop - k - 1) for k, stop in enumerate(stops))
+
+
+def _find_overlaps_python(rects, tolerance):
+    sweeps = [_sweep_python(rects, axis) for axis in (0, 1)]
+    order, stops = min(sweeps, key=lambda sweep: _candidate_count(sweep[1]))
+
+    overlaps = []
+    for k, i in enumerate(order):
+        x0, y0, x1, y1 = rects[i]
+        for m in range(k + 1, stops[k]):
+            j = order[m]
+            other = rects[j]
+            width = min(x1, other[2]) - max(x0, other[0])
+            height = min(y1, other[3]) - max(y0, other[1])
+            if width > tolerance and height > tolerance:
+                overlaps.append((min(i, j), max(i, j), width, height))
+    return overlaps
+
+
+def _find_overlaps_numpy(rects, tolerance):
+    boxes = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+    sweeps = []
+    for axis in (0, 1):
+        order = np.argsort(boxes[:, axis], kind="stable")
+        sorted_boxes = boxes[order]
+        stops = np.searchsorted(
+            sorted_boxes[:, axis], sorted_boxes[:, axis + 2], side="left"
+        )
+        candidates = np.maximum(stops - np.arange(1, len(order) + 1), 0).sum()
+        sweeps.append((candidates, axis, order, sorted_boxes, stops))
+    _, _, order, sorted_boxes, stops = min(sweeps, key=lambda sweep: sweep[:2])
+    x0, y0, x1, y1 = sorted_boxes.T
+
+    firsts, seconds, all_widths, all_heights = [], [], [], []
+    for k in np.flatnonzero(stops > np.arange(1, len(order) + 1)):
+        candidates = slice(k + 1, stops[k])
+        widths = np.minimum(x1[k], x1[candidates]) - np.maximum(x0[k], x0[candidates])
+        heights = np.minimum(y1[k], y1[candidates]) - np.maximum(y0[k], y0[candidates])
+        hits = np.flatnonzero((widths > tolerance) & (heights > tolerance))
+        if len(hits):
+            firsts.append(np.full(len(hits), order[k]))
+            seconds.append(order[k + 1 + hits])
+            all_widths.append(widths[hits])
+            all_heights.append(heights[hits])
+    if not firsts:
+        return []
+
+    firsts = np.concatenate(firsts)
+    seconds = np.concatenate(seconds)
+    overlaps = list(
+        zip(
+            np.minimum(firsts, seconds).tolist(),
+            np.maximum(firsts, seconds).tolist(),
+            np.concatenate(all_widths).tolist(),
+            np.concatenate(all_heights).tolist(),
+        )
+    )
+    return overlaps
@@ -14,7 +14,12 @@ import sys
 from pathlib import Path
 from typing import Any, Dict, List
 
-from inventory import InventoryData, extract_text_inventory
+from inventory import (
+    InventoryData,
+    ShapeData,
+    extract_text_inventory,
+    is_valid_shape,
+)
 from pptx import Presentation
 from pptx.dml.color import RGBColor
 from pptx.enum.dml import MSO_THEME_COLOR
@@ -245,6 +250,9 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
     shapes_cleared = 0
     shapes_replaced = 0
 
+    # Replaced shapes, measured again once their text is in
+    updated_inventory: InventoryData = {}
+
     # Process each slide from inventory
     for slide_key, shapes_dict in inventory.items():
         if not slide_key.startswith("slide-"):
@@ -255,6 +263,7 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
         if slide_index >= len(prs.slides):
             print(f"Warning: Slide {slide_index} not found")
             continue
+        slide = prs.slides[slide_index]
 
         # Process each shape from inventory
         for shape_key, shape_data in shapes_dict.items():
@@ -288,20 +297,20 @@ def apply_replacements(pptx_file: str, json_file: str, output_file: str):
 
                 apply_paragraph_properties(p, para_data)
 
-    # Check for issues after replacements
-    # Save to a temporary file and reload to avoid modifying the presentation during inventory
-    # (extract_text_inventory accesses font.color which adds empty <a:solidFill/> elements)
-    import tempfile
-
-    with tempfile.NamedTemporaryFile(suffix=".pptx", delete=False) as tmp:
-        tmp_path = Path(tmp.name)
-        prs.save(str(tmp_path))
+            # Check the new text in place; the inventory only reads the XML, so
+            # this doesn't modify the presentation. Cleared shapes have no text
+            # and so no issues.
+            if is_valid_shape(shape):
+                updated_shape_data = ShapeData(
+                    shape, shape_data.left_emu, shape_data.top_emu, slide
+                )
+                updated_shape_data.shape_id = shape_key
+                updated_inventory.setdefault(slide_key, {})[shape_key] = (
+                    updated_shape_data
+                )
 
-    try:
-        updated_inventory = extract_text_inventory(tmp_path)
-        updated_overflow = detect_frame_overflow(updated_inventory)
-    finally:
-        tmp_path.unlink()  # Clean up temp file
+    # Check for issues after replacements
+    updated_overflow = detect_frame_overflow(updated_inventory)
 
     # Check if any text overflow got worse
     overflow_errors = []
@@ -0,0 +1,130 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from lxml import etree
+from pptx import Presentation
+from pptx.dml.color import RGBColor
+from pptx.enum.dml import MSO_THEME_COLOR
+from pptx.enum.text import PP_ALIGN
+from pptx.oxml.ns import qn
+from pptx.util import Inches, Pt
+
+import inventory
+import replace
+from inventory import FontIndex, extract_text_inventory
+
+
+def make_pptx(path):
+    """Write a slide with a formatted title box and a narrow box below it."""
+    presentation = Presentation()
+    slide = presentation.slides.add_slide(presentation.slide_layouts[6])
+
+    title = slide.shapes.add_textbox(Inches(1), Inches(0.5), Inches(6), Inches(1))
+    paragraph = title.text_frame.paragraphs[0]
+    paragraph.alignment = PP_ALIGN.CENTER
+    run = paragraph.add_run()
+    run.text = "Quarterly results"
+    run.font.size = Pt(28)
+    run.font.bold = True
+    run.font.color.rgb = RGBColor(0x12, 0x34, 0x56)
+    bullet = title.text_frame.add_paragraph()
+    bullet.level = 1
+    etree.SubElement(bullet._p.get_or_add_pPr(), qn("a:buChar"), char="•")
+    run = bullet.add_run()
+    run.text = "Themed bullet"
+    run.font.color.theme_color = MSO_THEME_COLOR.ACCENT_1
+    plain = title.text_frame.add_paragraph()
+    plain.add_run().text = "Plain"
+
+    body = slide.shapes.add_textbox(Inches(1), Inches(3), Inches(1.5), Inches(0.6))
+    body.text_frame.word_wrap = True
+    run = body.text_frame.paragraphs[0].add_run()
+    run.text = "Short"
+    run.font.size = Pt(12)
+
+    presentation.save(path)
+    return path
+
+
+class ReplaceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.pptx_path = make_pptx(self.temp_dir / "deck.pptx")
+        self.output_path = self.temp_dir / "out.pptx"
+        patches = [
+            # Measure with PIL's default font, whatever fonts are installed
+            mock.patch.object(inventory, "_font_index", FontIndex([], [], {})),
+            mock.patch("builtins.print"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def replace(self, replacements):
+        json_path = self.temp_dir / "replacements.json"
+        json_path.write_text(json.dumps(replacements))
+        replace.apply_replacements(str(self.pptx_path), str(json_path), str(self.output_path))
+
+
+class TestInventoryReadOnly(ReplaceTestCase):
+    def test_inventory_leaves_the_slides_alone(self):
+        """Test that taking an inventory doesn't change the slide XML"""
+        presentation = Presentation(str(self.pptx_path))
+        slide = presentation.slides[0]
+        before = etree.tostring(slide._element)
+
+        shapes = extract_text_inventory(self.pptx_path, presentation)["slide-0"]
+        self.assertEqual(etree.tostring(slide._element), before)
+
+        self.assertEqual(
+            [paragraph.to_dict() for paragraph in shapes["shape-0"].paragraphs],
+            [
+                {
+                    "text": "Quarterly results",
+                    "alignment": "CENTER",
+                    "font_size": 28.0,
+                    "bold": True,
+                    "color": "123456",
+                },
+                {"text": "Themed bullet", "bullet": True, "level": 1, "theme_color": "ACCENT_1"},
+                {"text": "Plain"},
+            ],
+        )
+
+
+class TestApplyReplacements(ReplaceTestCase):
+    def test_replaced_without_reloading(self):
+        """Test that replacements are applied and checked without saving and reloading"""
+        with mock.patch.object(replace, "Presentation", wraps=Presentation) as load:
+            self.replace(
+                {"slide-0": {"shape-1": {"paragraphs": [{"text": "New", "font_size": 12}]}}}
+            )
+        load.assert_called_once()
+
+        shapes = Presentation(str(self.output_path)).slides[0].shapes
+        self.assertEqual([shape.text_frame.text for shape in shapes], ["", "New"])
+
+    def test_overflow_reported_under_the_replacement_key(self):
+        """Test that worsened overflow is reported for the shape named in the JSON"""
+        long_text = "A much longer text that can't fit in the narrow box " * 4
+        with self.assertRaisesRegex(ValueError, "1 overflow error"):
+            self.replace(
+                {"slide-0": {"shape-1": {"paragraphs": [{"text": long_text, "font_size": 12}]}}}
+            )
+        errors = "\n".join(str(call) for call in print.call_args_list)
+        self.assertIn("slide-0/shape-1: overflow worsened", errors)
+        self.assertFalse(self.output_path.exists())
+
+    def test_unknown_shapes(self):
+        """Test that replacements for shapes missing from the inventory are rejected"""
+        with self.assertRaisesRegex(ValueError, "1 validation error"):
+            self.replace({"slide-0": {"shape-5": {"paragraphs": [{"text": "New"}]}}})
+
+
+if __name__ == "__main__":
+    unittest.main()
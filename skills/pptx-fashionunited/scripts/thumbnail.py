@@ -19,7 +19,8 @@ Grid limits by column count:
 - 6 cols: max 42 slides per grid (6×7)
 
 Usage:
-    python thumbnail.py input.pptx [output_prefix] [--cols N] [--outline-placeholders]
+    python thumbnail.py input.pptx [output_prefix] [--cols N] [--outline-placeholders] [--jobs N]
+                        [--cache-dir DIR]
 
 Examples:
     python thumbnail.py presentation.pptx
@@ -38,21 +39,39 @@ Examples:
 
     python thumbnail.py template.pptx analysis --outline-placeholders
     # Creates thumbnail grids with red outlines around text placeholders
+
+    python thumbnail.py output.pptx workspace/thumbnails --cache-dir workspace/.thumbnails
+    # Renders only the slides that changed since the last run with this cache
 """
 
 import argparse
+import hashlib
+import itertools
+import os
+import shutil
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
 from pathlib import Path
 
 from inventory import extract_text_inventory
+from lxml import etree
 from PIL import Image, ImageDraw, ImageFont
 from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.ns import qn
+
+# The skill's copy of office_worker.py lives with its ooxml scripts
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ooxml" / "scripts"))
+from office_worker import convert_document  # noqa: E402
 
 # Constants
 THUMBNAIL_WIDTH = 300  # Fixed thumbnail width in pixels
-CONVERSION_DPI = 100  # DPI for PDF to image conversion
+CONVERSION_DPI = 100  # Reference DPI for outline and hidden slide drawing
+PAGES_PER_RANGE = 8  # PDF pages rasterized per pdftoppm process
+THUMBNAIL_CACHE_VERSION = 1  # Change to invalidate cached slide images
 MAX_COLS = 6  # Maximum number of columns
 DEFAULT_COLS = 5  # Default number of columns
 JPEG_QUALITY = 95  # JPEG compression quality
@@ -86,6 +105,16 @@ def main():
         action="store_true",
         help="Outline text placeholders with a colored border",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of pdftoppm processes rendering slides (default: CPU count)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory to keep slide images in between runs; only slides that "
+        "changed since are rendered again",
+    )
 
     args = parser.parse_args()
 
@@ -118,15 +147,17 @@ def main():
                 if placeholder_regions:
                     print(f"Found placeholders on {len(placeholder_regions)} slides")
 
-            # Convert slides to images
-            slide_images = convert_to_images(input_path, Path(temp_dir), CONVERSION_DPI)
-            if not slide_images:
+            # Convert slides to images, straight at the thumbnail width
+            slide_count, slide_images = convert_to_images(
+                input_path, Path(temp_dir), THUMBNAIL_WIDTH, args.jobs, args.cache_dir
+            )
+            if not slide_count:
                 print("Error: No slides found")
                 sys.exit(1)
 
-            print(f"Found {len(slide_images)} slides")
+            print(f"Found {slide_count} slides")
 
-            # Create grids (max cols×(cols+1) images per grid)
+            # Create grids (max cols×(cols+1) images per grid) as slides are rendered
             grid_files = create_grids(
                 slide_images,
                 cols,
@@ -134,6 +165,7 @@ def main():
                 output_path,
                 placeholder_regions,
                 slide_dimensions,
+                slide_count,
             )
 
             # Print saved files
@@ -194,8 +226,20 @@ def get_placeholder_regions(pptx_path):
     return placeholder_regions, (slide_width_inches, slide_height_inches)
 
 
-def convert_to_images(pptx_path, temp_dir, dpi):
-    """Convert PowerPoint to images via PDF, handling hidden slides."""
+def convert_to_images(pptx_path, temp_dir, width, jobs=None, cache_dir=None):
+    """Convert PowerPoint to images via PDF, handling hidden slides.
+
+    PDF pages are rasterized straight at the thumbnail width, in ranges of
+    PAGES_PER_RANGE pages spread over parallel pdftoppm processes.
+
+    With a cache_dir, slide images are kept there under a key that changes
+    whenever the slide would render differently (see slide_cache_keys), and
+    only slides without a cached image are converted: the others are hidden
+    in a copy of the presentation, which is converted instead.
+
+    Returns a tuple of (slide_count, images), where images yields the image
+    path of each slide in order, as soon as that slide has been rendered.
+    """
     # Detect hidden slides
     print("Analyzing presentation...")
     prs = Presentation(str(pptx_path))
@@ -212,63 +256,207 @@ def convert_to_images(pptx_path, temp_dir, dpi):
     if hidden_slides:
         print(f"Hidden slides: {sorted(hidden_slides)}")
 
-    pdf_path = temp_dir / f"{pptx_path.stem}.pdf"
+    # Hidden slide placeholders are drawn as if rendered at CONVERSION_DPI
+    placeholder_size = (
+        round((prs.slide_width or 9144000) / 914400.0 * CONVERSION_DPI),
+        round((prs.slide_height or 5143500) / 914400.0 * CONVERSION_DPI),
+    )
+
+    # With a cache, only visible slides without a cached image are rendered
+    visible_slides = [
+        slide_num
+        for slide_num in range(1, total_slides + 1)
+        if slide_num not in hidden_slides
+    ]
+    cache_paths = {}  # Slide number -> cached image path, for visible slides
+    if cache_dir:
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        for slide_num, key in enumerate(slide_cache_keys(prs, width), start=1):
+            if slide_num not in hidden_slides:
+                cache_paths[slide_num] = cache_dir / f"{key}.jpg"
+    cached_slides = {
+        slide_num for slide_num, path in cache_paths.items() if path.exists()
+    }
+    render_slides = [
+        slide_num for slide_num in visible_slides if slide_num not in cached_slides
+    ]
+    if cache_dir:
+        print(
+            f"Found {len(cached_slides)} slides in cache, "
+            f"{len(render_slides)} to render"
+        )
+
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    pool = ThreadPoolExecutor(max_workers=jobs)
+    renders = []
+    if render_slides:
+        source_path = pptx_path
+        if cached_slides:
+            # Convert a copy with the cached slides hidden, so that they're
+            # left out of the PDF but other slides keep their slide numbers
+            for slide_num in cached_slides:
+                prs.slides[slide_num - 1].element.set("show", "0")
+            source_path = temp_dir / pptx_path.name
+            prs.save(str(source_path))
+
+        pdf_path = temp_dir / f"{pptx_path.stem}.pdf"
+
+        # Convert to PDF
+        print("Converting to PDF...")
+        result = convert_document(source_path, temp_dir, "pdf")
+        if result.returncode != 0 or not pdf_path.exists():
+            raise RuntimeError("PDF conversion failed")
+
+        # Convert PDF to images; the PDF only has the slides to render
+        page_count = len(render_slides)
+        print(f"Converting to images {width} pixels wide ({jobs} processes)...")
+        renders = [
+            pool.submit(
+                render_pages,
+                pdf_path,
+                temp_dir,
+                first,
+                min(first + PAGES_PER_RANGE - 1, page_count),
+                width,
+            )
+            for first in range(1, page_count + 1, PAGES_PER_RANGE)
+        ]
 
-    # Convert to PDF
-    print("Converting to PDF...")
+    def images():
+        try:
+            rendered_images = (
+                path for render in renders for path in render.result()
+            )
+            for slide_num in range(1, total_slides + 1):
+                if slide_num in hidden_slides:
+                    # Create placeholder image for hidden slide
+                    placeholder_path = temp_dir / f"hidden-{slide_num:03d}.jpg"
+                    placeholder_img = create_hidden_slide_placeholder(placeholder_size)
+                    placeholder_img.save(placeholder_path, "JPEG")
+                    yield placeholder_path
+                elif slide_num in cached_slides:
+                    yield cache_paths[slide_num]
+                else:
+                    # Use the actual visible slide image
+                    image_path = next(rendered_images, None)
+                    if image_path is None:
+                        continue
+                    if slide_num in cache_paths:
+                        store_in_cache(image_path, cache_paths[slide_num])
+                    yield image_path
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    return total_slides, images()
+
+
+def slide_cache_keys(prs, width):
+    """Get a cache key for the image of each slide of a presentation.
+
+    A key is a hash of everything the slide's image depends on: the slide XML,
+    the parts it uses (layout, master, theme, media, charts, ...) and how they
+    are related, the presentation settings (e.g. slide size) and the
+    thumbnail width. Notes and links to other slides are left out, and so are
+    part names, which change when slides are added or removed. Slides with a
+    slide number field also depend on their position.
+    """
+    content_digests = {}  # Part name -> hash of its content
+
+    def content_digest(part):
+        if part.partname not in content_digests:
+            content_digests[part.partname] = hashlib.sha256(part.blob).digest()
+        return content_digests[part.partname]
+
+    def part_digest(part, rels):
+        digest = hashlib.sha256(content_digest(part))
+        for rId, rel in sorted(rels.items()):
+            target = rel.target_ref if rel.is_external else rel.target_part
+            digest.update(f"{rId} {rel.reltype} ".encode())
+            digest.update(
+                target.encode() if rel.is_external else content_digest(target)
+            )
+        return digest.digest()
+
+    # Presentation settings, without the slide list
+    presentation = deepcopy(prs.part._element)
+    for sldIdLst in presentation.findall(qn("p:sldIdLst")):
+        presentation.remove(sldIdLst)
+    settings = hashlib.sha256(etree.tostring(presentation)).digest()
+
+    keys = []
+    for slide_num, slide in enumerate(prs.slides, start=1):
+        key = hashlib.sha256()
+        key.update(f"{THUMBNAIL_CACHE_VERSION}:{width}:".encode())
+        key.update(settings)
+        if slide.element.xpath(".//a:fld[@type='slidenum']"):
+            key.update(f"slide {slide_num}".encode())
+        parts = rendered_parts(slide.part)
+        for digest in sorted(part_digest(part, rels) for part, rels in parts):
+            key.update(digest)
+        keys.append(key.hexdigest())
+    return keys
+
+
+def rendered_parts(slide_part):
+    """Get the parts a slide is rendered from, the slide included.
+
+    Returns a list of (part, rels), with rels the part's relationships that
+    matter for rendering, by rId.
+    """
+    parts = []
+    seen = set()
+    pending = [slide_part]
+    while pending:
+        part = pending.pop()
+        if part.partname in seen:
+            continue
+        seen.add(part.partname)
+        rels = {}
+        for rId, rel in part.rels.items():
+            if rel.reltype in (RT.NOTES_SLIDE, RT.SLIDE):
+                continue
+            # A master relates to all its layouts, but only this slide's is used
+            if rel.reltype == RT.SLIDE_LAYOUT and part is not slide_part:
+                continue
+            rels[rId] = rel
+            if not rel.is_external:
+                pending.append(rel.target_part)
+        parts.append((part, rels))
+    return parts
+
+
+def store_in_cache(image_path, cache_path):
+    """Copy a rendered slide image into the cache."""
+    temp_path = cache_path.with_name(f"{cache_path.stem}.{os.getpid()}.tmp")
+    shutil.copyfile(image_path, temp_path)
+    os.replace(temp_path, cache_path)
+
+
+def render_pages(pdf_path, temp_dir, first, last, width):
+    """Rasterize PDF pages first to last (1-based) to JPEGs width pixels wide."""
+    prefix = temp_dir / f"slide-{first:04d}"
     result = subprocess.run(
         [
-            "soffice",
-            "--headless",
-            "--convert-to",
-            "pdf",
-            "--outdir",
-            str(temp_dir),
-            str(pptx_path),
+            "pdftoppm",
+            "-jpeg",
+            "-f",
+            str(first),
+            "-l",
+            str(last),
+            "-scale-to-x",
+            str(width),
+            "-scale-to-y",
+            "-1",
+            str(pdf_path),
+            str(prefix),
         ],
         capture_output=True,
         text=True,
     )
-    if result.returncode != 0 or not pdf_path.exists():
-        raise RuntimeError("PDF conversion failed")
-
-    # Convert PDF to images
-    print(f"Converting to images at {dpi} DPI...")
-    result = subprocess.run(
-        ["pdftoppm", "-jpeg", "-r", str(dpi), str(pdf_path), str(temp_dir / "slide")],
-        capture_output=True,
-        text=True,
-    )
     if result.returncode != 0:
         raise RuntimeError("Image conversion failed")
-
-    visible_images = sorted(temp_dir.glob("slide-*.jpg"))
-
-    # Create full list with placeholders for hidden slides
-    all_images = []
-    visible_idx = 0
-
-    # Get placeholder dimensions from first visible slide
-    if visible_images:
-        with Image.open(visible_images[0]) as img:
-            placeholder_size = img.size
-    else:
-        placeholder_size = (1920, 1080)
-
-    for slide_num in range(1, total_slides + 1):
-        if slide_num in hidden_slides:
-            # Create placeholder image for hidden slide
-            placeholder_path = temp_dir / f"hidden-{slide_num:03d}.jpg"
-            placeholder_img = create_hidden_slide_placeholder(placeholder_size)
-            placeholder_img.save(placeholder_path, "JPEG")
-            all_images.append(placeholder_path)
-        else:
-            # Use the actual visible slide image
-            if visible_idx < len(visible_images):
-                all_images.append(visible_images[visible_idx])
-                visible_idx += 1
-
-    return all_images
+    return sorted(temp_dir.glob(f"{prefix.name}-*.jpg"))
 
 
 def create_grids(
@@ -278,22 +466,30 @@ def create_grids(
     output_path,
     placeholder_regions=None,
     slide_dimensions=None,
+    image_count=None,
 ):
-    """Create multiple thumbnail grids from slide images, max cols×(cols+1) images per grid."""
+    """Create multiple thumbnail grids from slide images, max cols×(cols+1) images per grid.
+
+    image_paths can be an iterator, of image_count images; each grid is created
+    as soon as its images are available.
+    """
     # Maximum images per grid is cols × (cols + 1) for better proportions
     max_images_per_grid = cols * (cols + 1)
     grid_files = []
+    if image_count is None:
+        image_count = len(image_paths)
 
     print(
         f"Creating grids with {cols} columns (max {max_images_per_grid} images per grid)"
     )
 
     # Split images into chunks
-    for chunk_idx, start_idx in enumerate(
-        range(0, len(image_paths), max_images_per_grid)
-    ):
-        end_idx = min(start_idx + max_images_per_grid, len(image_paths))
-        chunk_images = image_paths[start_idx:end_idx]
+    images = iter(image_paths)
+    start_idx = 0
+    for chunk_idx in itertools.count():
+        chunk_images = list(itertools.islice(images, max_images_per_grid))
+        if not chunk_images:
+            break
 
         # Create grid for this chunk
         grid = create_grid(
@@ -301,7 +497,7 @@ def create_grids(
         )
 
         # Generate output filename
-        if len(image_paths) <= max_images_per_grid:
+        if image_count <= max_images_per_grid:
             # Single grid - use base filename without suffix
             grid_filename = output_path
         else:
@@ -314,6 +510,7 @@ def create_grids(
         grid_filename.parent.mkdir(parents=True, exist_ok=True)
         grid.save(str(grid_filename), quality=JPEG_QUALITY)
         grid_files.append(str(grid_filename))
+        start_idx += len(chunk_images)
 
     return grid_files
 
@@ -398,6 +595,14 @@ def create_grid(
                 x_scale = orig_w / slide_width_inches
                 y_scale = orig_h / slide_height_inches
 
+                # Thicker proportional stroke width, as it would be at
+                # CONVERSION_DPI, scaled to this image
+                dpi_w = slide_width_inches * CONVERSION_DPI
+                dpi_h = slide_height_inches * CONVERSION_DPI
+                stroke_width = max(
+                    1, round(max(5, int(min(dpi_w, dpi_h)) // 150) * orig_w / dpi_w)
+                )
+
                 # Create a highlight overlay
                 overlay = Image.new("RGBA", img.size, (255, 255, 255, 0))
                 overlay_draw = ImageDraw.Draw(overlay)
@@ -412,9 +617,6 @@ def create_grid(
 
                     # Draw highlight outline with red color and thick stroke
                     # Using a bright red outline instead of fill
-                    stroke_width = max(
-                        5, min(orig_w, orig_h) // 150
-                    )  # Thicker proportional stroke width
                     overlay_draw.rectangle(
                         [(px_left, px_top), (px_left + px_width, px_top + px_height)],
                         outline=(255, 0, 0, 255),  # Bright red, fully opaque
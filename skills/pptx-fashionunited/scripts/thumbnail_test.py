@@ -0,0 +1,225 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from lxml import etree
+from PIL import Image
+from pptx import Presentation
+from pptx.oxml.ns import qn
+
+import thumbnail
+
+# Stands in for pdftoppm: the "PDF" lists one slide title per page, and page
+# images are painted with a gray level of 20 × the number in the title
+STUB_PDFTOPPM = f"""#!{sys.executable}
+import sys
+from pathlib import Path
+from PIL import Image
+
+args = sys.argv[1:]
+first, last = int(args[args.index("-f") + 1]), int(args[args.index("-l") + 1])
+width = int(args[args.index("-scale-to-x") + 1])
+pdf_path, prefix = args[-2:]
+with open(Path(pdf_path).with_name("pdftoppm.log"), "a") as log:
+    log.write(f"{{first}}-{{last}}\\n")
+titles = Path(pdf_path).read_text().splitlines()
+if "broken" in titles:
+    sys.exit(1)
+for page in range(first, last + 1):
+    level = int(titles[page - 1].split()[-1]) * 20
+    Image.new("RGB", (width, width * 3 // 4), (level,) * 3).save(f"{{prefix}}-{{page:02d}}.jpg")
+"""
+
+
+def make_pptx(path, titles, hidden=()):
+    """Write a presentation with a title-only slide per title; hidden are 1-based."""
+    presentation = Presentation()
+    for title in titles:
+        slide = presentation.slides.add_slide(presentation.slide_layouts[5])
+        slide.shapes.title.text = title
+    for slide_num in hidden:
+        presentation.slides[slide_num - 1].element.set("show", "0")
+    presentation.save(path)
+    return path
+
+
+def fake_convert_document(source_path, outdir, fmt):
+    """Stands in for soffice: "converts" the visible slides to a list of titles."""
+    presentation = Presentation(str(source_path))
+    titles = [
+        slide.shapes.title.text
+        for slide in presentation.slides
+        if slide.element.get("show") != "0"
+    ]
+    pdf_path = Path(outdir) / f"{Path(source_path).stem}.{fmt}"
+    pdf_path.write_text("\n".join(titles))
+    fake_convert_document.calls.append(titles)
+    return subprocess.CompletedProcess([], 0)
+
+
+class ThumbnailTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        bin_dir = self.temp_dir / "bin"
+        bin_dir.mkdir()
+        pdftoppm = bin_dir / "pdftoppm"
+        pdftoppm.write_text(STUB_PDFTOPPM)
+        pdftoppm.chmod(0o755)
+
+        fake_convert_document.calls = []
+        patches = [
+            mock.patch.dict(os.environ, {"PATH": f"{bin_dir}{os.pathsep}{os.environ['PATH']}"}),
+            mock.patch.object(thumbnail, "convert_document", fake_convert_document),
+            mock.patch("builtins.print"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def convert(self, pptx_path, **kwargs):
+        """Return the gray level of each slide image, None for hidden slides."""
+        work_dir = Path(tempfile.mkdtemp(dir=self.temp_dir))
+        count, images = thumbnail.convert_to_images(pptx_path, work_dir, 40, **kwargs)
+        levels = []
+        for path in images:
+            with Image.open(path) as image:
+                levels.append(None if path.name.startswith("hidden-") else image.getpixel((5, 5))[0])
+        self.assertEqual(len(levels), count)
+        log = work_dir / "pdftoppm.log"
+        self.pdftoppm_calls = log.read_text().split() if log.exists() else []
+        return levels
+
+    def assertLevels(self, levels, expected):
+        """Assert that images have the levels of the given slide numbers (JPEG is lossy)."""
+        self.assertEqual(len(levels), len(expected))
+        for level, number in zip(levels, expected):
+            if number is None:
+                self.assertIsNone(level)
+            else:
+                self.assertAlmostEqual(level, number * 20, delta=6)
+
+
+class TestRenderPages(ThumbnailTestCase):
+    def test_slides_in_order_over_page_ranges(self):
+        """Test that page ranges rendered in parallel come back in slide order"""
+        pptx_path = make_pptx(
+            self.temp_dir / "deck.pptx", [f"slide {n}" for n in range(1, 8)], hidden=[3]
+        )
+        with mock.patch.object(thumbnail, "PAGES_PER_RANGE", 2):
+            levels = self.convert(pptx_path, jobs=3)
+
+        self.assertLevels(levels, [1, 2, None, 4, 5, 6, 7])
+        # Six visible slides: three ranges of two pages
+        self.assertEqual(sorted(self.pdftoppm_calls), ["1-2", "3-4", "5-6"])
+
+    def test_rendered_at_the_thumbnail_width(self):
+        """Test that pages are rasterized straight at the requested width"""
+        pptx_path = make_pptx(self.temp_dir / "deck.pptx", ["slide 1"])
+        _, images = thumbnail.convert_to_images(pptx_path, self.temp_dir, 40, jobs=1)
+        with Image.open(next(images)) as image:
+            self.assertEqual(image.width, 40)
+
+    def test_render_failure(self):
+        """Test that a failing pdftoppm is reported when the images are consumed"""
+        pptx_path = make_pptx(self.temp_dir / "deck.pptx", ["slide 1", "broken"])
+        _, images = thumbnail.convert_to_images(pptx_path, self.temp_dir, 40, jobs=2)
+        with self.assertRaisesRegex(RuntimeError, "Image conversion failed"):
+            list(images)
+
+    def test_grids_from_rendered_images(self):
+        """Test that grids are created from the images as they are rendered"""
+        pptx_path = make_pptx(self.temp_dir / "deck.pptx", [f"slide {n}" for n in range(1, 8)])
+        count, images = thumbnail.convert_to_images(pptx_path, self.temp_dir, 40, jobs=2)
+        grid_files = thumbnail.create_grids(
+            images, 2, 40, self.temp_dir / "grid.jpg", image_count=count
+        )
+        self.assertEqual(
+            grid_files,
+            [str(self.temp_dir / "grid-1.jpg"), str(self.temp_dir / "grid-2.jpg")],
+        )
+
+
+class TestThumbnailCache(ThumbnailTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_dir = self.temp_dir / "cache"
+        self.pptx_path = make_pptx(
+            self.temp_dir / "deck.pptx", ["slide 1", "slide 2", "slide 3", "slide 4"], hidden=[4]
+        )
+
+    def edit(self, change):
+        presentation = Presentation(str(self.pptx_path))
+        change(presentation)
+        presentation.save(str(self.pptx_path))
+
+    def test_unchanged_deck_renders_nothing(self):
+        """Test that a second run takes every slide image from the cache"""
+        self.assertLevels(self.convert(self.pptx_path, cache_dir=self.cache_dir), [1, 2, 3, None])
+        self.assertLevels(self.convert(self.pptx_path, cache_dir=self.cache_dir), [1, 2, 3, None])
+        self.assertEqual(fake_convert_document.calls, [["slide 1", "slide 2", "slide 3"]])
+        self.assertEqual(len(list(self.cache_dir.glob("*.jpg"))), 3)
+
+    def test_only_changed_slides_are_rendered(self):
+        """Test that an edited slide is rendered again, alone, in its place"""
+        self.convert(self.pptx_path, cache_dir=self.cache_dir)
+        self.edit(lambda prs: setattr(prs.slides[1].shapes.title, "text", "slide 9"))
+
+        self.assertLevels(self.convert(self.pptx_path, cache_dir=self.cache_dir), [1, 9, 3, None])
+        self.assertEqual(fake_convert_document.calls[-1], ["slide 9"])
+
+    def test_moved_slides_stay_cached(self):
+        """Test that reordering slides doesn't invalidate their images"""
+        self.convert(self.pptx_path, cache_dir=self.cache_dir)
+
+        def move_first_slide_last(prs):
+            slide_ids = prs.slides._sldIdLst
+            slide_ids.append(slide_ids[0])
+
+        self.edit(move_first_slide_last)
+        self.assertLevels(self.convert(self.pptx_path, cache_dir=self.cache_dir), [2, 3, None, 1])
+        self.assertEqual(len(fake_convert_document.calls), 1)
+
+    def test_cache_keys(self):
+        """Test that keys follow what a slide looks like, not its notes or position"""
+        presentation = Presentation(str(self.pptx_path))
+        keys = thumbnail.slide_cache_keys(presentation, 40)
+        self.assertEqual(len(set(keys)), 4)
+        self.assertNotEqual(thumbnail.slide_cache_keys(presentation, 80), keys)
+
+        presentation.slides[0].notes_slide.notes_text_frame.text = "Speaker notes"
+        self.assertEqual(thumbnail.slide_cache_keys(presentation, 40), keys)
+
+        presentation.slide_layouts[5].placeholders[0].text_frame.text = "Layout title"
+        changed = thumbnail.slide_cache_keys(presentation, 40)
+        self.assertTrue(all(old != new for old, new in zip(keys, changed)))
+
+    def test_slide_number_fields_depend_on_the_position(self):
+        """Test that a slide showing its number is rendered again when it moves"""
+
+        def add_slide_number(prs):
+            paragraph = prs.slides[0].shapes.title.text_frame.paragraphs[0]
+            etree.SubElement(
+                paragraph._p,
+                qn("a:fld"),
+                id="{5C2A9E0B-6F1D-4C5E-9B7A-1D2E3F4A5B6C}",
+                type="slidenum",
+            )
+
+        self.edit(add_slide_number)
+        presentation = Presentation(str(self.pptx_path))
+        keys = thumbnail.slide_cache_keys(presentation, 40)
+        slide_ids = presentation.slides._sldIdLst
+        slide_ids.append(slide_ids[0])
+        moved = thumbnail.slide_cache_keys(presentation, 40)
+        self.assertNotEqual(moved[-1], keys[0])
+        self.assertEqual(moved[:3], keys[1:])
+
+
+if __name__ == "__main__":
+    unittest.main()
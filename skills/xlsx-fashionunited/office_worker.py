@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Pool of long-lived headless LibreOffice workers for conversions and recalculation.
+
+Starting `soffice --headless` costs several seconds per call. Once a pool is
+started, convert_document() and recalculate_document() hand their work to an
+already running LibreOffice over a UNO socket instead. Each worker has its own
+profile and port and is used by one caller at a time (file lock); a caller
+that finds every worker busy for LOCK_TIMEOUT seconds runs one-shot instead.
+
+Every call health-checks its worker first and restarts it if it crashed or
+stopped answering. When no pool is running, the LibreOffice Python bindings
+(`uno`) are not importable, or a worker cannot be (re)started, the call falls
+back to a one-shot `soffice` subprocess, exactly as before.
+
+Usage:
+    python office_worker.py start [--workers N]
+    python office_worker.py status
+    python office_worker.py stop
+
+One copy per skill (docx and pptx ooxml/scripts, xlsx); keep them in sync.
+"""
+
+import argparse
+import getpass
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no pool, always one-shot
+    fcntl = None
+
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+    from com.sun.star.uno import RuntimeException as UnoRuntimeException
+except ImportError:  # LibreOffice Python bindings not available
+    uno = None
+
+SOFFICE = "soffice"
+
+# Worker state (pid/port per worker), lock files and profiles live here
+STATE_DIR = Path(tempfile.gettempdir()) / f"office-worker-{getpass.getuser()}"
+
+STARTUP_TIMEOUT = 30  # Seconds to wait for a new worker to accept connections
+LOCK_TIMEOUT = 60  # Seconds to wait for a free worker before running one-shot
+LOCK_POLL_INTERVAL = 0.1  # Seconds between attempts to lock a busy worker
+
+# Filters used for "pdf" when no explicit filter is given, by document service
+PDF_EXPORT_FILTERS = (
+    ("com.sun.star.presentation.PresentationDocument", "impress_pdf_Export"),
+    ("com.sun.star.sheet.SpreadsheetDocument", "calc_pdf_Export"),
+    ("com.sun.star.text.TextDocument", "writer_pdf_Export"),
+    ("com.sun.star.drawing.DrawingDocument", "draw_pdf_Export"),
+)
+
+
+class OfficeWorkerError(Exception):
+    """A worker could not be used; the caller should fall back to one-shot soffice."""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage headless LibreOffice workers")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    start_parser = subparsers.add_parser("start", help="Start the worker pool")
+    start_parser.add_argument(
+        "--workers", type=int, default=1, help="Number of workers (default: 1)"
+    )
+    subparsers.add_parser("status", help="Health-check running workers")
+    subparsers.add_parser("stop", help="Stop all workers")
+    args = parser.parse_args()
+
+    if args.command == "start":
+        if uno is None or fcntl is None:
+            sys.exit("Error: LibreOffice Python bindings (uno) are not available")
+        try:
+            for worker in start_pool(args.workers):
+                print(f"Worker {worker.index} running (pid {worker.pid}, port {worker.port})")
+        except OfficeWorkerError as e:
+            sys.exit(f"Error: {e}")
+    elif args.command == "status":
+        workers = pool_workers()
+        if not workers:
+            print("No workers running")
+        for worker in workers:
+            state = "healthy" if worker.healthy() else "not responding"
+            print(f"Worker {worker.index}: {state} (pid {worker.pid}, port {worker.port})")
+    elif args.command == "stop":
+        stop_pool()
+        print("Workers stopped")
+
+
+def convert_document(input_path, outdir, convert_to, timeout=None):
+    """Convert a document like `soffice --headless --convert-to <convert_to>`.
+
+    Args:
+        input_path: Document to convert
+        outdir: Directory for the converted file, named <stem>.<ext>
+        convert_to: "<ext>" or "<ext>:<filter name>", as for --convert-to
+        timeout: Maximum time for the conversion in seconds
+
+    Returns:
+        subprocess.CompletedProcess: returncode 0 on success, stderr on failure
+
+    Raises:
+        subprocess.TimeoutExpired: If the conversion took longer than timeout
+        FileNotFoundError: If soffice is not installed (one-shot fallback)
+    """
+    with acquire_worker() as worker:
+        if worker is not None:
+            try:
+                return worker.run(
+                    "convert", timeout, worker.convert, input_path, outdir, convert_to
+                )
+            except OfficeWorkerError:
+                pass
+
+    return subprocess.run(
+        [
+            SOFFICE,
+            "--headless",
+            "--convert-to",
+            convert_to,
+            "--outdir",
+            str(outdir),
+            str(input_path),
+        ],
+        capture_output=True,
+        timeout=timeout,
+        text=True,
+    )
+
+
+def recalculate_document(path, timeout=None):
+    """Recalculate all formulas of a spreadsheet and save it in place.
+
+    Returns:
+        bool: True if a worker did it, False if the caller must fall back to
+        its one-shot soffice macro call
+
+    Raises:
+        subprocess.TimeoutExpired: If recalculation took longer than timeout
+    """
+    with acquire_worker() as worker:
+        if worker is None:
+            return False
+        try:
+            worker.run("recalculate", timeout, worker.recalculate, path)
+        except OfficeWorkerError:
+            return False
+    return True
+
+
+class OfficeWorker:
+    """One headless soffice process listening on a local UNO socket."""
+
+    def __init__(self, index, state_dir=STATE_DIR):
+        self.index = index
+        self.state_dir = Path(state_dir)
+        self.state_file = self.state_dir / f"worker-{index}.json"
+        self.lock_file = self.state_dir / f"worker-{index}.lock"
+        self.profile_dir = self.state_dir / f"profile-{index}"
+        self.pid = None
+        self.port = None
+        if self.state_file.exists():
+            state = json.loads(self.state_file.read_text())
+            self.pid, self.port = state["pid"], state["port"]
+
+    def start(self):
+        """Launch soffice and wait until it accepts UNO connections."""
+        self.port = _free_port()
+        try:
+            process = subprocess.Popen(
+                [
+                    SOFFICE,
+                    "--headless",
+                    "--invisible",
+                    "--nologo",
+                    "--nodefault",
+                    "--norestore",
+                    f"--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext",
+                    self._profile_arg(),
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,  # Outlive its starter; kill() signals the group
+            )
+        except OSError as e:
+            raise OfficeWorkerError(f"Cannot start {SOFFICE}: {e}")
+        self.pid = process.pid
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.state_file.write_text(json.dumps({"pid": self.pid, "port": self.port}))
+
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise OfficeWorkerError(f"Worker {self.index} exited during startup")
+            if self.healthy():
+                return
+            time.sleep(0.25)
+        self.kill()
+        raise OfficeWorkerError(f"Worker {self.index} did not start in {STARTUP_TIMEOUT}s")
+
+    def restart(self):
+        self.kill()
+        self.start()
+
+    def kill(self):
+        """Kill the soffice process group, if it is still the one this worker started.
+
+        soffice runs soffice.bin as a child in its process group (session), so
+        the whole group is signaled. A pid from the state file that now belongs
+        to another process (PID reuse, reboot) is left alone.
+        """
+        if self.pid is None or not self._owns_pid():
+            return
+        for sig in (signal.SIGTERM, signal.SIGKILL):
+            try:
+                os.killpg(self.pid, sig)
+            except OSError:
+                break
+            for _ in range(20):
+                if not _group_alive(self.pid):
+                    return
+                time.sleep(0.1)
+
+    def stop(self):
+        self.kill()
+        self.state_file.unlink(missing_ok=True)
+
+    def healthy(self):
+        """Return True if the process is alive and answers over UNO."""
+        if self.pid is None or not _pid_alive(self.pid) or not self._owns_pid():
+            return False
+        try:
+            self._desktop()
+        except OfficeWorkerError:
+            return False
+        return True
+
+    def _profile_arg(self):
+        return f"-env:UserInstallation={self.profile_dir.resolve().as_uri()}"
+
+    def _owns_pid(self):
+        """Return True if self.pid is still the soffice started with this worker's profile."""
+        command = _command_line(self.pid)
+        return command is not None and self._profile_arg() in command
+
+    def _desktop(self):
+        try:
+            local = uno.getComponentContext()
+            resolver = local.ServiceManager.createInstanceWithContext(
+                "com.sun.star.bridge.UnoUrlResolver", local
+            )
+            ctx = resolver.resolve(
+                f"uno:socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"
+            )
+            return ctx.ServiceManager.createInstanceWithContext(
+                "com.sun.star.frame.Desktop", ctx
+            )
+        except Exception as e:
+            raise OfficeWorkerError(f"Worker {self.index} not reachable: {e}")
+
+    def run(self, action, timeout, func, *args):
+        """Run func(*args) against this worker, restarting the worker if it fails.
+
+        A worker that crashes or exceeds the timeout is killed and restarted,
+        so the next call finds it healthy again.
+        """
+        outcome = {}
+
+        def target():
+            try:
+                outcome["result"] = func(*args)
+            except Exception as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            self._restart_quietly()
+            raise subprocess.TimeoutExpired(f"{SOFFICE} worker {action}", timeout)
+
+        error = outcome.get("error")
+        if error is None:
+            return outcome["result"]
+        if isinstance(error, UnoRuntimeException) or not self.healthy():
+            # The connection or the process died; bring it back for next time
+            self._restart_quietly()
+        raise OfficeWorkerError(f"Worker {self.index} failed to {action}: {error}")
+
+    def _restart_quietly(self):
+        try:
+            self.restart()
+        except OfficeWorkerError:
+            pass  # Next call health-checks and retries, or falls back
+
+    def convert(self, input_path, outdir, convert_to):
+        ext, _, filter_name = convert_to.partition(":")
+        output_path = Path(outdir) / f"{Path(input_path).stem}.{ext}"
+        doc = self._load(input_path, ReadOnly=True)
+        if doc is None:
+            return subprocess.CompletedProcess(
+                convert_to, 1, "", f"Error: source file could not be loaded: {input_path}"
+            )
+        try:
+            if not filter_name:
+                filter_name = _default_filter(doc, ext)
+            doc.storeToURL(
+                output_path.resolve().as_uri(),
+                _properties(FilterName=filter_name, Overwrite=True),
+            )
+        finally:
+            doc.close(True)
+        return subprocess.CompletedProcess(convert_to, 0, "", "")
+
+    def recalculate(self, path):
+        doc = self._load(path)
+        if doc is None:
+            raise OfficeWorkerError(f"Cannot load {path}")
+        try:
+            doc.calculateAll()
+            doc.store()
+        finally:
+            doc.close(True)
+
+    def _load(self, path, **properties):
+        return self._desktop().loadComponentFromURL(
+            Path(path).resolve().as_uri(),
+            "_blank",
+            0,
+            _properties(Hidden=True, **properties),
+        )
+
+
+def pool_workers(state_dir=STATE_DIR):
+    """Return the workers of the running pool (empty if no pool was started)."""
+    indexes = sorted(
+        int(path.stem.split("-")[1]) for path in Path(state_dir).glob("worker-*.json")
+    )
+    return [OfficeWorker(index, state_dir) for index in indexes]
+
+
+def start_pool(count=1, state_dir=STATE_DIR):
+    """Start (or restart) count workers, stopping any extra ones."""
+    stop_pool(state_dir)
+    workers = [OfficeWorker(index, state_dir) for index in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def stop_pool(state_dir=STATE_DIR):
+    for worker in pool_workers(state_dir):
+        worker.stop()
+
+
+@contextmanager
+def acquire_worker(state_dir=STATE_DIR, timeout=LOCK_TIMEOUT):
+    """Yield a healthy worker locked for this caller, or None to fall back.
+
+    If all workers are busy, waits up to timeout seconds for one to be free
+    before yielding None.
+    """
+    workers = pool_workers(state_dir) if uno is not None and fcntl is not None else []
+    if not workers:
+        yield None
+        return
+
+    # Take the first free worker, in random order so callers spread out
+    random.shuffle(workers)
+    deadline = time.monotonic() + timeout
+    worker, lock = _lock_free_worker(workers)
+    while worker is None and time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        worker, lock = _lock_free_worker(workers)
+    if worker is None:
+        yield None
+        return
+
+    try:
+        # Reload the state in case another caller restarted the worker
+        worker = OfficeWorker(worker.index, state_dir)
+        if not worker.healthy():
+            try:
+                worker.restart()
+            except OfficeWorkerError:
+                worker = None
+        yield worker
+    finally:
+        lock.close()
+
+
+def _lock_free_worker(workers):
+    """Lock the first worker no one else holds; return (worker, lock file) or (None, None)."""
+    for worker in workers:
+        lock = open(worker.lock_file, "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return worker, lock
+        except OSError:
+            lock.close()
+    return None, None
+
+
+def _default_filter(doc, ext):
+    if ext == "pdf":
+        for service, filter_name in PDF_EXPORT_FILTERS:
+            if doc.supportsService(service):
+                return filter_name
+    raise OfficeWorkerError(f"No default export filter for .{ext}")
+
+
+def _properties(**values):
+    properties = []
+    for name, value in values.items():
+        prop = PropertyValue()
+        prop.Name, prop.Value = name, value
+        properties.append(prop)
+    return tuple(properties)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _command_line(pid):
+    """Return the command line of a running process, or None if it cannot be read."""
+    if os.path.isdir("/proc/self"):
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                command = f.read()
+        except OSError:
+            return None
+        return command.replace(b"\0", b" ").decode(errors="replace") or None  # Empty: zombie
+    try:
+        result = subprocess.run(
+            ["ps", "-o", "command=", "-p", str(pid)], capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() or None
+
+
+def _group_alive(pgid):
+    """Return True while any process of the process group is left."""
+    _pid_alive(pgid)  # Reap the group leader if it is a crashed child of this process
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    # A crashed child of this process lingers as a zombie until reaped
+    try:
+        reaped, _ = os.waitpid(pid, os.WNOHANG)
+    except ChildProcessError:
+        return True
+    return reaped == 0
+
+
+if __name__ == "__main__":
+    main()
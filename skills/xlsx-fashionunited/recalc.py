@@ -2,20 +2,54 @@
 """
 Excel Formula Recalculation Script
 Recalculates all formulas in an Excel file using LibreOffice
+
+With --batch, recalculates many files in one or a few long-lived LibreOffice
+instances (--jobs), each with its own profile, and reports on all of them.
 """
 
+import argparse
 import json
 import sys
 import subprocess
 import os
 import platform
+import posixpath
+import queue
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from openpyxl import load_workbook
+from lxml import etree
+from openpyxl.utils.cell import coordinate_to_tuple, get_column_letter
+import office_worker
+from office_worker import OfficeWorker, OfficeWorkerError, recalculate_document
+
+EXCEL_ERRORS = ['#VALUE!', '#DIV/0!', '#REF!', '#NAME?', '#NULL!', '#NUM!', '#N/A']
 
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+DOC_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+SHEET_TAG = f'{{{MAIN_NS}}}sheet'
+ROW_TAG = f'{{{MAIN_NS}}}row'
+CELL_TAG = f'{{{MAIN_NS}}}c'
+FORMULA_TAG = f'{{{MAIN_NS}}}f'
+VALUE_TAG = f'{{{MAIN_NS}}}v'
+INLINE_STRING_TAG = f'{{{MAIN_NS}}}is'
+STRING_ITEM_TAG = f'{{{MAIN_NS}}}si'
+RUN_TAG = f'{{{MAIN_NS}}}r'
+TEXT_TAG = f'{{{MAIN_NS}}}t'
+RELATIONSHIP_TAG = f'{{{PKG_REL_NS}}}Relationship'
 
-def setup_libreoffice_macro():
-    """Setup LibreOffice macro for recalculation if not already configured"""
-    if platform.system() == 'Darwin':
+
+def setup_libreoffice_macro(profile_dir=None):
+    """Setup LibreOffice macro for recalculation if not already configured
+    
+    profile_dir is a LibreOffice user installation to use instead of the default one
+    """
+    if profile_dir is not None:
+        macro_dir = os.path.join(profile_dir, 'user', 'basic', 'Standard')
+    elif platform.system() == 'Darwin':
         macro_dir = os.path.expanduser('~/Library/Application Support/LibreOffice/4/user/basic/Standard')
     else:
         macro_dir = os.path.expanduser('~/.config/libreoffice/4/user/basic/Standard')
@@ -28,7 +62,7 @@ def setup_libreoffice_macro():
                 return True
     
     if not os.path.exists(macro_dir):
-        subprocess.run(['soffice', '--headless', '--terminate_after_init'], 
+        subprocess.run(['soffice', '--headless', '--terminate_after_init'] + profile_args(profile_dir), 
                       capture_output=True, timeout=10)
         os.makedirs(macro_dir, exist_ok=True)
     
@@ -50,27 +84,13 @@ def setup_libreoffice_macro():
         return False
 
 
-def recalc(filename, timeout=30):
-    """
-    Recalculate formulas in Excel file and report any errors
-    
-    Args:
-        filename: Path to Excel file
-        timeout: Maximum time to wait for recalculation (seconds)
-    
-    Returns:
-        dict with error locations and counts
-    """
-    if not Path(filename).exists():
-        return {'error': f'File {filename} does not exist'}
-    
-    abs_path = str(Path(filename).absolute())
-    
-    if not setup_libreoffice_macro():
+def recalc_with_macro(abs_path, timeout, profile_dir=None):
+    """Recalculate with a one-shot soffice running the RecalculateAndSave macro"""
+    if not setup_libreoffice_macro(profile_dir):
         return {'error': 'Failed to setup LibreOffice macro'}
     
     cmd = [
-        'soffice', '--headless', '--norestore',
+        'soffice', '--headless', '--norestore', *profile_args(profile_dir),
         'vnd.sun.star.script:Standard.Module1.RecalculateAndSave?language=Basic&location=application',
         abs_path
     ]
@@ -91,35 +111,62 @@ def recalc(filename, timeout=30):
     
     result = subprocess.run(cmd, capture_output=True, text=True)
     
-    if result.returncode != 0 and result.returncode != 124:  # 124 is timeout exit code
+    if result.returncode == 124:  # timeout exit code: the file was not saved
+        return {'error': f'Recalculation timed out after {timeout}s'}
+    if result.returncode != 0:
         error_msg = result.stderr or 'Unknown error during recalculation'
         if 'Module1' in error_msg or 'RecalculateAndSave' not in error_msg:
             return {'error': 'LibreOffice macro not configured properly'}
         else:
             return {'error': error_msg}
     
+    return {}
+
+
+def profile_args(profile_dir):
+    """soffice arguments to use profile_dir as user installation, if given"""
+    if profile_dir is None:
+        return []
+    return [f'-env:UserInstallation={Path(profile_dir).resolve().as_uri()}']
+
+
+def recalc(filename, timeout=30):
+    """
+    Recalculate formulas in Excel file and report any errors
+    
+    Args:
+        filename: Path to Excel file
+        timeout: Maximum time to wait for recalculation (seconds)
+    
+    Returns:
+        dict with error locations and counts
+    """
+    if not Path(filename).exists():
+        return {'error': f'File {filename} does not exist'}
+    
+    abs_path = str(Path(filename).absolute())
+    
+    # Use a running office_worker.py pool if there is one, else one-shot soffice
+    try:
+        recalculated = recalculate_document(abs_path, timeout)
+    except subprocess.TimeoutExpired:
+        # The worker was restarted and the file left as it was
+        return {'error': f'Recalculation timed out after {timeout}s'}
+    
+    if not recalculated:
+        result = recalc_with_macro(abs_path, timeout)
+        if 'error' in result:
+            return result
+    
+    return check_workbook(filename)
+
+
+def check_workbook(filename):
+    """Report the Excel errors and the formula count of a recalculated file"""
     # Check for Excel errors in the recalculated file - scan ALL cells
     try:
-        wb = load_workbook(filename, data_only=True)
-        
-        excel_errors = ['#VALUE!', '#DIV/0!', '#REF!', '#NAME?', '#NULL!', '#NUM!', '#N/A']
-        error_details = {err: [] for err in excel_errors}
-        total_errors = 0
-        
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            # Check ALL rows and columns - no limits
-            for row in ws.iter_rows():
-                for cell in row:
-                    if cell.value is not None and isinstance(cell.value, str):
-                        for err in excel_errors:
-                            if err in cell.value:
-                                location = f"{sheet_name}!{cell.coordinate}"
-                                error_details[err].append(location)
-                                total_errors += 1
-                                break
-        
-        wb.close()
+        error_details, formula_count = scan_workbook(filename)
+        total_errors = sum(len(locations) for locations in error_details.values())
         
         # Build result summary
         result = {
@@ -136,17 +183,6 @@ def recalc(filename, timeout=30):
                     'locations': locations[:20]  # Show up to 20 locations
                 }
         
-        # Add formula count for context - also check ALL cells
-        wb_formulas = load_workbook(filename, data_only=False)
-        formula_count = 0
-        for sheet_name in wb_formulas.sheetnames:
-            ws = wb_formulas[sheet_name]
-            for row in ws.iter_rows():
-                for cell in row:
-                    if cell.value and isinstance(cell.value, str) and cell.value.startswith('='):
-                        formula_count += 1
-        wb_formulas.close()
-        
         result['total_formulas'] = formula_count
         
         return result
@@ -155,22 +191,355 @@ def recalc(filename, timeout=30):
         return {'error': str(e)}
 
 
+def recalc_batch(filenames, jobs=1, timeout=30):
+    """
+    Recalculate many Excel files in long-lived LibreOffice instances
+    
+    Starts up to jobs instances, each with its own profile in a temporary
+    directory, so they run concurrently, and stops them when done. Each file
+    gets the whole timeout; a file that times out, fails to load or crashes
+    its instance is reported as failed and the instance is restarted for the
+    next file.
+    Without the LibreOffice Python bindings, each file gets a one-shot soffice
+    as in recalc() instead, still with one profile per job.
+    
+    Args:
+        filenames: Paths to Excel files
+        jobs: Number of LibreOffice instances
+        timeout: Maximum time to recalculate each file (seconds)
+    
+    Returns:
+        dict with totals over all files and the recalc() result of each file
+    """
+    filenames = list(dict.fromkeys(str(filename) for filename in filenames))
+    jobs = max(1, min(jobs, len(filenames)))
+    state_dir = tempfile.mkdtemp(prefix='recalc-batch-')
+    instances = queue.Queue()
+    for index in range(jobs):
+        instances.put(BatchInstance(index, state_dir))
+    
+    def recalc_file(filename):
+        instance = instances.get()
+        try:
+            return instance.recalc(filename, timeout)
+        except Exception as e:  # Only this file fails, e.g. soffice missing
+            return {'error': str(e)}
+        finally:
+            instances.put(instance)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = dict(zip(filenames, executor.map(recalc_file, filenames)))
+    finally:
+        while not instances.empty():
+            instances.get().stop()
+        shutil.rmtree(state_dir, ignore_errors=True)
+    
+    return batch_report(results)
+
+
+class BatchInstance:
+    """One LibreOffice instance of a batch, recalculating one file at a time"""
+    
+    def __init__(self, index, state_dir):
+        # Started on first use, so the instances of a batch start concurrently
+        self.worker = OfficeWorker(index, state_dir) if office_worker.uno is not None else None
+        self.profile_dir = os.path.join(state_dir, f'oneshot-profile-{index}')
+    
+    def recalc(self, filename, timeout):
+        """Recalculate one file like recalc(), but in this instance"""
+        if not Path(filename).exists():
+            return {'error': f'File {filename} does not exist'}
+        
+        abs_path = str(Path(filename).absolute())
+        worker = self.healthy_worker()
+        if worker is not None:
+            try:
+                worker.run('recalculate', timeout, worker.recalculate, abs_path)
+            except subprocess.TimeoutExpired:
+                # The worker was restarted and the file left as it was
+                return {'error': f'Recalculation timed out after {timeout}s'}
+            except OfficeWorkerError as e:
+                return {'error': str(e)}
+        else:
+            result = recalc_with_macro(abs_path, timeout, self.profile_dir)
+            if 'error' in result:
+                return result
+        
+        return check_workbook(filename)
+    
+    def healthy_worker(self):
+        """Return the worker, (re)started if needed, or None to use one-shot soffice"""
+        if self.worker is None:
+            return None
+        if not self.worker.healthy():
+            try:
+                self.worker.restart()
+            except OfficeWorkerError:
+                return None
+        return self.worker
+    
+    def stop(self):
+        if self.worker is not None:
+            self.worker.stop()
+
+
+def batch_report(results):
+    """Aggregate the recalc() results of a batch, by file name"""
+    failed = [name for name, result in results.items() if 'error' in result]
+    with_errors = [name for name, result in results.items() if result.get('total_errors')]
+    
+    if failed:
+        status = 'failed'
+    elif with_errors:
+        status = 'errors_found'
+    else:
+        status = 'success'
+    
+    return {
+        'status': status,
+        'total_files': len(results),
+        'files_failed': len(failed),
+        'files_with_errors': len(with_errors),
+        'total_errors': sum(result.get('total_errors', 0) for result in results.values()),
+        'total_formulas': sum(result.get('total_formulas', 0) for result in results.values()),
+        'files': results
+    }
+
+
+def scan_workbook(filename):
+    """
+    Find the Excel errors and count the formulas in one pass over each sheet
+    
+    Streams the sheet XML instead of loading the workbook twice with openpyxl,
+    once for the cached values and once for the formulas. Cells are read as
+    openpyxl reads them: a cell has an error if its cached value is an error
+    (t="e") or a string that contains one, and counts as a formula if it has
+    one (other than an array or data table formula) or is a string starting
+    with '='.
+    
+    Args:
+        filename: Path to Excel file
+    
+    Returns:
+        (error_details, formula_count), where error_details maps each error
+        in EXCEL_ERRORS to the cells that have it, e.g. 'Sheet1!B2', in order
+    """
+    error_details = {err: [] for err in EXCEL_ERRORS}
+    formula_count = 0
+    
+    with zipfile.ZipFile(filename) as archive:
+        sheets, shared_strings = workbook_parts(archive)
+        shared_errors, shared_formulas = scan_shared_strings(archive, shared_strings)
+        for sheet_name, sheet_part in sheets:
+            with archive.open(sheet_part) as source:
+                formula_count += scan_sheet(
+                    source, sheet_name, shared_errors, shared_formulas, error_details
+                )
+    
+    return error_details, formula_count
+
+
+def workbook_parts(archive):
+    """Return the (name, part) of each worksheet in workbook order, and the shared strings part"""
+    package_rels = relationships(archive, '')
+    workbook = next(
+        (target for rel_type, target in package_rels.values() if rel_type.endswith('/officeDocument')),
+        'xl/workbook.xml'
+    )
+    workbook_rels = relationships(archive, workbook)
+    
+    sheets = []
+    root = etree.fromstring(archive.read(workbook), etree.XMLParser(resolve_entities=False))
+    for sheet in root.iter(SHEET_TAG):
+        rel_type, target = workbook_rels.get(sheet.get(f'{{{DOC_REL_NS}}}id'), ('', None))
+        if rel_type.endswith('/worksheet'):  # Chartsheets have no cells
+            sheets.append((sheet.get('name'), target))
+    
+    shared_strings = next(
+        (target for rel_type, target in workbook_rels.values() if rel_type.endswith('/sharedStrings')),
+        None
+    )
+    return sheets, shared_strings
+
+
+def relationships(archive, part):
+    """Map the relationship ids of a part ('' for the package) to (type, target part)"""
+    rels_part = posixpath.join(posixpath.dirname(part), '_rels', posixpath.basename(part) + '.rels')
+    try:
+        root = etree.fromstring(archive.read(rels_part), etree.XMLParser(resolve_entities=False))
+    except KeyError:
+        return {}
+    
+    rels = {}
+    for rel in root.iter(RELATIONSHIP_TAG):
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            target = target[1:]
+        else:
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+        rels[rel.get('Id')] = (rel.get('Type', ''), target)
+    return rels
+
+
+def scan_shared_strings(archive, part):
+    """
+    Check the shared strings once, so cells only look up their index
+    
+    Returns:
+        (errors, formulas): the first error in each string that has one, by
+        index, and the indexes of the strings starting with '='
+    """
+    errors = {}
+    formulas = set()
+    if part is None:
+        return errors, formulas
+    
+    with archive.open(part) as source:
+        context = etree.iterparse(
+            source, tag=STRING_ITEM_TAG, resolve_entities=False, huge_tree=True
+        )
+        for index, (_, item) in enumerate(context):
+            text = string_text(item).replace('x005F_', '')  # As openpyxl reads it
+            error = find_error(text)
+            if error:
+                errors[index] = error
+            if text.startswith('='):
+                formulas.add(index)
+            discard(item)
+    return errors, formulas
+
+
+def scan_sheet(source, sheet_name, shared_errors, shared_formulas, error_details):
+    """Add the errors in a worksheet to error_details and return its formula count"""
+    formula_count = 0
+    current_row = None
+    row = 0
+    column = 0  # Only kept up to date for cells without a reference
+    last_reference = None
+    
+    # End events only: a cell's row element has its attributes by then
+    context = etree.iterparse(
+        source, tag=(ROW_TAG, CELL_TAG), resolve_entities=False, huge_tree=True
+    )
+    for _, elem in context:
+        if elem.tag == ROW_TAG:
+            if elem is not current_row:  # No cells, but it still counts
+                row = int(elem.get('r', row + 1))
+            current_row = None
+            discard(elem)
+            continue
+        
+        if elem.getparent() is not current_row:
+            current_row = elem.getparent()
+            row = int(current_row.get('r', row + 1))
+            column = 0
+            last_reference = None
+        
+        reference = elem.get('r')
+        if reference:
+            last_reference = reference
+        else:
+            if last_reference:
+                column = coordinate_to_tuple(last_reference)[1]
+                last_reference = None
+            column += 1
+        
+        value = formula = inline_string = None
+        for child in elem:
+            if child.tag == VALUE_TAG:
+                value = child.text
+            elif child.tag == FORMULA_TAG:
+                formula = child
+            elif child.tag == INLINE_STRING_TAG:
+                inline_string = child
+        
+        cell_type = elem.get('t', 'n')
+        error = None
+        is_formula_text = False
+        if cell_type == 's':
+            if value:
+                error = shared_errors.get(int(value))
+                is_formula_text = int(value) in shared_formulas
+        elif cell_type in ('e', 'str', 'inlineStr'):
+            if cell_type == 'inlineStr':
+                value = string_text(inline_string) if inline_string is not None else None
+            if value:
+                error = find_error(value)
+                is_formula_text = value.startswith('=')
+        
+        if formula is not None:
+            if formula.get('t') not in ('array', 'dataTable'):
+                formula_count += 1
+        elif is_formula_text:
+            formula_count += 1
+        
+        if error:
+            coordinate = reference or f'{get_column_letter(column)}{row}'
+            error_details[error].append(f"{sheet_name}!{coordinate}")
+    
+    return formula_count
+
+
+def find_error(text):
+    """Return the first error in EXCEL_ERRORS that text contains, or None"""
+    for err in EXCEL_ERRORS:
+        if err in text:
+            return err
+    return None
+
+
+def string_text(elem):
+    """Text of a shared or inline string, without its phonetic runs"""
+    parts = [elem.findtext(TEXT_TAG) or '']
+    parts.extend(run.findtext(TEXT_TAG) or '' for run in elem.iterfind(RUN_TAG))
+    return ''.join(parts)
+
+
+def discard(elem):
+    """Free an element that iterparse has finished, and its finished siblings"""
+    elem.clear(keep_tail=True)
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python recalc.py <excel_file> [timeout_seconds]")
-        print("\nRecalculates all formulas in an Excel file using LibreOffice")
-        print("\nReturns JSON with error details:")
-        print("  - status: 'success' or 'errors_found'")
-        print("  - total_errors: Total number of Excel errors found")
-        print("  - total_formulas: Number of formulas in the file")
-        print("  - error_summary: Breakdown by error type with locations")
-        print("    - #VALUE!, #DIV/0!, #REF!, #NAME?, #NULL!, #NUM!, #N/A")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description='Recalculates all formulas in Excel files using LibreOffice',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='''Returns JSON with error details:
+  - status: 'success' or 'errors_found'
+  - total_errors: Total number of Excel errors found
+  - total_formulas: Number of formulas in the file
+  - error_summary: Breakdown by error type with locations
+    - #VALUE!, #DIV/0!, #REF!, #NAME?, #NULL!, #NUM!, #N/A
+
+With --batch, returns the totals over all files and the above per file
+under 'files'; status is 'failed' if any file could not be recalculated.'''
+    )
+    parser.add_argument('excel_file', nargs='?', help='Excel file to recalculate')
+    parser.add_argument('timeout_seconds', nargs='?', type=int,
+                        help='Maximum time to wait for recalculation (default: 30)')
+    parser.add_argument('--batch', nargs='+', metavar='FILE',
+                        help='Recalculate all these files in long-lived LibreOffice instances')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='LibreOffice instances for --batch, each with its own profile (default: 1)')
+    parser.add_argument('--timeout', type=int,
+                        help='Maximum time per file in seconds (default: 30)')
+    args = parser.parse_args()
     
-    filename = sys.argv[1]
-    timeout = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    timeout = args.timeout or args.timeout_seconds or 30
+    if args.batch:
+        files = args.batch + [name for name in (args.excel_file,) if name]
+        result = recalc_batch(files, args.jobs, timeout)
+    elif args.excel_file:
+        result = recalc(args.excel_file, timeout)
+    else:
+        parser.print_help()
+        sys.exit(1)
     
-    result = recalc(filename, timeout)
     print(json.dumps(result, indent=2))
 
 
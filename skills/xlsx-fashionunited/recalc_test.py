@@ -0,0 +1,361 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from openpyxl import Workbook, load_workbook
+
+import office_worker
+import recalc
+
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+
+# Stands in for soffice: initializes a profile at once, "recalculates" files
+# named slow*.xlsx in 10s and all others at once
+STUB_SOFFICE = '''#!/bin/sh
+case "$*" in
+  *--terminate_after_init*) exit 0 ;;
+  *slow*) sleep 10 ;;
+esac
+exit 0
+'''
+
+
+def write_workbook(path, cells):
+    """Write a one-sheet workbook whose sheet data is the given <c> elements"""
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr(
+            'xl/workbook.xml',
+            f'<workbook xmlns="{MAIN_NS}" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            '<sheets><sheet name="Data" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        )
+        archive.writestr(
+            'xl/_rels/workbook.xml.rels',
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"'
+            ' Target="worksheets/sheet1.xml"/></Relationships>'
+        )
+        archive.writestr(
+            'xl/worksheets/sheet1.xml',
+            f'<worksheet xmlns="{MAIN_NS}"><sheetData><row r="1">{cells}</row></sheetData></worksheet>'
+        )
+
+
+def write_package(path, sheets, shared_strings):
+    """Write a workbook of named sheets (name -> sheetData XML) with shared strings
+
+    The sheets are listed in the workbook in the given order, but their parts
+    are numbered in reverse, and every other one is targeted by absolute path.
+    """
+    rel_ns = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+    names = list(sheets)
+    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml'
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr(
+            '[Content_Types].xml',
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/xl/workbook.xml" ContentType="{content_type}.sheet.main+xml"/>'
+            f'<Override PartName="/xl/sharedStrings.xml" ContentType="{content_type}.sharedStrings+xml"/>'
+            + ''.join(
+                f'<Override PartName="/xl/worksheets/sheet{i + 1}.xml" ContentType="{content_type}.worksheet+xml"/>'
+                for i in range(len(names))
+            )
+            + '</Types>'
+        )
+        archive.writestr(
+            '_rels/.rels',
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{rel_ns}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        )
+        archive.writestr(
+            'xl/workbook.xml',
+            f'<workbook xmlns="{MAIN_NS}" xmlns:r="{rel_ns}"><sheets>'
+            + ''.join(
+                f'<sheet name="{name}" sheetId="{i + 1}" r:id="rId{i + 1}"/>'
+                for i, name in enumerate(names)
+            )
+            + '</sheets></workbook>'
+        )
+        rels = ''.join(
+            f'<Relationship Id="rId{i + 1}" Type="{rel_ns}/worksheet"'
+            f' Target="{"/xl/" if i % 2 else ""}worksheets/sheet{len(names) - i}.xml"/>'
+            for i in range(len(names))
+        )
+        archive.writestr(
+            'xl/_rels/workbook.xml.rels',
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{rels}<Relationship Id="rIdS" Type="{rel_ns}/sharedStrings" Target="sharedStrings.xml"/>'
+            '</Relationships>'
+        )
+        archive.writestr('xl/sharedStrings.xml', f'<sst xmlns="{MAIN_NS}">{"".join(shared_strings)}</sst>')
+        for i, name in enumerate(names):
+            archive.writestr(
+                f'xl/worksheets/sheet{len(names) - i}.xml',
+                f'<worksheet xmlns="{MAIN_NS}"><sheetData>{sheets[name]}</sheetData></worksheet>'
+            )
+
+
+def openpyxl_scan(filename):
+    """Scan a workbook the way recalc.py did before scan_workbook(): with openpyxl, twice"""
+    error_details = {err: [] for err in recalc.EXCEL_ERRORS}
+    workbook = load_workbook(filename, data_only=True)
+    for sheet_name in workbook.sheetnames:
+        for row in workbook[sheet_name].iter_rows():
+            for cell in row:
+                if isinstance(cell.value, str):
+                    for err in recalc.EXCEL_ERRORS:
+                        if err in cell.value:
+                            error_details[err].append(f'{sheet_name}!{cell.coordinate}')
+                            break
+    workbook.close()
+
+    formula_count = 0
+    workbook = load_workbook(filename, data_only=False)
+    for sheet_name in workbook.sheetnames:
+        for row in workbook[sheet_name].iter_rows():
+            for cell in row:
+                if isinstance(cell.value, str) and cell.value.startswith('='):
+                    formula_count += 1
+    workbook.close()
+    return error_details, formula_count
+
+
+class FakeWorker(office_worker.OfficeWorker):
+    """An OfficeWorker without soffice: hangs on hang*.xlsx, dies on crash*.xlsx"""
+
+    started = []
+    recalculated = []
+
+    def start(self):
+        self.pid = -1
+        FakeWorker.started.append(self.index)
+
+    def kill(self):
+        self.pid = None
+
+    def healthy(self):
+        return self.pid is not None
+
+    def recalculate(self, path):
+        name = Path(path).name
+        FakeWorker.recalculated.append((self.index, name))
+        if name.startswith('hang'):
+            time.sleep(3)
+        elif name.startswith('crash'):
+            self.pid = None
+            raise RuntimeError('connection lost')
+        else:
+            time.sleep(0.2)  # Long enough for the other instance to take a file
+
+
+class RecalcTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def workbook(self, name, cells='<c r="A1"><f>1+1</f><v>2</v></c>'):
+        path = self.temp_dir / name
+        write_workbook(path, cells)
+        return str(path)
+
+
+class TestOneShotRecalc(RecalcTestCase):
+
+    def setUp(self):
+        super().setUp()
+        if shutil.which('timeout') is None:
+            self.skipTest('needs the timeout command')
+        bin_dir = self.temp_dir / 'bin'
+        bin_dir.mkdir()
+        soffice = bin_dir / 'soffice'
+        soffice.write_text(STUB_SOFFICE)
+        soffice.chmod(0o755)
+        patches = [
+            mock.patch.object(office_worker, 'uno', None),  # No workers: one-shot soffice
+            mock.patch.object(recalc.platform, 'system', return_value='Linux'),
+            mock.patch.dict(os.environ, {
+                'PATH': f'{bin_dir}{os.pathsep}{os.environ["PATH"]}',
+                'HOME': str(self.temp_dir),  # Default profile of recalc()
+            }),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_timeout_is_an_error(self):
+        """Test that a one-shot soffice killed by the timeout is reported, not scanned"""
+        result = recalc.recalc(self.workbook('slow.xlsx'), timeout=1)
+        self.assertEqual(result, {'error': 'Recalculation timed out after 1s'})
+
+    def test_batch_counts_timeouts_as_failed(self):
+        """Test that a timed-out file fails in the batch report and the others are checked"""
+        files = [
+            self.workbook('slow.xlsx'),
+            self.workbook('errors.xlsx', '<c r="B2" t="e"><f>1/0</f><v>#DIV/0!</v></c>'),
+        ]
+        report = recalc.recalc_batch(files, jobs=2, timeout=1)
+
+        self.assertEqual(report['status'], 'failed')
+        self.assertEqual(report['files_failed'], 1)
+        self.assertEqual(report['files_with_errors'], 1)
+        self.assertEqual(report['files'][files[0]], {'error': 'Recalculation timed out after 1s'})
+        self.assertEqual(
+            report['files'][files[1]]['error_summary'],
+            {'#DIV/0!': {'count': 1, 'locations': ['Data!B2']}}
+        )
+
+    def test_batch_uses_one_profile_per_job(self):
+        """Test that concurrent one-shot calls don't share a LibreOffice profile"""
+        files = [self.workbook(f'book{i}.xlsx') for i in range(4)]
+        profiles = []
+        real_recalc_with_macro = recalc.recalc_with_macro
+
+        def recalc_with_macro(abs_path, timeout, profile_dir=None):
+            profiles.append(profile_dir)
+            return real_recalc_with_macro(abs_path, timeout, profile_dir)
+
+        with mock.patch.object(recalc, 'recalc_with_macro', recalc_with_macro):
+            report = recalc.recalc_batch(files, jobs=2, timeout=5)
+
+        self.assertEqual(report['status'], 'success')
+        self.assertNotIn(None, profiles)
+        self.assertLessEqual(len(set(profiles)), 2)
+        self.assertFalse(any(os.path.exists(profile) for profile in profiles))
+
+
+class TestWorkerBatch(RecalcTestCase):
+
+    def setUp(self):
+        super().setUp()
+        FakeWorker.started = []
+        FakeWorker.recalculated = []
+        patches = [
+            mock.patch.object(office_worker, 'uno', object()),
+            mock.patch.object(office_worker, 'UnoRuntimeException', ConnectionError, create=True),
+            mock.patch.object(recalc, 'OfficeWorker', FakeWorker),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_failures_are_isolated_to_their_file(self):
+        """Test that hung, crashing, missing and broken files fail alone"""
+        broken = self.temp_dir / 'broken.xlsx'
+        broken.write_text('not a zip file')
+        files = [
+            self.workbook('hang.xlsx'),
+            self.workbook('crash.xlsx'),
+            str(self.temp_dir / 'missing.xlsx'),
+            str(broken),
+            self.workbook('good.xlsx'),
+        ]
+        report = recalc.recalc_batch(files, jobs=1, timeout=1)
+        results = report['files']
+
+        self.assertEqual(results[files[0]], {'error': 'Recalculation timed out after 1s'})
+        self.assertIn('connection lost', results[files[1]]['error'])
+        self.assertEqual(results[files[2]], {'error': f'File {files[2]} does not exist'})
+        self.assertIn('error', results[files[3]])
+        self.assertEqual(results[files[4]]['status'], 'success')
+        self.assertEqual(report['files_failed'], 4)
+        self.assertEqual(report['total_formulas'], 1)
+        # Started once, restarted after the timeout and after the crash
+        self.assertEqual(FakeWorker.started, [0, 0, 0])
+
+    def test_instances_share_the_files(self):
+        """Test that jobs instances recalculate the files concurrently, each file once"""
+        files = [self.workbook(f'book{i}.xlsx') for i in range(6)]
+        report = recalc.recalc_batch(files + files[:2], jobs=2, timeout=5)
+
+        self.assertEqual(report['status'], 'success')
+        self.assertEqual(list(report['files']), files)
+        self.assertEqual(sorted(FakeWorker.started), [0, 1])
+        self.assertEqual(
+            sorted(name for _, name in FakeWorker.recalculated),
+            sorted(Path(f).name for f in files)
+        )
+        self.assertEqual({index for index, _ in FakeWorker.recalculated}, {0, 1})
+
+    def test_instances_are_stopped(self):
+        """Test that the batch stops its instances and removes their state"""
+        stopped = []
+        with mock.patch.object(FakeWorker, 'stop', lambda worker: stopped.append(worker.index)):
+            recalc.recalc_batch([self.workbook('book.xlsx')], jobs=3, timeout=5)
+        self.assertEqual(stopped, [0])  # Never more instances than files
+
+
+class TestScanWorkbook(RecalcTestCase):
+
+    def test_same_summary_as_openpyxl(self):
+        """Test that the streaming scan finds the errors and formulas openpyxl found"""
+        shared_strings = [
+            '<si><t>plain</t></si>',
+            '<si><t>x #REF! y</t></si>',
+            '<si><r><t>#DIV</t></r><r><rPr/><t>/0!</t></r></si>',  # Rich text
+            '<si><t>fine</t><rPh sb="0" eb="1"><t>#N/A</t></rPh></si>',  # Phonetic only
+            '<si><t>=NOT A FORMULA</t></si>',
+        ]
+        path = self.temp_dir / 'book.xlsx'
+        write_package(path, {
+            'First': (
+                '<row r="1">'
+                '<c r="A1" t="e"><f>1/0</f><v>#DIV/0!</v></c>'
+                '<c r="B1" t="s"><v>1</v></c>'
+                '<c r="C1" t="s"><v>2</v></c>'
+                '<c r="D1" t="s"><v>3</v></c>'
+                '<c r="E1" t="s"><v>4</v></c>'
+                '</row>'
+                '<row r="3">'
+                '<c r="A3"><f t="shared" ref="A3:A5" si="0">B3+1</f><v>1</v></c>'
+                '<c r="B3" t="str"><f>C3</f><v>#N/A text</v></c>'
+                '<c r="C3" t="inlineStr"><is><t>#NAME? inline</t></is></c>'
+                '<c r="D3"><f t="array" ref="D3">SUM(A1:A2)</f><v>0</v></c>'
+                '<c r="E3" t="e"><v>#SPILL!</v></c>'
+                '</row>'
+                '<row r="4"><c r="A4"><f t="shared" si="0"/><v>2</v></c></row>'
+                # Rows and cells without references follow on from the previous ones
+                '<row><c t="e"><v>#NUM!</v></c><c/><c t="e"><v>#NULL!</v></c></row>'
+                '<row r="9"><c r="B9" t="b"><v>1</v></c><c t="e"><v>#VALUE!</v></c></row>'
+            ),
+            'Second': '<row r="2"><c r="C2" t="e"><f>X</f><v>#N/A</v></c></row><row/>',
+            'Empty': '',
+        }, shared_strings)
+
+        error_details, formula_count = recalc.scan_workbook(str(path))
+        self.assertEqual((error_details, formula_count), openpyxl_scan(path))
+        self.assertEqual(error_details['#N/A'], ['First!B3', 'Second!C2'])
+        self.assertEqual(error_details['#NUM!'], ['First!A5'])
+        self.assertEqual(error_details['#VALUE!'], ['First!C9'])
+        # A1, A3, A4, B3, Second!C2, and the '=' string in E1 as openpyxl counted it
+        self.assertEqual(formula_count, 6)
+
+    def test_openpyxl_workbook(self):
+        """Test a workbook written by openpyxl: shared strings, formulas and several sheets"""
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.title = 'Data'
+        sheet['A1'] = '#REF! in text'
+        sheet['B2'] = '=SUM(A1:A3)'
+        sheet.append(['#DIV/0!', 3, '=A4*2', 'ok'])
+        other = workbook.create_sheet('Summary')
+        other['C3'] = '#REF! again'
+        other['D4'] = '=Data!B2'
+        path = self.temp_dir / 'openpyxl.xlsx'
+        workbook.save(path)
+
+        result = recalc.scan_workbook(str(path))
+        self.assertEqual(result, openpyxl_scan(path))
+        self.assertEqual(result[0]['#REF!'], ['Data!A1', 'Summary!C3'])
+        self.assertEqual(result[1], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()